@@ -15,6 +15,8 @@ from app.database import Base
 from app.config import settings 
 from app.models.user import User
 from app.models.document import Document, Query
+from app.models.ingestion_job import IngestionJob
+from app.models.document_chunk import DocumentChunk
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
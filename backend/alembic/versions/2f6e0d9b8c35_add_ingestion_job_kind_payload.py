@@ -0,0 +1,36 @@
+"""add kind/payload to ingestion_jobs for batch ingestion
+
+Revision ID: 2f6e0d9b8c35
+Revises: e4a8b6c1f273
+Create Date: 2026-10-18 12:21:37.905214
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6e0d9b8c35'
+down_revision: Union[str, None] = 'e4a8b6c1f273'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+
+    columns = [c['name'] for c in inspector.get_columns('ingestion_jobs')]
+    if 'kind' not in columns:
+        op.add_column('ingestion_jobs', sa.Column('kind', sa.String(), nullable=False, server_default='document'))
+    if 'payload' not in columns:
+        op.add_column('ingestion_jobs', sa.Column('payload', sa.JSON(), nullable=True))
+    op.alter_column('ingestion_jobs', 'document_id', existing_type=sa.Integer(), nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM ingestion_jobs WHERE document_id IS NULL")
+    op.alter_column('ingestion_jobs', 'document_id', existing_type=sa.Integer(), nullable=False)
+    op.drop_column('ingestion_jobs', 'payload')
+    op.drop_column('ingestion_jobs', 'kind')
@@ -0,0 +1,63 @@
+"""add documents.file_hash with (user_id, file_hash) index
+
+Revision ID: 5b1d2c7e9a41
+Revises: 382e5eb72149
+Create Date: 2026-10-18 09:12:04.118530
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1d2c7e9a41'
+down_revision: Union[str, None] = '382e5eb72149'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+
+    columns = [c['name'] for c in inspector.get_columns('documents')]
+    if 'file_hash' not in columns:
+        op.add_column('documents', sa.Column('file_hash', sa.String(length=64), nullable=True))
+
+    # Backfill from the JSON metadata written by older uploads
+    if bind.dialect.name == 'postgresql':
+        op.execute(
+            """
+            UPDATE documents
+            SET file_hash = doc_metadata->>'file_hash'
+            WHERE file_hash IS NULL
+              AND doc_metadata IS NOT NULL
+              AND doc_metadata->>'file_hash' IS NOT NULL
+            """
+        )
+    else:
+        documents = sa.table(
+            'documents',
+            sa.column('id', sa.Integer),
+            sa.column('doc_metadata', sa.JSON),
+            sa.column('file_hash', sa.String),
+        )
+        rows = bind.execute(
+            sa.select(documents.c.id, documents.c.doc_metadata).where(documents.c.file_hash.is_(None))
+        ).fetchall()
+        for row in rows:
+            file_hash = (row.doc_metadata or {}).get('file_hash')
+            if file_hash:
+                bind.execute(
+                    documents.update().where(documents.c.id == row.id).values(file_hash=file_hash)
+                )
+
+    indexes = [i['name'] for i in inspector.get_indexes('documents')]
+    if 'ix_documents_user_id_file_hash' not in indexes:
+        op.create_index('ix_documents_user_id_file_hash', 'documents', ['user_id', 'file_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_documents_user_id_file_hash', table_name='documents')
+    op.drop_column('documents', 'file_hash')
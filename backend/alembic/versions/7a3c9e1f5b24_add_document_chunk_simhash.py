@@ -0,0 +1,33 @@
+"""add simhash/duplicate_of to document_chunks
+
+Revision ID: 7a3c9e1f5b24
+Revises: 2f6e0d9b8c35
+Create Date: 2026-10-18 14:05:11.402817
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3c9e1f5b24'
+down_revision: Union[str, None] = '2f6e0d9b8c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+
+    columns = [c['name'] for c in inspector.get_columns('document_chunks')]
+    if 'simhash' not in columns:
+        op.add_column('document_chunks', sa.Column('simhash', sa.BigInteger(), nullable=True))
+    if 'duplicate_of' not in columns:
+        op.add_column('document_chunks', sa.Column('duplicate_of', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('document_chunks', 'duplicate_of')
+    op.drop_column('document_chunks', 'simhash')
@@ -0,0 +1,51 @@
+"""add upload_sessions table for resumable uploads
+
+Revision ID: b8d2f5a0c617
+Revises: 7a3c9e1f5b24
+Create Date: 2026-10-18 15:02:44.318907
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d2f5a0c617'
+down_revision: Union[str, None] = '7a3c9e1f5b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+
+    if 'upload_sessions' not in inspector.get_table_names():
+        op.create_table(
+            'upload_sessions',
+            sa.Column('id', sa.String(length=32), primary_key=True, nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('filename', sa.String(), nullable=False),
+            sa.Column('title', sa.String(), nullable=True),
+            sa.Column('content_type', sa.String(), nullable=True),
+            sa.Column('total_size', sa.BigInteger(), nullable=False),
+            sa.Column('sha256', sa.String(length=64), nullable=True),
+            sa.Column('received_bytes', sa.BigInteger(), nullable=False, server_default='0'),
+            sa.Column('temp_path', sa.String(), nullable=False),
+            sa.Column('status', sa.String(), nullable=False, server_default='active'),
+            sa.Column('document_id', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ondelete='SET NULL')
+        )
+        op.create_index(op.f('ix_upload_sessions_user_id'), 'upload_sessions', ['user_id'], unique=False)
+        op.create_index(op.f('ix_upload_sessions_expires_at'), 'upload_sessions', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_upload_sessions_expires_at'), table_name='upload_sessions')
+    op.drop_index(op.f('ix_upload_sessions_user_id'), table_name='upload_sessions')
+    op.drop_table('upload_sessions')
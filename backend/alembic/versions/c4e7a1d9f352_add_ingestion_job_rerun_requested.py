@@ -0,0 +1,33 @@
+"""add rerun_requested to ingestion_jobs
+
+Revision ID: c4e7a1d9f352
+Revises: b8d2f5a0c617
+Create Date: 2026-10-18 18:40:12.526031
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e7a1d9f352'
+down_revision: Union[str, None] = 'b8d2f5a0c617'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+
+    columns = [c['name'] for c in inspector.get_columns('ingestion_jobs')]
+    if 'rerun_requested' not in columns:
+        op.add_column(
+            'ingestion_jobs',
+            sa.Column('rerun_requested', sa.Boolean(), nullable=False, server_default=sa.false())
+        )
+
+
+def downgrade() -> None:
+    op.drop_column('ingestion_jobs', 'rerun_requested')
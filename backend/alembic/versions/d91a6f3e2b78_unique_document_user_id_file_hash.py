@@ -0,0 +1,53 @@
+"""make the documents (user_id, file_hash) index unique
+
+Revision ID: d91a6f3e2b78
+Revises: c4e7a1d9f352
+Create Date: 2026-10-18 21:05:37.204118
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = 'd91a6f3e2b78'
+down_revision: Union[str, None] = 'c4e7a1d9f352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+
+    indexes = {i['name']: i for i in inspector.get_indexes('documents')}
+    index = indexes.get('ix_documents_user_id_file_hash')
+    if index is not None and index.get('unique'):
+        return
+    if index is not None:
+        op.drop_index('ix_documents_user_id_file_hash', table_name='documents')
+
+    # Duplicates uploaded before the index was unique: the oldest document
+    # keeps the hash, the others lose it (NULLs don't conflict)
+    op.execute(
+        """
+        UPDATE documents
+        SET file_hash = NULL
+        WHERE file_hash IS NOT NULL
+          AND id NOT IN (
+            SELECT keep_id FROM (
+              SELECT MIN(id) AS keep_id
+              FROM documents
+              WHERE file_hash IS NOT NULL
+              GROUP BY user_id, file_hash
+            ) AS keep
+          )
+        """
+    )
+    op.create_index('ix_documents_user_id_file_hash', 'documents', ['user_id', 'file_hash'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_documents_user_id_file_hash', table_name='documents')
+    op.create_index('ix_documents_user_id_file_hash', 'documents', ['user_id', 'file_hash'], unique=False)
@@ -0,0 +1,46 @@
+"""add document_chunks fingerprint table
+
+Revision ID: e4a8b6c1f273
+Revises: 9c3f4a7d2e10
+Create Date: 2026-10-18 10:47:19.663028
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a8b6c1f273'
+down_revision: Union[str, None] = '9c3f4a7d2e10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+
+    if 'document_chunks' not in inspector.get_table_names():
+        op.create_table(
+            'document_chunks',
+            sa.Column('id', sa.Integer(), primary_key=True, nullable=False),
+            sa.Column('document_id', sa.Integer(), nullable=False),
+            sa.Column('chunk_index', sa.Integer(), nullable=False),
+            sa.Column('page_number', sa.Integer(), nullable=True),
+            sa.Column('content_hash', sa.String(length=64), nullable=False),
+            sa.Column('vector_id', sa.String(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ondelete='CASCADE'),
+            sa.UniqueConstraint('document_id', 'vector_id', name='uq_document_chunks_document_vector')
+        )
+        op.create_index(op.f('ix_document_chunks_id'), 'document_chunks', ['id'], unique=False)
+        op.create_index(op.f('ix_document_chunks_document_id'), 'document_chunks', ['document_id'], unique=False)
+        op.create_index(op.f('ix_document_chunks_content_hash'), 'document_chunks', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_document_chunks_content_hash'), table_name='document_chunks')
+    op.drop_index(op.f('ix_document_chunks_document_id'), table_name='document_chunks')
+    op.drop_index(op.f('ix_document_chunks_id'), table_name='document_chunks')
+    op.drop_table('document_chunks')
@@ -14,15 +14,82 @@ class Settings(BaseSettings):
     # GEMINI API
     GEMINI_API_KEY: str
     
-    # Pinecone
-    PINECONE_API_KEY: str
-    PINECONE_INDEX_NAME: str
+    # Vector store
+    VECTOR_STORE: str = "pinecone"  # pinecone | local (in-process NumPy, persisted to LOCAL_VECTOR_STORE_DIR)
+    LOCAL_VECTOR_STORE_DIR: str = "vector_store"  # Shared by the API and worker processes
+    
+    # Pinecone (not needed with VECTOR_STORE=local)
+    PINECONE_API_KEY: str = ""
+    PINECONE_INDEX_NAME: str = ""
     PINECONE_ENVIRONMENT: str = "us-east-1"
+    PINECONE_UPSERT_BATCH_SIZE: int = 100  # Vectors per upsert request
+    PINECONE_UPSERT_CONCURRENCY: int = 8  # Upsert requests in flight (client pool_threads)
+    PINECONE_MAX_RETRIES: int = 3  # On 429 / 5xx / connection errors
+    PINECONE_RETRY_BASE_SECONDS: float = 1.0  # Backoff: base * 2^(retry-1)
     
     # File Upload
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 52428800  # 50MB
     ALLOWED_EXTENSIONS: str = ".pdf,.docx,.txt"
+    UPLOAD_CHUNK_SIZE: int = 1048576  # 1MB per read/write block
+    MAX_BATCH_FILES: int = 200  # Files per batch upload (after expanding ZIPs)
+    MAX_BATCH_BYTES: int = 524288000  # 500MB written per batch upload (after expanding ZIPs)
+    RESUMABLE_UPLOAD_PART_SIZE: int = 8388608  # 8MB suggested per PUT of a resumable upload
+    UPLOAD_SESSION_TTL_SECONDS: int = 86400  # Unfinished resumable uploads are purged after 24h
+    
+    # Document processing
+    PDF_EXTRACT_WORKERS: int = 0  # 0 = one worker process per CPU core
+    PDF_PAGES_PER_TASK: int = 16  # Pages extracted per worker task
+    PDF_EXTRACTORS: str = "pypdf2,pymupdf,pdfminer,pypdf"  # Tried per page in order; missing ones are skipped
+    PDF_MIN_PAGE_CHARS: int = 10  # Shorter (or garbled) page text falls back to the next extractor
+    PDF_EXTRACT_TIMEOUT_SECONDS: float = 120  # Per task; the document fails when exceeded
+    PDF_EXTRACT_MEMORY_MB: int = 1024  # RLIMIT_AS of each extraction worker process
+    TXT_SNIFF_BYTES: int = 65536  # Prefix used to detect TXT encoding
+    TXT_SEGMENT_BYTES: int = 1048576  # TXT decoded and split 1MB at a time
+    DOCX_SEGMENT_CHARS: int = 262144  # DOCX blocks grouped per segment
+    INGEST_PAGE_WINDOW: int = 8  # Pages split together per pipeline window
+    INGEST_EMBED_BATCH_SIZE: int = 100  # Chunks per embedding request
+    INGEST_FIRST_BATCH_SIZE: int = 16  # Smaller first batch per document, so it becomes queryable sooner
+    INGEST_QUEUE_SIZE: int = 4  # Max items buffered between pipeline stages
+    BOILERPLATE_STRIP: bool = True  # Drop repeated PDF header/footer lines before chunking
+    BOILERPLATE_SAMPLE_PAGES: int = 32  # Pages used to learn the boilerplate lines
+    BOILERPLATE_MIN_PAGE_FRACTION: float = 0.6  # Line must appear on this share of pages
+    BOILERPLATE_MIN_PAGES: int = 4  # Shorter documents are left untouched
+    PAGE_QUALITY_FILTER: str = "drop"  # Low-quality PDF pages: drop | flag (keep, report) | off
+    PAGE_QUALITY_MIN_PRINTABLE: float = 0.9  # Min share of printable characters
+    PAGE_QUALITY_MIN_DICTIONARY_RATE: float = 0.1  # Min share of common Vietnamese/English words
+    INGEST_NEAR_DUPLICATES: bool = True  # Reuse embeddings of near-duplicate chunks (per-user SimHash index)
+    NEAR_DUPLICATE_MAX_DISTANCE: int = 3  # Max differing bits out of 64
+    NEAR_DUPLICATE_MIN_WORDS: int = 8  # Shorter chunks are never treated as duplicates
+    SEARCH_COLLAPSE_NEAR_DUPLICATES: bool = True  # Drop near-duplicate hits from search results
+    TEXT_STORE_DIR: str = "text_store"  # Persisted extracted text
+    TEXT_STORE_COMPRESSION_LEVEL: int = 6
+    EMBEDDING_CACHE_PATH: str = "cache/embeddings.sqlite3"  # Shared on-disk embedding cache ("" = disabled)
+    EMBEDDING_CACHE_MAX_MB: int = 512  # Least recently used embeddings are evicted above this
+    EMBEDDING_CONCURRENCY: int = 4  # Embedding requests in flight per process
+    EMBEDDING_REQUESTS_PER_MINUTE: int = 1500  # Per process; match the Gemini tier quota (0 = unlimited)
+    EMBEDDING_MAX_RETRIES: int = 4  # On 429 / 5xx
+    EMBEDDING_RETRY_BASE_SECONDS: float = 2.0  # Backoff: base * 2^(retry-1)
+    EMBEDDING_BATCH_INITIAL: int = 32  # Texts per request at start; adapted (AIMD) from latency and errors
+    EMBEDDING_BATCH_MIN: int = 1
+    EMBEDDING_BATCH_MAX: int = 100  # Gemini accepts at most 100 texts per request
+    EMBEDDING_BATCH_MAX_TOKENS: int = 20000  # Estimated tokens per request (~3 chars/token)
+    EMBEDDING_BATCH_MAX_BYTES: int = 1048576  # UTF-8 text bytes per request
+    EMBEDDING_BATCH_TARGET_SECONDS: float = 4.0  # Slower requests shrink the batch
+    
+    # Ingestion worker (python -m app.worker)
+    INGEST_CONCURRENCY: int = 2  # Documents processed at once per worker
+    INGEST_MAX_ATTEMPTS: int = 3
+    INGEST_RETRY_BASE_SECONDS: int = 30  # Backoff: base * 2^(attempt-1)
+    INGEST_RETRY_MAX_SECONDS: int = 1800
+    INGEST_POLL_INTERVAL_SECONDS: float = 2.0
+    INGEST_JOB_TIMEOUT_SECONDS: int = 900  # Lease; stale running jobs are requeued
+    INGEST_RECOVERY_INTERVAL_SECONDS: int = 60
+    VECTOR_GC_INTERVAL_SECONDS: int = 21600  # Orphan-vector GC every 6h (0 = disabled)
+    INGEST_PROGRESS_INTERVAL_SECONDS: float = 1.0  # Min seconds between progress writes
+    PROGRESS_STREAM_POLL_SECONDS: float = 1.0  # SSE endpoint re-reads progress this often
+    PROGRESS_STREAM_KEEPALIVE_SECONDS: int = 15
+    WORKER_METRICS_PORT: int = 0  # Serve worker /metrics on this port (0 = disabled)
     
     # Environment
     ENVIRONMENT: str = "development"
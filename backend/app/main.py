@@ -1,8 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from .database import engine, Base
 from .config import settings
 from .routers import auth, documents, query, analysis, analytics
+from .utils import metrics
 import os
 
 app = FastAPI(
@@ -76,6 +78,11 @@ def health_check():
         "ai": "Gemini 2.5 Flash"
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus metrics of this API process (extraction time, sandbox kills)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # ===================================
 # Startup event - Test DB connection
 # ===================================
@@ -2,5 +2,8 @@
 from .user import User
 from .document import Document, Query
 from .feedback import Feedback
+from .ingestion_job import IngestionJob
+from .document_chunk import DocumentChunk
+from .upload_session import UploadSession
 
-__all__ = ["User", "Document", "Query", "Feedback"]
\ No newline at end of file
+__all__ = ["User", "Document", "Query", "Feedback", "IngestionJob", "DocumentChunk", "UploadSession"]
\ No newline at end of file
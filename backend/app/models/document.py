@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Boolean, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Boolean, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
@@ -16,6 +16,7 @@ class Document(Base):
     file_path = Column(String, nullable=False)
     file_type = Column(String, nullable=False)  # pdf, docx, txt
     file_size = Column(Integer, nullable=False)
+    file_hash = Column(String(64), nullable=True)  # SHA256 of file content (dedup)
 
     metadata_ = Column("doc_metadata", JSON, nullable=True)
     processed = Column(Boolean, default=False)
@@ -25,6 +26,11 @@ class Document(Base):
     # Relationships
     owner = relationship("User", back_populates="documents")
 
+    __table_args__ = (
+        # Unique: concurrent uploads of the same file can't both pass the duplicate check
+        Index("ix_documents_user_id_file_hash", "user_id", "file_hash", unique=True),
+    )
+
     def __repr__(self):
         return f"<Document(id={self.id}, title={self.title}, processed={self.processed})>"
 
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from ..database import Base
+
+
+# ==========================================================
+# DOCUMENT CHUNK MODEL (content fingerprints of stored vectors)
+# ==========================================================
+class DocumentChunk(Base):
+    __tablename__ = "document_chunks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    chunk_index = Column(Integer, nullable=False)
+    page_number = Column(Integer, nullable=True)
+    content_hash = Column(String(64), nullable=False, index=True)  # SHA256 of chunk text
+    vector_id = Column(String, nullable=False)  # ID in the vector DB
+    simhash = Column(BigInteger, nullable=True)  # 64-bit SimHash (signed), for near-duplicate lookup
+    duplicate_of = Column(String, nullable=True)  # vector whose embedding was reused
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Relationships
+    document = relationship("Document")
+
+    __table_args__ = (
+        UniqueConstraint("document_id", "vector_id", name="uq_document_chunks_document_vector"),
+    )
+
+    def __repr__(self):
+        return f"<DocumentChunk(document_id={self.document_id}, chunk_index={self.chunk_index}, vector_id={self.vector_id})>"
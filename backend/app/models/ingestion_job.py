@@ -0,0 +1,53 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index, JSON
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from ..database import Base
+
+
+class JobKind:
+    DOCUMENT = "document"  # single document (document_id)
+    BATCH = "batch"        # several documents sharing embedding batches (payload.document_ids)
+    DELETE_VECTORS = "delete_vectors"  # vectors of a deleted document (payload.vector_ids)
+    VECTOR_GC = "vector_gc"            # reconcile the vector index with live documents
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+# ==========================================================
+# INGESTION JOB MODEL
+# ==========================================================
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, default=JobKind.DOCUMENT, nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=True, index=True)
+    payload = Column(JSON, nullable=True)
+
+    status = Column(String, default=JobStatus.QUEUED, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)  # backoff
+    rerun_requested = Column(Boolean, default=False, nullable=False)  # re-enqueued while running: run again when done
+
+    locked_by = Column(String, nullable=True)   # worker id
+    locked_at = Column(DateTime, nullable=True)  # lease / heartbeat
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    document = relationship("Document")
+
+    __table_args__ = (
+        Index("ix_ingestion_jobs_status_run_after", "status", "run_after"),
+    )
+
+    def __repr__(self):
+        return f"<IngestionJob(id={self.id}, kind={self.kind}, document_id={self.document_id}, status={self.status})>"
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from ..database import Base
+
+
+class UploadStatus:
+    ACTIVE = "active"
+    COMPLETED = "completed"
+    ABORTED = "aborted"
+
+
+# ==========================================================
+# UPLOAD SESSION MODEL (resumable chunked uploads)
+# ==========================================================
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    id = Column(String(32), primary_key=True)  # random token, used in the upload URL
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    filename = Column(String, nullable=False)
+    title = Column(String, nullable=True)
+    content_type = Column(String, nullable=True)
+    total_size = Column(BigInteger, nullable=False)        # declared at init
+    sha256 = Column(String(64), nullable=True)             # expected hash, checked on complete
+    received_bytes = Column(BigInteger, default=0, nullable=False)  # contiguous prefix on disk
+    temp_path = Column(String, nullable=False)
+
+    status = Column(String, default=UploadStatus.ACTIVE, nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="SET NULL"), nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    # Relationships
+    document = relationship("Document")
+
+    def __repr__(self):
+        return f"<UploadSession(id={self.id}, user_id={self.user_id}, received={self.received_bytes}/{self.total_size}, status={self.status})>"
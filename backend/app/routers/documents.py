@@ -1,65 +1,48 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status, Query, Request, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
+import asyncio
+import json
+import time
 import logging
+from ..config import settings
 from ..database import get_db, SessionLocal
 from ..schemas.document import (
     DocumentResponse, 
     DocumentList, 
     DocumentUploadResponse,
     DocumentUpdate,
-    DocumentStats
+    DocumentStats,
+    DocumentPageResponse,
+    BatchUploadResponse,
+    DocumentProgressResponse,
+    UploadSessionCreate,
+    UploadSessionResponse,
+    UploadCompleteRequest
 )
 from ..services.document_service import DocumentService
-from ..services.document_processor import DocumentProcessor
+from ..services.upload_service import UploadSessionService
+from ..services.ingestion_queue import IngestionQueue
+from ..services.ingestion_progress import progress_snapshot, is_finished
 from ..utils.security import get_current_user
 from ..models.user import User
 from ..models.document import Document
+from ..models.upload_session import UploadSession
 from ..utils.cache import cache
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
 logger = logging.getLogger(__name__)
 
-async def process_document_background(document_id: int, file_path: str):
-    """
-    Background task to process document
-    IMPORTANT: Create new DB session for background task
-    """
-    logger.info(f"🚀 Background task STARTED for document {document_id}")
-    db = SessionLocal()
-    try:
-        processor = DocumentProcessor()
-        logger.info(f"📝 Calling processor.process_document for doc {document_id}")
-        
-        await processor.process_document(db, document_id, file_path)
-        
-        logger.info(f"✅ Background task COMPLETED for document {document_id}")
-    except Exception as e:
-        logger.error(f"❌ Background task FAILED for doc {document_id}: {str(e)}", exc_info=True)
-        
-        try:
-            doc = db.query(Document).filter(Document.id == document_id).first()
-            if doc:
-                if not doc.metadata_:
-                    doc.metadata_ = {}
-                doc.metadata_['processing_status'] = 'failed'
-                doc.metadata_['error'] = str(e)
-                db.commit()
-        except Exception as db_err:
-            logger.error(f"❌ Failed to update error status: {str(db_err)}")
-    finally:
-        db.close()
-        logger.info(f"🔒 DB session closed for document {document_id}")
-
 @router.post("/upload", response_model=DocumentUploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_document(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     title: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Upload document and process in background"""
+    """Upload document and queue it for the ingestion worker"""
     
     logger.info(f"📤 Upload request from user {current_user.id}: {file.filename}")
     
@@ -68,12 +51,9 @@ async def upload_document(
     
     logger.info(f"✅ Document saved to DB: ID={document.id}, Path={document.file_path}")
     
-    logger.info(f"⏰ Adding background task for document {document.id}")
-    background_tasks.add_task(
-        process_document_background,
-        document.id,
-        document.file_path
-    )
+    logger.info(f"⏰ Queueing ingestion job for document {document.id}")
+    IngestionQueue.enqueue(db, document.id)
+    db.refresh(document)
     # Invalidate document list cache for this user
     try:
         cache_key = f"user_{current_user.id}_documents"
@@ -86,6 +66,113 @@ async def upload_document(
         document=document
     )
 
+@router.post("/upload/batch", response_model=BatchUploadResponse, status_code=status.HTTP_201_CREATED)
+async def upload_documents_batch(
+    files: List[UploadFile] = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Upload several files (or ZIP archives) and queue them as one ingestion job"""
+    
+    logger.info(f"📦 Batch upload request from user {current_user.id}: {len(files)} files")
+    
+    documents, skipped = await DocumentService.upload_documents_batch(db, files, current_user)
+    
+    if documents:
+        try:
+            cache.delete(f"user_{current_user.id}_documents")
+        except Exception:
+            logger.debug("Failed to delete documents cache on batch upload", exc_info=True)
+    
+    return BatchUploadResponse(
+        message=f"{len(documents)} documents uploaded, {len(skipped)} skipped. Processing in background...",
+        documents=documents,
+        skipped=skipped
+    )
+
+def _upload_session_response(session: UploadSession) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        upload_id=session.id,
+        filename=session.filename,
+        size=session.total_size,
+        received_bytes=session.received_bytes,
+        status=session.status,
+        part_size=settings.RESUMABLE_UPLOAD_PART_SIZE,
+        expires_at=session.expires_at,
+        document_id=session.document_id
+    )
+
+@router.post("/uploads", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+def create_upload_session(
+    upload: UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Start a resumable upload; send the file with PUT /documents/uploads/{upload_id}"""
+    session = UploadSessionService.create_session(
+        db, current_user, upload.filename, upload.size,
+        upload.title, upload.content_type, upload.sha256
+    )
+    return _upload_session_response(session)
+
+@router.put("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def upload_range(
+    upload_id: str,
+    request: Request,
+    content_range: str = Header(..., alias="Content-Range"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Append one byte range (raw body, Content-Range: bytes first-last/total)"""
+    session = await UploadSessionService.write_range(
+        db, upload_id, current_user, content_range, request.stream()
+    )
+    return _upload_session_response(session)
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionResponse)
+def get_upload_session(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Upload state; after a dropped connection resume from received_bytes"""
+    return _upload_session_response(UploadSessionService.get_session(db, upload_id, current_user))
+
+@router.post("/uploads/{upload_id}/complete", response_model=DocumentUploadResponse, status_code=status.HTTP_201_CREATED)
+async def complete_upload(
+    upload_id: str,
+    body: Optional[UploadCompleteRequest] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Verify the assembled file and queue it for ingestion like a normal upload"""
+    document = await UploadSessionService.complete(
+        db, upload_id, current_user, body.sha256 if body else None
+    )
+    
+    logger.info(f"⏰ Queueing ingestion job for document {document.id}")
+    IngestionQueue.enqueue(db, document.id)
+    db.refresh(document)
+    try:
+        cache.delete(f"user_{current_user.id}_documents")
+    except Exception:
+        logger.debug("Failed to delete documents cache on resumable upload", exc_info=True)
+    
+    return DocumentUploadResponse(
+        message="Document uploaded successfully. Processing in background...",
+        document=document
+    )
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def abort_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Cancel a resumable upload and discard the received bytes"""
+    UploadSessionService.abort(db, upload_id, current_user)
+    return None
+
 @router.get("/", response_model=DocumentList)
 def get_documents(
     skip: int = Query(0, ge=0),
@@ -130,6 +217,16 @@ def get_document(
     """Get single document by ID"""
     return DocumentService.get_document_by_id(db, document_id, current_user)
 
+@router.get("/{document_id}/pages/{page_number}", response_model=DocumentPageResponse)
+def get_document_page(
+    document_id: int,
+    page_number: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get extracted text of a single page (1-based)"""
+    return DocumentService.get_document_page(db, document_id, current_user, page_number)
+
 @router.put("/{document_id}", response_model=DocumentResponse)
 def update_document(
     document_id: int,
@@ -154,6 +251,107 @@ def update_document(
 
     return updated
 
+@router.get("/{document_id}/progress", response_model=DocumentProgressResponse)
+def get_document_progress(
+    document_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Current ingestion progress of a document (uncached)"""
+    document = DocumentService.get_document_by_id(db, document_id, current_user)
+    return progress_snapshot(document)
+
+def _read_progress(document_id: int, user_id: int) -> Optional[dict]:
+    """Short-lived session per poll; the stream outlives the request session"""
+    db = SessionLocal()
+    try:
+        document = db.query(Document).filter(
+            Document.id == document_id,
+            Document.user_id == user_id
+        ).first()
+        return progress_snapshot(document) if document else None
+    finally:
+        db.close()
+
+async def _progress_events(request: Request, document_id: int, user_id: int) -> AsyncIterator[str]:
+    last_payload = None
+    last_sent = time.monotonic()
+    while not await request.is_disconnected():
+        snapshot = await run_in_threadpool(_read_progress, document_id, user_id)
+        if snapshot is None:
+            yield "event: deleted\ndata: {}\n\n"
+            return
+        
+        payload = json.dumps(snapshot, default=str)
+        if payload != last_payload:
+            yield f"event: progress\ndata: {payload}\n\n"
+            last_payload = payload
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= settings.PROGRESS_STREAM_KEEPALIVE_SECONDS:
+            yield ": keep-alive\n\n"  # SSE comment, keeps proxies from closing the stream
+            last_sent = time.monotonic()
+        
+        if is_finished(snapshot):
+            yield f"event: done\ndata: {payload}\n\n"
+            return
+        await asyncio.sleep(settings.PROGRESS_STREAM_POLL_SECONDS)
+
+@router.get("/{document_id}/progress/stream")
+def stream_document_progress(
+    document_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Server-Sent Events stream of ingestion progress.
+    Emits `progress` events on every change and a final `done` event.
+    """
+    DocumentService.get_document_by_id(db, document_id, current_user)
+    return StreamingResponse(
+        _progress_events(request, document_id, current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.put("/{document_id}/file", response_model=DocumentUploadResponse)
+async def replace_document_file(
+    document_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Upload a revised file; only changed chunks are re-embedded"""
+    document = await DocumentService.replace_document_file(db, document_id, file, current_user)
+    
+    IngestionQueue.enqueue(db, document.id)
+    db.refresh(document)
+    try:
+        cache.delete(f"user_{current_user.id}_documents")
+    except Exception:
+        logger.debug("Failed to delete documents cache on replace", exc_info=True)
+    
+    return DocumentUploadResponse(
+        message="Document file replaced. Re-processing in background...",
+        document=document
+    )
+
+@router.post("/{document_id}/reprocess", response_model=DocumentResponse)
+def reprocess_document(
+    document_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Queue a document for re-ingestion"""
+    document = DocumentService.get_document_by_id(db, document_id, current_user)
+    IngestionQueue.enqueue(db, document.id)
+    db.refresh(document)
+    try:
+        cache.delete(f"user_{current_user.id}_documents")
+    except Exception:
+        logger.debug("Failed to delete documents cache on reprocess", exc_info=True)
+    return document
+
 @router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_document(
     document_id: int,
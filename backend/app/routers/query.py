@@ -53,7 +53,9 @@ async def query_documents(
             "sources": result["sources"],
             "confidence_score": result["confidence_score"],
             "processing_time_ms": result["processing_time_ms"],
-            "created_at": datetime.utcnow()
+            "created_at": datetime.utcnow(),
+            "partial_coverage": result.get("partial_coverage", False),
+            "coverage": result.get("coverage", [])
         }
 
     # Nếu OK → trả về đủ thông tin
@@ -64,7 +66,9 @@ async def query_documents(
         "sources": result["sources"],
         "confidence_score": result["confidence_score"],
         "processing_time_ms": result["processing_time_ms"],
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "partial_coverage": result.get("partial_coverage", False),
+        "coverage": result.get("coverage", [])
     }
 
 
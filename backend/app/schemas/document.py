@@ -18,6 +18,7 @@ class DocumentResponse(BaseModel):
     file_path: str
     file_type: str
     file_size: int
+    file_hash: Optional[str] = None
     metadata_: Optional[Dict[str, Any]] = None
     processed: bool
     created_at: datetime
@@ -34,6 +35,48 @@ class DocumentUploadResponse(BaseModel):
     message: str
     document: DocumentResponse
 
+class SkippedFile(BaseModel):
+    filename: str
+    reason: str
+
+class BatchUploadResponse(BaseModel):
+    message: str
+    documents: List[DocumentResponse]
+    skipped: List[SkippedFile] = []
+
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+    size: int = Field(..., gt=0)  # bytes
+    title: Optional[str] = Field(None, min_length=1, max_length=255)
+    content_type: Optional[str] = None
+    sha256: Optional[str] = Field(None, pattern=r"^[0-9a-fA-F]{64}$")  # checked on complete
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    filename: str
+    size: int
+    received_bytes: int  # resume from this offset
+    status: str
+    part_size: int  # suggested bytes per PUT
+    expires_at: datetime
+    document_id: Optional[int] = None
+
+class UploadCompleteRequest(BaseModel):
+    sha256: Optional[str] = Field(None, pattern=r"^[0-9a-fA-F]{64}$")
+
+class DocumentPageResponse(BaseModel):
+    document_id: int
+    page_number: int
+    total_pages: int
+    text: str
+
+class DocumentProgressResponse(BaseModel):
+    document_id: int
+    processing_status: Optional[str] = None
+    processed: bool
+    progress: Optional[Dict[str, Any]] = None  # stage + pages/chunks/vectors counters
+    error: Optional[str] = None
+
 class DocumentStats(BaseModel):
     total_documents: int
     total_size: int  # bytes
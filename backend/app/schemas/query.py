@@ -60,6 +60,14 @@ class SourceSchema(BaseModel):
     text: Optional[str] = None
 
 
+class DocumentCoverage(BaseModel):
+    """Part of a document searched while its ingestion is still running"""
+    document_id: int
+    complete: bool
+    indexed_chunks: Optional[int] = None
+    indexed_through_page: Optional[int] = None
+
+
 class QueryResponse(BaseModel):
     query_id: Optional[int] = None 
     query_text: str
@@ -68,6 +76,8 @@ class QueryResponse(BaseModel):
     processing_time_ms: int
     confidence_score: float
     created_at: datetime
+    partial_coverage: bool = False  # True if some documents were only partly indexed
+    coverage: List[DocumentCoverage] = []
 
 
 class QueryHistory(BaseModel):
@@ -38,19 +38,8 @@ class AnalysisService:
                     detail="Document not found or not processed"
                 )
             
-            # Extract text
-            logger.info(f"📄 Extracting text from {document.file_path}")
-            if document.file_path.endswith('.pdf'):
-                text = self.doc_processor.extract_pdf(document.file_path)
-            elif document.file_path.endswith('.docx'):
-                text = self.doc_processor.extract_docx(document.file_path)
-            elif document.file_path.endswith('.txt'):
-                text = self.doc_processor.extract_txt(document.file_path)
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Unsupported file type"
-                )
+            # Load text persisted at ingestion (no re-parsing)
+            text = await self.doc_processor.get_document_text(document)
             
             if len(text) < 100:
                 raise HTTPException(
@@ -103,19 +92,8 @@ class AnalysisService:
                     detail="Document not found or not processed"
                 )
             
-            # Extract text
-            logger.info(f"📄 Extracting text from {document.file_path}")
-            if document.file_path.endswith('.pdf'):
-                text = self.doc_processor.extract_pdf(document.file_path)
-            elif document.file_path.endswith('.docx'):
-                text = self.doc_processor.extract_docx(document.file_path)
-            elif document.file_path.endswith('.txt'):
-                text = self.doc_processor.extract_txt(document.file_path)
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Unsupported file type"
-                )
+            # Load text persisted at ingestion (no re-parsing)
+            text = await self.doc_processor.get_document_text(document)
             
             # Extract concepts
             logger.info(f"🔍 Extracting top {max_concepts} concepts...")
@@ -160,19 +138,8 @@ class AnalysisService:
                     detail="Document not found or not processed"
                 )
             
-            # Extract text
-            logger.info(f"📄 Extracting text from {document.file_path}")
-            if document.file_path.endswith('.pdf'):
-                text = self.doc_processor.extract_pdf(document.file_path)
-            elif document.file_path.endswith('.docx'):
-                text = self.doc_processor.extract_docx(document.file_path)
-            elif document.file_path.endswith('.txt'):
-                text = self.doc_processor.extract_txt(document.file_path)
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Unsupported file type"
-                )
+            # Load text persisted at ingestion (no re-parsing)
+            text = await self.doc_processor.get_document_text(document)
             
             # Generate quiz
             logger.info(f"📝 Generating {num_questions} questions ({difficulty})...")
@@ -1,22 +1,77 @@
 from sqlalchemy.orm import Session
-import PyPDF2
-from docx import Document as DocxDocument
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, AsyncIterator, Iterator, Tuple
+from functools import lru_cache
+from collections import deque
+import asyncio
+import os
 import logging
+from ..config import settings
 from ..models.document import Document
 from .embedding_service_gemini import EmbeddingServiceGemini
+from .ingestion_pipeline import IngestionPipeline
+from .text_store import TextStore, join_pages
+from ..utils.encoding import iter_text_segments
+from ..utils.docx_reader import iter_docx_blocks
+from ..utils.text_splitter import RecursiveTextSplitter
+from ..utils.boilerplate import strip_boilerplate_pages
+from ..utils.metrics import Counter
+from ..utils.pdf_reader import BackendStats, available_backends, count_pdf_pages, extract_pdf_page_range
+from ..utils.sandbox import ExtractionSandbox
+from ..utils.text_quality import score_page
 # ✅ Setup logging properly
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+PDF_BACKEND_SECONDS = Counter("docmentor_pdf_backend_seconds_total", "Time spent extracting pages, by PDF backend")
+PDF_BACKEND_PAGES = Counter("docmentor_pdf_backend_pages_total", "Pages attempted, by PDF backend")
+PDF_BACKEND_CHARS = Counter("docmentor_pdf_backend_chars_total", "Characters extracted, by PDF backend")
+PDF_BACKEND_REJECTED = Counter(
+    "docmentor_pdf_backend_rejected_pages_total",
+    "Pages whose text was empty or broken and fell back to the next backend"
+)
+
+@lru_cache(maxsize=None)
+def pdf_backends(configured: str) -> Tuple[str, ...]:
+    """Installed backends from a comma-separated PDF_EXTRACTORS value, in order"""
+    names = [name.strip().lower() for name in configured.split(",") if name.strip()]
+    backends = tuple(available_backends(names))
+    missing = [name for name in names if name not in backends]
+    if missing:
+        logger.warning(f"⚠️ PDF extractors not installed or unknown, skipped: {missing}")
+    if not backends:
+        raise Exception(f"No PDF extractor available (PDF_EXTRACTORS={configured!r})")
+    logger.info(f"📚 PDF extractors: {list(backends)}")
+    return backends
+
+def add_backend_stats(total: BackendStats, stats: BackendStats) -> None:
+    for name, counters in stats.items():
+        PDF_BACKEND_SECONDS.inc(counters['seconds'], backend=name)
+        PDF_BACKEND_PAGES.inc(counters['pages'], backend=name)
+        PDF_BACKEND_CHARS.inc(counters['chars'], backend=name)
+        PDF_BACKEND_REJECTED.inc(counters['rejected'], backend=name)
+        summed = total.setdefault(name, {'seconds': 0.0, 'pages': 0, 'chars': 0, 'rejected': 0})
+        for key, value in counters.items():
+            summed[key] += value
+
+def summarize_backend_stats(stats: BackendStats) -> Dict[str, Dict[str, float]]:
+    """Per-backend timing and yield for document metadata"""
+    return {
+        name: {
+            'pages': int(counters['pages']),
+            'rejected': int(counters['rejected']),
+            'chars_per_page': round(counters['chars'] / counters['pages'], 1) if counters['pages'] else 0,
+            'ms_per_page': round(1000 * counters['seconds'] / counters['pages'], 2) if counters['pages'] else 0,
+        }
+        for name, counters in stats.items()
+    }
+
 class DocumentProcessor:
     def __init__(self):
         self.embedding_service = EmbeddingServiceGemini()
-        self.text_splitter = RecursiveCharacterTextSplitter(
+        self.text_store = TextStore()
+        self.text_splitter = RecursiveTextSplitter(
             chunk_size=1000,
             chunk_overlap=100,
-            length_function=len,
             separators=["\n\n", "\n", ". ", " ", ""]
         )
     
@@ -33,142 +88,318 @@ class DocumentProcessor:
             
             logger.info(f"✅ Document found: {document.title}")
             
-            # Step 1: Extract text
-            logger.info("📄 Step 1: Extracting text...")
-            if file_path.endswith('.pdf'):
-                text = self.extract_pdf(file_path)
-            elif file_path.endswith('.docx'):
-                text = self.extract_docx(file_path)
-            elif file_path.endswith('.txt'):
-                text = self.extract_txt(file_path)
-            else:
-                raise Exception(f"Unsupported file type: {file_path}")
-            
-            if not text or len(text.strip()) < 100:
-                raise Exception(f"Document is empty or too short: {len(text)} chars")
-            
-            logger.info(f"✅ Extracted {len(text)} characters")
-            
-            # Step 2: Split into chunks
-            logger.info("✂️ Step 2: Splitting into chunks...")
-            text_chunks = self.text_splitter.split_text(text)
-            logger.info(f"✅ Created {len(text_chunks)} chunks")
-            
-            # Step 3: Prepare chunks with metadata
-            logger.info("📦 Step 3: Preparing chunks with metadata...")
-            chunks_with_metadata = []
-            for idx, chunk_text in enumerate(text_chunks):
-                chunks_with_metadata.append({
-                    'text': chunk_text,
-                    'chunk_index': idx,
-                    'page_number': 0,
-                    'metadata': {
-                        'file_type': document.file_type,
-                        'title': document.title
-                    }
-                })
-            logger.info(f"✅ Prepared {len(chunks_with_metadata)} chunks")
-            
-            # Step 4: Create embeddings and store in vector DB
-            logger.info("🔮 Step 4: Creating embeddings and storing in vector database...")
-            await self.embedding_service.store_chunks(
-                document_id=document_id,
-                chunks=chunks_with_metadata
-            )
-            logger.info(f"✅ Embeddings stored in Pinecone")
+            # Steps 1-4: extract → split → embed → upsert, streamed page windows
+            logger.info("🌊 Running streaming ingestion pipeline...")
+            pipeline = IngestionPipeline(self, db, [(document, file_path)])
+            stats = (await pipeline.run())[document_id].stats
+            logger.info(f"✅ Pipeline finished: {stats}")
             
             # Step 5: Update document status
             logger.info("💾 Step 5: Updating document status...")
-            existing_metadata = document.metadata_ or {}
-            
-            new_metadata = {
-                **existing_metadata,  # Keep existing data (file_hash, mime_type, etc.)
-                'total_chunks': len(text_chunks),
-                'total_characters': len(text),
-                'processing_status': 'completed'
-            }
-
-            # Assign back to document
-            document.metadata_ = new_metadata
-            document.processed = True
-            
-            db.commit()
-            db.refresh(document)
+            self._mark_completed(db, document_id, stats)
             
             logger.info(f"✅ Successfully processed document {document_id}")
-            logger.info(f"📊 Stats: {len(text_chunks)} chunks, {len(text)} characters")
+            logger.info(f"📊 Stats: {stats['chunks']} chunks, {stats['characters']} characters")
             return True
             
         except Exception as e:
             logger.error(f"❌ Error processing document {document_id}: {str(e)}")
             logger.exception(e)
+            self._mark_failed(db, document_id, e)
+            raise
+    
+    async def process_documents(self, db: Session, document_ids: List[int]) -> Dict[int, Optional[str]]:
+        """
+        Ingest several documents through one pipeline, so embedding and
+        upsert batches are shared across files. A document that fails is
+        marked failed without aborting the rest; errors in the shared
+        embed/upsert stages propagate (the whole batch is retried).
+        Returns {document_id: error or None}.
+        """
+        documents = db.query(Document).filter(Document.id.in_(document_ids)).all()
+        # Skip documents finished by an earlier attempt of the same batch
+        pending = [
+            document for document in documents
+            if (document.metadata_ or {}).get('processing_status') != 'completed'
+        ]
+        logger.info(f"🔄 START Processing batch of {len(pending)}/{len(document_ids)} documents")
+        
+        pipeline = IngestionPipeline(
+            self, db,
+            [(document, document.file_path) for document in pending],
+            isolate_failures=True
+        )
+        try:
+            ingestions = await pipeline.run()
+        except Exception:
+            db.rollback()
+            raise
+        
+        results: Dict[int, Optional[str]] = {}
+        for document_id, ingestion in ingestions.items():
+            if ingestion.error is not None:
+                self._mark_failed(db, document_id, ingestion.error)
+                results[document_id] = str(ingestion.error)
+            else:
+                self._mark_completed(db, document_id, ingestion.stats)
+                results[document_id] = None
+        
+        failed = sum(1 for error in results.values() if error)
+        logger.info(f"✅ Batch finished: {len(results) - failed} completed, {failed} failed")
+        return results
+    
+    def _mark_completed(self, db: Session, document_id: int, stats: Dict[str, int]) -> None:
+        document = db.query(Document).filter(Document.id == document_id).first()
+        existing_metadata = document.metadata_ or {}
+        
+        new_metadata = {
+            **existing_metadata,  # Keep existing data (file_hash, mime_type, etc.)
+            'total_chunks': stats['chunks'],
+            'total_characters': stats['characters'],
+            'total_pages': stats['pages'],
+            'text_store_key': TextStore.key_for(document),
+            'last_ingest': {
+                'embedded': stats['embedded'],
+                'reused': stats['reused'],
+                'deleted': stats['deleted'],
+                'near_duplicates': stats['near_duplicates'],
+                'seconds_to_queryable': stats['seconds_to_queryable']
+            },
+            'extraction': summarize_backend_stats(stats['extraction']),
+            'page_quality': {
+                'action': settings.PAGE_QUALITY_FILTER,
+                **stats['page_quality']
+            },
+            'boilerplate': {
+                'lines': stats['boilerplate_lines'],
+                'characters_removed': stats['boilerplate_characters'],
+                'chunks_saved': stats['boilerplate_chunks']
+            },
+            'processing_status': 'completed'
+        }
+        if 'progress' in new_metadata:
+            new_metadata['progress'] = {**new_metadata['progress'], 'stage': 'completed'}
+        new_metadata.pop('error', None)
+        new_metadata.pop('retry_at', None)
+
+        # Assign back to document
+        document.metadata_ = new_metadata
+        document.processed = True
+        
+        db.commit()
+        db.refresh(document)
+    
+    def _mark_failed(self, db: Session, document_id: int, error: BaseException) -> None:
+        try:
+            db.rollback()
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if document:
+                # ✅ Properly merge metadata
+                existing_metadata = document.metadata_ or {}
+                new_metadata = {
+                    **existing_metadata,
+                    'processing_status': 'failed',
+                    'error': str(error)
+                }
+                if 'progress' in new_metadata:
+                    new_metadata['progress'] = {**new_metadata['progress'], 'stage': 'failed'}
+                document.metadata_ = new_metadata
+                document.processed = False
+                db.commit()
+                logger.info(f"📝 Updated document {document_id} status to failed")
+        except Exception as db_error:
+            logger.error(f"❌ Failed to update document status: {str(db_error)}")
+    
+    async def iter_pdf_pages(
+        self,
+        file_path: str,
+        backend_stats: Optional[BackendStats] = None
+    ) -> AsyncIterator[Tuple[int, str]]:
+        """
+        Yield (page_number, text) for every PDF page, in order.
+        Page ranges are parsed in a per-document sandbox (process pool with
+        a memory ceiling and a per-task time limit), one range in flight per
+        worker, so pages stream out while later ones are parsed. Pages fall
+        back through the PDF_EXTRACTORS backends; their timings are summed
+        into backend_stats.
+        """
+        backends = pdf_backends(settings.PDF_EXTRACTORS)
+        if backend_stats is None:
+            backend_stats = {}
+        workers = settings.PDF_EXTRACT_WORKERS or os.cpu_count() or 1
+        sandbox = ExtractionSandbox(
+            os.path.basename(file_path), workers,
+            settings.PDF_EXTRACT_TIMEOUT_SECONDS,
+            settings.PDF_EXTRACT_MEMORY_MB
+        )
+        try:
+            num_pages = await sandbox.run(count_pdf_pages, file_path, backends)
+            logger.info(f"📄 PDF has {num_pages} pages")
             
-            try:
-                document = db.query(Document).filter(Document.id == document_id).first()
-                if document:
-                    # ✅ Properly merge metadata
-                    existing_metadata = document.metadata_ or {}
-                    document.metadata_ = {
-                        **existing_metadata,
-                        'processing_status': 'failed',
-                        'error': str(e)
-                    }
-                    document.processed = False
-                    db.commit()
-                    logger.info(f"📝 Updated document status to failed")
-            except Exception as db_error:
-                logger.error(f"❌ Failed to update document status: {str(db_error)}")
+            step = max(1, settings.PDF_PAGES_PER_TASK)
+            ranges = [(start, min(start + step, num_pages)) for start in range(0, num_pages, step)]
             
+            in_flight = deque()
+            next_range = 0
+            while next_range < len(ranges) or in_flight:
+                while next_range < len(ranges) and len(in_flight) < sandbox.workers:
+                    start, end = ranges[next_range]
+                    in_flight.append((start, sandbox.submit(
+                        extract_pdf_page_range, file_path, start, end, backends, settings.PDF_MIN_PAGE_CHARS
+                    )))
+                    next_range += 1
+                
+                start, task = in_flight.popleft()
+                page_texts, stats = await sandbox.result(task)
+                add_backend_stats(backend_stats, stats)
+                for offset, page_text in enumerate(page_texts):
+                    yield start + offset + 1, page_text
+        except BaseException:
+            # Also reached when the consumer stops early: don't leave workers parsing
+            sandbox.kill()
             raise
+        sandbox.close()
+    
+    async def iter_pages(
+        self,
+        file_path: str,
+        backend_stats: Optional[BackendStats] = None
+    ) -> AsyncIterator[Tuple[int, str]]:
+        """Yield (page_number, text). DOCX and TXT yield streamed text segments."""
+        if file_path.endswith('.pdf'):
+            async for page in self.iter_pdf_pages(file_path, backend_stats):
+                yield page
+        elif file_path.endswith('.docx') or file_path.endswith('.txt'):
+            # Streamed segments flow into the splitter as "pages"
+            if file_path.endswith('.docx'):
+                segments = self.iter_docx_segments(file_path)
+            else:
+                segments = self.iter_txt_segments(file_path)
+            segment_number = 0
+            while True:
+                segment = await asyncio.to_thread(next, segments, None)
+                if segment is None:
+                    break
+                segment_number += 1
+                yield segment_number, segment
+        else:
+            raise Exception(f"Unsupported file type: {file_path}")
     
-    def extract_pdf(self, file_path: str) -> str:
+    async def extract_pdf_pages(self, file_path: str) -> List[str]:
+        """Extract text of every PDF page (ordered)"""
+        return [page_text async for _, page_text in self.iter_pdf_pages(file_path)]
+    
+    async def extract_pdf(self, file_path: str) -> str:
         """Extract text from PDF file"""
-        text = ""
         try:
             logger.info(f"📖 Opening PDF: {file_path}")
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                num_pages = len(pdf_reader.pages)
-                logger.info(f"📄 PDF has {num_pages} pages")
-                
-                for page_num in range(num_pages):
-                    page = pdf_reader.pages[page_num]
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += f"\n[Page {page_num + 1}]\n{page_text}"
-                
+            pages = await self.extract_pdf_pages(file_path)
+            text = join_pages(self.clean_pdf_pages(pages))
             logger.info(f"✅ PDF extraction complete: {len(text)} characters")
-            return text.strip()
+            return text
         except Exception as e:
             logger.error(f"❌ Error extracting PDF: {str(e)}")
             raise
     
+    async def extract_pages(self, file_path: str) -> List[str]:
+        """
+        Extract per-page text. DOCX and TXT have no pages: their streamed
+        segments (iter_docx_segments / iter_txt_segments) are returned instead.
+        """
+        return [page_text async for _, page_text in self.iter_pages(file_path)]
+    
+    async def get_document_text(self, document: Document) -> str:
+        """
+        Return the full text of a document from the text store.
+        Falls back to extracting (and storing) it for documents ingested
+        before the store existed.
+        """
+        key = TextStore.key_for(document)
+        page_markers = document.file_path.endswith('.pdf')
+        if await asyncio.to_thread(self.text_store.exists, key):
+            # Reading and decompressing every page is blocking work
+            return await asyncio.to_thread(self._stored_text, key, page_markers)
+
+        logger.info(f"📄 No stored text for document {document.id}, extracting {document.file_path}")
+        pages = await self.extract_pages(document.file_path)
+        await asyncio.to_thread(self.text_store.save, key, pages, page_markers)
+        return self._join_text(pages, page_markers)
+
+    def _stored_text(self, key: str, page_markers: bool) -> str:
+        if not page_markers:
+            return self.text_store.read_text(key)
+        return self._join_text(list(self.text_store.iter_pages(key)), page_markers)
+
+    def _join_text(self, pages: List[str], page_markers: bool) -> str:
+        if page_markers:
+            pages = self.clean_pdf_pages(pages)
+        return join_pages(pages, page_markers)
+    
+    @staticmethod
+    def page_quality_reason(page_text: str) -> Optional[str]:
+        """Why a PDF page is not worth embedding (scanned, mojibake, junk), or None"""
+        if settings.PAGE_QUALITY_FILTER == 'off':
+            return None
+        return score_page(
+            page_text,
+            settings.PAGE_QUALITY_MIN_PRINTABLE,
+            settings.PAGE_QUALITY_MIN_DICTIONARY_RATE
+        ).reason
+    
+    def clean_pdf_pages(self, pages: List[str]) -> List[str]:
+        """
+        Remove repeated header/footer lines and (PAGE_QUALITY_FILTER=drop)
+        low-quality pages. The text store keeps the raw pages.
+        """
+        if settings.BOILERPLATE_STRIP:
+            pages = strip_boilerplate_pages(
+                pages,
+                settings.BOILERPLATE_MIN_PAGE_FRACTION,
+                settings.BOILERPLATE_MIN_PAGES
+            )
+        if settings.PAGE_QUALITY_FILTER == 'drop':
+            pages = ["" if self.page_quality_reason(page) else page for page in pages]
+        return pages
+    
     def extract_docx(self, file_path: str) -> str:
-        """Extract text from DOCX file"""
+        """Extract text from DOCX file (paragraphs and tables)"""
         try:
             logger.info(f"📖 Opening DOCX: {file_path}")
-            doc = DocxDocument(file_path)
-            text = "\n".join([paragraph.text for paragraph in doc.paragraphs if paragraph.text])
+            text = "".join(self.iter_docx_segments(file_path)).strip()
             logger.info(f"✅ DOCX extraction complete: {len(text)} characters")
-            return text.strip()
+            return text
         except Exception as e:
             logger.error(f"❌ Error extracting DOCX: {str(e)}")
             raise
     
+    def iter_docx_segments(self, file_path: str) -> Iterator[str]:
+        """Group streamed DOCX blocks into segments of ~DOCX_SEGMENT_CHARS"""
+        parts = []
+        size = 0
+        for block in iter_docx_blocks(file_path):
+            parts.append(f"{block}\n")
+            size += len(block) + 1
+            if size >= settings.DOCX_SEGMENT_CHARS:
+                yield "".join(parts)
+                parts, size = [], 0
+        if parts:
+            yield "".join(parts)
+    
     def extract_txt(self, file_path: str) -> str:
-        """Extract text from TXT file"""
+        """Extract text from TXT file (encoding sniffed, single pass)"""
         try:
             logger.info(f"📖 Opening TXT: {file_path}")
-            with open(file_path, 'r', encoding='utf-8') as file:
-                text = file.read().strip()
+            text = "".join(self.iter_txt_segments(file_path)).strip()
             logger.info(f"✅ TXT extraction complete: {len(text)} characters")
             return text
-        except UnicodeDecodeError:
-            logger.warning("⚠️ UTF-8 failed, trying latin-1...")
-            with open(file_path, 'r', encoding='latin-1') as file:
-                text = file.read().strip()
-            logger.info(f"✅ TXT extraction complete (latin-1): {len(text)} characters")
-            return text
         except Exception as e:
             logger.error(f"❌ Error extracting TXT: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    def iter_txt_segments(self, file_path: str) -> Iterator[str]:
+        """Decode a TXT file incrementally from a memory map"""
+        return iter_text_segments(
+            file_path,
+            segment_bytes=settings.TXT_SEGMENT_BYTES,
+            sniff_bytes=settings.TXT_SNIFF_BYTES
+        )
@@ -1,20 +1,29 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func, String, cast
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status, UploadFile
-from typing import List, Dict, Optional
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Dict, Optional, Tuple
+import mimetypes
 import os
 import shutil
+import zipfile
 import logging
 
 from ..models.document import Document
+from ..models.document_chunk import DocumentChunk
 from ..models.user import User
-from ..schemas.document import DocumentResponse, DocumentStats
+from ..schemas.document import DocumentResponse, DocumentStats, DocumentPageResponse
+from .text_store import TextStore
+from .ingestion_queue import IngestionQueue
+from ..config import settings
 from ..utils.helpers import (
     validate_file_type, 
-    validate_file_size, 
     generate_unique_filename,
     ensure_upload_dir,
-    calculate_file_hash
+    save_upload_file,
+    save_file_stream,
+    validate_batch_size
 )
 
 logger = logging.getLogger(__name__)
@@ -30,14 +39,7 @@ class DocumentService:
         """Upload and save document"""
         
         # Validate file type
-        file_ext = validate_file_type(file.filename)
-        
-        # Read file to get size
-        content = await file.read()
-        file_size = len(content)
-        
-        # Validate file size
-        validate_file_size(file_size)
+        validate_file_type(file.filename)
         
         # Generate unique filename
         unique_filename = generate_unique_filename(user.id, file.filename)
@@ -46,56 +48,289 @@ class DocumentService:
         upload_dir = ensure_upload_dir()
         file_path = os.path.join(upload_dir, unique_filename)
         
-        # Save file
-        with open(file_path, "wb") as buffer:
-            buffer.write(content)
+        # Stream file to disk (size limit + hash computed on the fly)
+        file_size, file_hash = await save_upload_file(file, file_path)
         
-        # Calculate file hash
-        file_hash = calculate_file_hash(file_path)
+        return DocumentService.create_document(
+            db, user, file.filename, file.content_type, file_path, file_size, file_hash, title
+        )
+    
+    @staticmethod
+    def create_document(
+        db: Session,
+        user: User,
+        filename: str,
+        content_type: Optional[str],
+        file_path: str,
+        file_size: int,
+        file_hash: str,
+        title: Optional[str] = None,
+        commit: bool = True
+    ) -> Document:
+        """Create the Document row for a file already saved at file_path (removed if duplicate)"""
         
-        # Check for duplicate uploads - handle NULL metadata safely
+        # Check for duplicate uploads - indexed (user_id, file_hash) lookup
         try:
-            # Query all user documents and check in Python (safer than JSON query)
-            existing_docs = db.query(Document).filter(
-                Document.user_id == user.id
-            ).all()
-            
-            for doc in existing_docs:
-                if doc.metadata_ and doc.metadata_.get("file_hash") == file_hash:
-                    # Remove duplicate file
-                    os.remove(file_path)
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="This file has already been uploaded"
-                    )
-        except HTTPException:
-            # Re-raise HTTPException (duplicate file)
-            raise
+            duplicate = db.query(Document.id).filter(
+                Document.user_id == user.id,
+                Document.file_hash == file_hash
+            ).first()
         except Exception as e:
             # Log error but don't block upload if duplicate check fails
             logger.warning(f"Could not check for duplicate files: {str(e)}")
+            duplicate = None
+        
+        if duplicate:
+            # Remove duplicate file
+            os.remove(file_path)
+            raise DocumentService._already_uploaded()
         
         # Create Document record
         document = Document(
             user_id=user.id,
-            title=title or file.filename,
+            title=title or filename,
             file_path=file_path,
-            file_type=file_ext[1:],
+            file_type=os.path.splitext(filename)[1].lower()[1:],
             file_size=file_size,
+            file_hash=file_hash,
             metadata_={  
-                "original_filename": file.filename,
+                "original_filename": filename,
                 "file_hash": file_hash,
-                "mime_type": file.content_type
+                "mime_type": content_type
             },
             processed=False
         )
         
-        db.add(document)
-        db.commit()
-        db.refresh(document)
+        try:
+            # Savepoint: a concurrent upload of the same file fails only this insert
+            with db.begin_nested():
+                db.add(document)
+                db.flush()  # assign id
+        except IntegrityError:
+            os.remove(file_path)
+            raise DocumentService._already_uploaded()
+        if commit:
+            db.commit()
+            db.refresh(document)
         
         return document
     
+    @staticmethod
+    def _already_uploaded() -> HTTPException:
+        """Duplicate (user_id, file_hash), found by the lookup or the unique index"""
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This file has already been uploaded"
+        )
+    
+    @staticmethod
+    async def upload_documents_batch(
+        db: Session,
+        files: List[UploadFile],
+        user: User
+    ) -> Tuple[List[Document], List[Dict[str, str]]]:
+        """
+        Upload many files (ZIP archives are expanded) in one request.
+
+        Files are streamed to disk, deduplicated with a single
+        (user_id, file_hash IN ...) query, inserted with one flush and
+        queued as a single batch ingestion job in the same transaction.
+        Returns (documents, skipped) where skipped lists {filename, reason}.
+        """
+        upload_dir = ensure_upload_dir()
+        saved: List[Dict] = []  # filename, content_type, file_ext, file_path, file_size, file_hash
+        skipped: List[Dict[str, str]] = []
+        used_paths = set()
+        
+        try:
+            for file in files:
+                if file.filename.lower().endswith('.zip'):
+                    await run_in_threadpool(
+                        DocumentService._save_archive_members,
+                        file, user, upload_dir, used_paths, saved, skipped
+                    )
+                    continue
+                
+                try:
+                    file_ext = validate_file_type(file.filename)
+                except HTTPException as e:
+                    skipped.append({"filename": file.filename, "reason": e.detail})
+                    continue
+                
+                DocumentService._check_batch_size(len(saved) + 1)
+                file_path = DocumentService._batch_file_path(upload_dir, user.id, file.filename, used_paths)
+                try:
+                    file_size, file_hash = await save_upload_file(file, file_path)
+                except HTTPException as e:
+                    skipped.append({"filename": file.filename, "reason": e.detail})
+                    continue
+                try:
+                    validate_batch_size(DocumentService._batch_bytes(saved) + file_size)
+                except HTTPException:
+                    os.remove(file_path)
+                    raise
+                
+                saved.append({
+                    "filename": file.filename,
+                    "content_type": file.content_type,
+                    "file_ext": file_ext,
+                    "file_path": file_path,
+                    "file_size": file_size,
+                    "file_hash": file_hash
+                })
+            
+            # One indexed lookup for the whole batch
+            hashes = {item["file_hash"] for item in saved}
+            seen_hashes = set()
+            if hashes:
+                seen_hashes = {
+                    file_hash for (file_hash,) in db.query(Document.file_hash).filter(
+                        Document.user_id == user.id,
+                        Document.file_hash.in_(hashes)
+                    ).all()
+                }
+            
+            documents = []
+            for item in saved:
+                if item["file_hash"] in seen_hashes:
+                    os.remove(item["file_path"])
+                    item["file_path"] = None
+                    skipped.append({"filename": item["filename"], "reason": "This file has already been uploaded"})
+                    continue
+                seen_hashes.add(item["file_hash"])
+                
+                documents.append(Document(
+                    user_id=user.id,
+                    title=item["filename"],
+                    file_path=item["file_path"],
+                    file_type=item["file_ext"][1:],
+                    file_size=item["file_size"],
+                    file_hash=item["file_hash"],
+                    metadata_={
+                        "original_filename": item["filename"],
+                        "file_hash": item["file_hash"],
+                        "mime_type": item["content_type"]
+                    },
+                    processed=False
+                ))
+            
+            if documents:
+                db.add_all(documents)
+                try:
+                    db.flush()  # assign ids
+                except IntegrityError:
+                    # Same file uploaded concurrently since the lookup
+                    raise DocumentService._already_uploaded()
+                IngestionQueue.enqueue_batch(db, [document.id for document in documents], commit=False)
+            db.commit()
+        except BaseException:
+            db.rollback()
+            for item in saved:
+                if item["file_path"] and os.path.exists(item["file_path"]):
+                    os.remove(item["file_path"])
+            raise
+        
+        if documents:
+            # Reload all rows in one query instead of one refresh per document
+            ids = [document.id for document in documents]
+            documents = db.query(Document).filter(Document.id.in_(ids)).order_by(Document.id).all()
+        
+        logger.info(f"📦 Batch upload for user {user.id}: {len(documents)} saved, {len(skipped)} skipped")
+        return documents, skipped
+    
+    @staticmethod
+    def _save_archive_members(
+        archive_file: UploadFile,
+        user: User,
+        upload_dir: str,
+        used_paths: set,
+        saved: List[Dict],
+        skipped: List[Dict[str, str]]
+    ) -> None:
+        """
+        Stream supported members of a ZIP upload to disk (blocking).
+        MAX_BATCH_BYTES is checked against the declared member sizes up
+        front and enforced on the bytes actually extracted (a zip bomb
+        can lie about its sizes); going over fails the whole batch.
+        """
+        try:
+            archive = zipfile.ZipFile(archive_file.file)
+        except zipfile.BadZipFile:
+            skipped.append({"filename": archive_file.filename, "reason": "Invalid ZIP archive"})
+            return
+        
+        def wanted(info: zipfile.ZipInfo) -> bool:
+            name = os.path.basename(info.filename)
+            # Skip folders and OS metadata (__MACOSX/, .DS_Store, ...)
+            return not (info.is_dir() or not name or name.startswith('.') or info.filename.startswith('__MACOSX/'))
+        
+        with archive:
+            members = [info for info in archive.infolist() if wanted(info)]
+            validate_batch_size(DocumentService._batch_bytes(saved) + sum(
+                info.file_size for info in members
+                if os.path.splitext(info.filename)[1].lower() in settings.ALLOWED_EXTENSIONS.split(',')
+            ))
+            
+            for info in members:
+                name = os.path.basename(info.filename)
+                
+                display_name = f"{archive_file.filename}/{info.filename}"
+                try:
+                    file_ext = validate_file_type(name)
+                except HTTPException as e:
+                    skipped.append({"filename": display_name, "reason": e.detail})
+                    continue
+                if info.flag_bits & 0x1:
+                    skipped.append({"filename": display_name, "reason": "Encrypted archive members are not supported"})
+                    continue
+                
+                DocumentService._check_batch_size(len(saved) + 1)
+                file_path = DocumentService._batch_file_path(upload_dir, user.id, name, used_paths)
+                try:
+                    with archive.open(info) as member:
+                        file_size, file_hash = save_file_stream(member, file_path, DocumentService._batch_bytes(saved))
+                except HTTPException as e:
+                    if e.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE:
+                        raise  # batch limit: the caller removes the files already written
+                    skipped.append({"filename": display_name, "reason": e.detail})
+                    continue
+                except (zipfile.BadZipFile, zipfile.LargeZipFile, NotImplementedError, EOFError) as e:
+                    skipped.append({"filename": display_name, "reason": f"Could not extract: {str(e)}"})
+                    continue
+                
+                saved.append({
+                    "filename": name,
+                    "content_type": mimetypes.guess_type(name)[0],
+                    "file_ext": file_ext,
+                    "file_path": file_path,
+                    "file_size": file_size,
+                    "file_hash": file_hash
+                })
+    
+    @staticmethod
+    def _batch_bytes(saved: List[Dict]) -> int:
+        return sum(item["file_size"] for item in saved)
+    
+    @staticmethod
+    def _check_batch_size(count: int) -> None:
+        if count > settings.MAX_BATCH_FILES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Too many files. Maximum per batch: {settings.MAX_BATCH_FILES}"
+            )
+    
+    @staticmethod
+    def _batch_file_path(upload_dir: str, user_id: int, filename: str, used_paths: set) -> str:
+        """Unique path; files of one batch share the same timestamp"""
+        name, ext = os.path.splitext(generate_unique_filename(user_id, filename))
+        file_path = os.path.join(upload_dir, f"{name}{ext}")
+        counter = 1
+        while file_path in used_paths or os.path.exists(file_path):
+            file_path = os.path.join(upload_dir, f"{name}_{counter}{ext}")
+            counter += 1
+        used_paths.add(file_path)
+        return file_path
+    
     @staticmethod
     def get_user_documents(
         db: Session,
@@ -152,6 +387,74 @@ class DocumentService:
         
         return document
     
+    @staticmethod
+    async def replace_document_file(
+        db: Session,
+        document_id: int,
+        file: UploadFile,
+        user: User
+    ) -> Document:
+        """
+        Replace the file of an existing document (revised upload).
+        Re-ingestion then only re-embeds chunks whose content changed; if
+        the document is being ingested, enqueue() makes that job run again.
+        """
+        document = DocumentService.get_document_by_id(db, document_id, user)
+        
+        file_ext = validate_file_type(file.filename)
+        if file_ext[1:] != document.file_type:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Replacement must be a .{document.file_type} file"
+            )
+        
+        unique_filename = generate_unique_filename(user.id, file.filename)
+        file_path = os.path.join(ensure_upload_dir(), unique_filename)
+        file_size, file_hash = await save_upload_file(file, file_path)
+        
+        # Same (user_id, file_hash) dedup as a new upload
+        duplicate = db.query(Document.id).filter(
+            Document.user_id == user.id,
+            Document.file_hash == file_hash,
+            Document.id != document.id
+        ).first()
+        if duplicate:
+            os.remove(file_path)
+            raise DocumentService._already_uploaded()
+        
+        old_path = document.file_path
+        old_key = TextStore.key_for(document)
+        old_hash = document.file_hash
+        
+        document.file_path = file_path
+        document.file_size = file_size
+        document.file_hash = file_hash
+        document.metadata_ = {
+            **(document.metadata_ or {}),
+            "original_filename": file.filename,
+            "file_hash": file_hash,
+            "mime_type": file.content_type
+        }
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            os.remove(file_path)
+            raise DocumentService._already_uploaded()
+        db.refresh(document)
+        
+        if old_path != file_path and os.path.exists(old_path):
+            os.remove(old_path)
+        
+        shared = old_hash and db.query(Document.id).filter(Document.file_hash == old_hash).first()
+        if old_hash != file_hash and not shared:
+            try:
+                TextStore().delete(old_key)
+            except Exception as e:
+                logger.warning(f"Could not delete stored text '{old_key}': {str(e)}")
+        
+        return document
+    
     @staticmethod
     def delete_document(db: Session, document_id: int, user: User) -> bool:
         """Delete document"""
@@ -160,11 +463,64 @@ class DocumentService:
         if os.path.exists(document.file_path):
             os.remove(document.file_path)
         
+        # Stored text is content-addressed: keep it while another upload shares the hash
+        shared = document.file_hash and db.query(Document.id).filter(
+            Document.file_hash == document.file_hash,
+            Document.id != document.id
+        ).first()
+        if not shared:
+            try:
+                TextStore().delete(TextStore.key_for(document))
+            except Exception as e:
+                logger.warning(f"Could not delete stored text for document {document.id}: {str(e)}")
+        
+        # Vectors are removed by the worker; queued in the same transaction as the delete
+        vector_ids = [
+            vector_id for (vector_id,) in
+            db.query(DocumentChunk.vector_id).filter(DocumentChunk.document_id == document.id).all()
+        ]
+        legacy_chunks = 0 if vector_ids else (document.metadata_ or {}).get('total_chunks') or 0
+        IngestionQueue.enqueue_vector_deletion(db, document.id, vector_ids, legacy_chunks, commit=False)
+        
+        document_id = document.id
         db.delete(document)
         db.commit()
+        logger.info(f"🗑️ Deleted document {document_id}, queued deletion of {len(vector_ids) or legacy_chunks} vectors")
         
         return True
     
+    @staticmethod
+    def get_document_page(
+        db: Session,
+        document_id: int,
+        user: User,
+        page_number: int
+    ) -> DocumentPageResponse:
+        """Read one page of extracted text from the text store"""
+        document = DocumentService.get_document_by_id(db, document_id, user)
+        
+        text_store = TextStore()
+        key = TextStore.key_for(document)
+        if not text_store.exists(key):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Extracted text not available. Document may not be processed yet"
+            )
+        
+        total_pages = text_store.page_count(key)
+        if page_number < 1 or page_number > total_pages:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Page not found. Document has {total_pages} pages"
+            )
+        
+        return DocumentPageResponse(
+            document_id=document.id,
+            page_number=page_number,
+            total_pages=total_pages,
+            text=text_store.read_page(key, page_number)
+        )
+    
     @staticmethod
     def get_user_stats(db: Session, user: User) -> DocumentStats:
         """Get document statistics for user"""
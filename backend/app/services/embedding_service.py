@@ -2,9 +2,9 @@
 
 # ✅ BƯỚC 1: Import AsyncOpenAI thay vì OpenAI
 
-from pinecone import Pinecone
 from typing import List, Dict, Any
 from ..config import settings
+from .vector_store import get_vector_store
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,9 +14,8 @@ class EmbeddingService:
         # ✅ BƯỚC 2: Khởi tạo AsyncOpenAI
         self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         
-        # Initialize Pinecone
-        self.pc = Pinecone(api_key=settings.PINECONE_API_KEY)
-        self.index = self.pc.Index(settings.PINECONE_INDEX_NAME)
+        # Pinecone or the local NumPy store (VECTOR_STORE)
+        self.store = get_vector_store()
 
     # ✅ BƯỚC 3: Chuyển hàm này thành async và dùng await
     async def create_embedding(self, text: str) -> List[float]:
@@ -62,7 +61,7 @@ class EmbeddingService:
         chunks: List[Dict[str, Any]]
     ) -> bool:
         """
-        Store document chunks with embeddings in Pinecone
+        Store document chunks with embeddings in the vector store
         """
         try:
             texts = [chunk['text'] for chunk in chunks]
@@ -91,14 +90,8 @@ class EmbeddingService:
                     'metadata': metadata
                 })
             
-            batch_size = 100
-            logger.info(f"Uploading {len(vectors)} vectors to Pinecone...")
-            
-            # Lưu ý: Pinecone v3+ là đồng bộ, nhưng nó đủ nhanh để chạy trong async context.
-            # Nếu nó gây chậm, bạn có thể bọc nó trong asyncio.to_thread
-            for i in range(0, len(vectors), batch_size):
-                batch = vectors[i:i + batch_size]
-                self.index.upsert(vectors=batch)
+            logger.info(f"Uploading {len(vectors)} vectors to the vector store...")
+            self.store.upsert(vectors)
             
             logger.info(f"✅ Successfully stored {len(vectors)} chunks for document {document_id}")
             return True
@@ -107,37 +100,28 @@ class EmbeddingService:
             logger.error(f"Error storing chunks: {str(e)}")
             raise
 
-    # Các hàm search và delete không cần thay đổi nếu chúng chỉ dùng Pinecone
     # Tuy nhiên, để nhất quán, hàm search cũng nên là async vì nó gọi create_embedding
     async def search_similar_chunks(
         self, 
         query: str, 
         document_ids: List[int] = None,
-        top_k: int = 5
+        top_k: int = 5,
+        user_id: int = None
     ) -> List[Dict[str, Any]]:
         try:
             query_embedding = await self.create_embedding(query)
             
-            filter_dict = None
-            if document_ids:
-                filter_dict = {'document_id': {'$in': document_ids}}
-            
-            results = self.index.query(
-                vector=query_embedding,
-                top_k=top_k,
-                include_metadata=True,
-                filter=filter_dict
-            )
+            results = self.store.query(query_embedding, top_k, document_ids=document_ids, user_id=user_id)
             
             matches = []
-            for match in results.matches:
+            for match in results:
                 matches.append({
-                    'id': match.id,
-                    'score': match.score,
-                    'document_id': match.metadata.get('document_id'),
-                    'chunk_index': match.metadata.get('chunk_index'),
-                    'text': match.metadata.get('text'),
-                    'page_number': match.metadata.get('page_number'),
+                    'id': match['id'],
+                    'score': match['score'],
+                    'document_id': match['metadata'].get('document_id'),
+                    'chunk_index': match['metadata'].get('chunk_index'),
+                    'text': match['metadata'].get('text'),
+                    'page_number': match['metadata'].get('page_number'),
                 })
             
             return matches
@@ -148,7 +132,7 @@ class EmbeddingService:
 
     def delete_document_chunks(self, document_id: int) -> bool:
         try:
-            self.index.delete(filter={'document_id': document_id})
+            self.store.delete_document(document_id)
             logger.info(f"✅ Deleted chunks for document {document_id}")
             return True
         except Exception as e:
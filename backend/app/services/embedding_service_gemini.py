@@ -1,13 +1,49 @@
 # app/services/embedding_service_gemini.py
 
 import google.generativeai as genai
-from pinecone import Pinecone
-from typing import List, Dict, Any
+from google.api_core import exceptions as google_exceptions
+from typing import List, Dict, Any, Iterator
 from ..config import settings
+from ..utils.adaptive_batcher import AdaptiveBatcher
+from ..utils.embedding_cache import get_embedding_cache
+from ..utils.metrics import Counter
+from ..utils.rate_limit import LoopSemaphore, TokenBucket
+from ..utils.simhash import collapse_near_duplicates
+from .vector_store import get_vector_store
+import asyncio
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL = "models/text-embedding-004"
+
+# Shared by every service instance of the process (worker jobs run concurrently)
+_REQUEST_SLOTS = LoopSemaphore(settings.EMBEDDING_CONCURRENCY)
+_REQUEST_RATE = TokenBucket(settings.EMBEDDING_REQUESTS_PER_MINUTE, burst=settings.EMBEDDING_CONCURRENCY)
+
+_BATCHER = AdaptiveBatcher(
+    initial=settings.EMBEDDING_BATCH_INITIAL,
+    min_size=settings.EMBEDDING_BATCH_MIN,
+    max_size=min(settings.EMBEDDING_BATCH_MAX, 100),  # API limit per request
+    max_tokens=settings.EMBEDDING_BATCH_MAX_TOKENS,
+    max_bytes=settings.EMBEDDING_BATCH_MAX_BYTES,
+    target_seconds=settings.EMBEDDING_BATCH_TARGET_SECONDS
+)
+
+# Quota and transient errors: retried with backoff
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,   # 429
+    google_exceptions.ServiceUnavailable,  # 503
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+)
+
+EMBEDDING_REQUESTS = Counter(
+    "docmentor_embedding_requests_total",
+    "Gemini embedding requests, by outcome (ok, retried, split, failed)",
+)
+
 class EmbeddingServiceGemini:
     """
     Gemini embedding service - COMPLETELY FREE!
@@ -19,9 +55,8 @@ class EmbeddingServiceGemini:
         genai.configure(api_key=settings.GEMINI_API_KEY)
         logger.info("✅ Gemini embeddings configured!")
         
-        # Initialize Pinecone
-        self.pc = Pinecone(api_key=settings.PINECONE_API_KEY)
-        self.index = self.pc.Index(settings.PINECONE_INDEX_NAME)
+        # Pinecone or the local NumPy store (VECTOR_STORE)
+        self.store = get_vector_store()
     
     async def create_embedding(self, text: str) -> List[float]:
         """
@@ -29,12 +64,7 @@ class EmbeddingServiceGemini:
         Model: text-embedding-004 (768 dimensions)
         """
         try:
-            result = genai.embed_content(
-                model="models/text-embedding-004",
-                content=text,
-                task_type="retrieval_document"  # For storing in vector DB
-            )
-            return result['embedding']
+            return (await self._embed([text], "retrieval_document"))[0]  # For storing in vector DB
         except Exception as e:
             logger.error(f"Error creating Gemini embedding: {str(e)}")
             raise
@@ -46,29 +76,7 @@ class EmbeddingServiceGemini:
         """
         try:
             logger.info(f"Creating Gemini embeddings for {len(texts)} texts...")
-            
-            # Gemini can handle batches, but we'll process in chunks for safety
-            batch_size = 100
-            all_embeddings = []
-            
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i + batch_size]
-                
-                # Gemini batch embedding
-                results = genai.embed_content(
-                    model="models/text-embedding-004",
-                    content=batch,
-                    task_type="retrieval_document"
-                )
-                
-                # Extract embeddings
-                if isinstance(results['embedding'][0], list):
-                    # Multiple texts
-                    all_embeddings.extend(results['embedding'])
-                else:
-                    # Single text
-                    all_embeddings.append(results['embedding'])
-            
+            all_embeddings = await self._embed(texts, "retrieval_document")
             logger.info(f"✅ Created {len(all_embeddings)} embeddings")
             return all_embeddings
             
@@ -82,23 +90,157 @@ class EmbeddingServiceGemini:
         Uses task_type="retrieval_query" for better search results
         """
         try:
-            result = genai.embed_content(
-                model="models/text-embedding-004",
-                content=query,
-                task_type="retrieval_query"  # Optimized for queries
-            )
-            return result['embedding']
+            return (await self._embed([query], "retrieval_query"))[0]  # Optimized for queries
         except Exception as e:
             logger.error(f"Error creating query embedding: {str(e)}")
             raise
     
+    async def _embed(self, texts: List[str], task_type: str) -> List[List[float]]:
+        """
+        Embeddings in input order. The embedding cache is consulted first;
+        only misses (each distinct text once) are sent to Gemini.
+        """
+        cache = await asyncio.to_thread(get_embedding_cache)
+        # SQLite I/O stays off the event loop
+        if cache:
+            embeddings = await asyncio.to_thread(cache.get_many, EMBEDDING_MODEL, task_type, texts)
+        else:
+            embeddings = [None] * len(texts)
+        
+        missing = list(dict.fromkeys(text for text, embedding in zip(texts, embeddings) if embedding is None))
+        if not missing:
+            if texts:
+                logger.info(f"♻️ All {len(texts)} embeddings served from cache")
+            return embeddings
+        
+        # Adaptive batches (size from observed latency/errors, capped by estimated
+        # tokens and bytes), sent concurrently under EMBEDDING_CONCURRENCY and the
+        # EMBEDDING_REQUESTS_PER_MINUTE token bucket
+        results = await asyncio.gather(*(
+            self._embed_batch(batch, task_type) for batch in _BATCHER.pack(missing)
+        ))
+        created = [embedding for batch in results for embedding in batch]
+        
+        if cache:
+            await asyncio.to_thread(cache.put_many, EMBEDDING_MODEL, task_type, missing, created)
+            if len(missing) < len(texts):
+                logger.info(f"♻️ {len(texts) - len(missing)}/{len(texts)} embeddings served from cache")
+        
+        by_text = dict(zip(missing, created))
+        return [embedding if embedding is not None else by_text[text] for text, embedding in zip(texts, embeddings)]
+    
+    async def _embed_batch(self, batch: List[str], task_type: str) -> List[List[float]]:
+        """
+        One embed_content request, run off the event loop, with retries on
+        429/5xx. A request rejected as invalid (e.g. too large) is split in two.
+        """
+        attempt = 0
+        while True:
+            too_large = False
+            async with _REQUEST_SLOTS.get():
+                await _REQUEST_RATE.acquire()
+                started = time.monotonic()
+                try:
+                    results = await asyncio.to_thread(
+                        genai.embed_content,
+                        model=EMBEDDING_MODEL,
+                        content=batch,
+                        task_type=task_type
+                    )
+                    _BATCHER.record_success(len(batch), started)
+                    EMBEDDING_REQUESTS.inc(outcome="ok")
+                    break
+                except google_exceptions.InvalidArgument:
+                    if len(batch) == 1:
+                        EMBEDDING_REQUESTS.inc(outcome="failed")
+                        raise
+                    _BATCHER.record_failure(started)
+                    EMBEDDING_REQUESTS.inc(outcome="split")
+                    too_large = True
+                except RETRYABLE_ERRORS as e:
+                    attempt += 1
+                    if not isinstance(e, google_exceptions.ResourceExhausted):
+                        _BATCHER.record_failure(started)  # 429 is about pace, not batch size
+                    if attempt > settings.EMBEDDING_MAX_RETRIES:
+                        EMBEDDING_REQUESTS.inc(outcome="failed")
+                        raise
+                    EMBEDDING_REQUESTS.inc(outcome="retried")
+                    delay = settings.EMBEDDING_RETRY_BASE_SECONDS * (2 ** (attempt - 1))
+                    logger.warning(f"⚠️ Embedding request failed ({type(e).__name__}), retry {attempt} in {delay}s")
+            if too_large:
+                half = len(batch) // 2
+                logger.warning(f"⚠️ Embedding request of {len(batch)} texts rejected, splitting")
+                left, right = await asyncio.gather(
+                    self._embed_batch(batch[:half], task_type),
+                    self._embed_batch(batch[half:], task_type)
+                )
+                return left + right
+            # Back off without holding a concurrency slot
+            await asyncio.sleep(delay)
+        
+        # Extract embeddings
+        if isinstance(results['embedding'][0], list):
+            # Multiple texts
+            return results['embedding']
+        # Single text
+        return [results['embedding']]
+    
+    def build_vectors(
+        self,
+        document_id: int,
+        chunks: List[Dict[str, Any]],
+        embeddings: List[List[float]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Build vector store entries (id, values, metadata) for embedded chunks.
+        A chunk may carry its own 'document_id' (multi-document batches).
+        """
+        vectors = []
+        for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+            chunk_document_id = chunk.get('document_id', document_id)
+            chunk_index = chunk.get('chunk_index', idx)
+            vector_id = chunk.get('vector_id') or f"doc_{chunk_document_id}_chunk_{chunk_index}"
+            
+            metadata = {
+                'document_id': chunk_document_id,
+                'chunk_index': chunk_index,
+                'text': chunk['text'][:1000],  # Pinecone metadata limit
+                'page_number': chunk.get('page_number', 0),
+            }
+            
+            if 'metadata' in chunk:
+                metadata.update(chunk['metadata'])
+            
+            vectors.append({
+                'id': vector_id,
+                'values': embedding,
+                'metadata': metadata
+            })
+        return vectors
+    
+    def upsert_vectors(self, vectors: List[Dict[str, Any]]) -> int:
+        """
+        Write vectors to the vector store.
+        Blocking: call from a thread (see upsert_vectors_async).
+        """
+        return self.store.upsert(vectors)
+    
+    async def upsert_vectors_async(self, vectors: List[Dict[str, Any]]) -> int:
+        return await asyncio.to_thread(self.upsert_vectors, vectors)
+    
+    def fetch_vector_values(self, vector_ids: List[str]) -> Dict[str, List[float]]:
+        """
+        Fetch stored embeddings by vector ID (missing IDs are left out)
+        """
+        return self.store.fetch(vector_ids)
+    
     async def store_chunks(
         self, 
         document_id: int, 
         chunks: List[Dict[str, Any]]
     ) -> bool:
         """
-        Store document chunks with Gemini embeddings in Pinecone
+        Store document chunks with Gemini embeddings in the vector store
         """
         try:
             texts = [chunk['text'] for chunk in chunks]
@@ -106,33 +248,10 @@ class EmbeddingServiceGemini:
             logger.info(f"Creating Gemini embeddings for {len(texts)} chunks...")
             embeddings = await self.create_embeddings_batch(texts)
             
-            vectors = []
-            for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                vector_id = f"doc_{document_id}_chunk_{idx}"
-                
-                metadata = {
-                    'document_id': document_id,
-                    'chunk_index': idx,
-                    'text': chunk['text'][:1000],  # Pinecone metadata limit
-                    'page_number': chunk.get('page_number', 0),
-                }
-                
-                if 'metadata' in chunk:
-                    metadata.update(chunk['metadata'])
-                
-                vectors.append({
-                    'id': vector_id,
-                    'values': embedding,
-                    'metadata': metadata
-                })
-            
-            # Upload to Pinecone in batches
-            batch_size = 100
-            logger.info(f"Uploading {len(vectors)} vectors to Pinecone...")
+            vectors = self.build_vectors(document_id, chunks, embeddings)
             
-            for i in range(0, len(vectors), batch_size):
-                batch = vectors[i:i + batch_size]
-                self.index.upsert(vectors=batch)
+            logger.info(f"Uploading {len(vectors)} vectors to the vector store...")
+            await self.upsert_vectors_async(vectors)
             
             logger.info(f"✅ Successfully stored {len(vectors)} chunks for document {document_id}")
             return True
@@ -145,7 +264,8 @@ class EmbeddingServiceGemini:
         self, 
         query: str, 
         document_ids: List[int] = None,
-        top_k: int = 5
+        top_k: int = 5,
+        user_id: int = None
     ) -> List[Dict[str, Any]]:
         """
         Search for similar chunks using Gemini query embedding
@@ -154,40 +274,82 @@ class EmbeddingServiceGemini:
             # Use query-optimized embedding
             query_embedding = await self.create_query_embedding(query)
             
-            filter_dict = None
-            if document_ids:
-                filter_dict = {'document_id': {'$in': document_ids}}
-            
-            results = self.index.query(
-                vector=query_embedding,
-                top_k=top_k,
-                include_metadata=True,
-                filter=filter_dict
+            # Over-fetch so near-duplicate hits can be dropped
+            collapse = settings.SEARCH_COLLAPSE_NEAR_DUPLICATES
+            results = self.store.query(
+                query_embedding,
+                top_k * 2 if collapse else top_k,
+                document_ids=document_ids,
+                user_id=user_id
             )
             
             matches = []
-            for match in results.matches:
+            for match in results:
                 matches.append({
-                    'id': match.id,
-                    'score': match.score,
-                    'document_id': match.metadata.get('document_id'),
-                    'chunk_index': match.metadata.get('chunk_index'),
-                    'text': match.metadata.get('text'),
-                    'page_number': match.metadata.get('page_number'),
+                    'id': match['id'],
+                    'score': match['score'],
+                    'document_id': match['metadata'].get('document_id'),
+                    'chunk_index': match['metadata'].get('chunk_index'),
+                    'text': match['metadata'].get('text'),
+                    'page_number': match['metadata'].get('page_number'),
                 })
             
+            if collapse:
+                matches = collapse_near_duplicates(
+                    matches, top_k,
+                    max_distance=settings.NEAR_DUPLICATE_MAX_DISTANCE,
+                    min_words=settings.NEAR_DUPLICATE_MIN_WORDS
+                )
             return matches
             
         except Exception as e:
             logger.error(f"Error searching chunks: {str(e)}")
             raise
     
+    def update_chunk_metadata(self, vector_id: str, metadata: Dict[str, Any]) -> None:
+        """
+        Update metadata of an existing vector (no re-embedding)
+        """
+        try:
+            self.store.update_metadata(vector_id, metadata)
+        except Exception as e:
+            logger.error(f"Error updating chunk metadata: {str(e)}")
+            raise
+    
+    def update_chunk_metadata_many(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Update metadata of many vectors at once: {vector_id: metadata}
+        """
+        try:
+            self.store.update_metadata_many(updates)
+        except Exception as e:
+            logger.error(f"Error updating chunk metadata: {str(e)}")
+            raise
+    
+    def delete_vectors(self, vector_ids: List[str]) -> int:
+        """
+        Delete vectors by ID (batched)
+        """
+        try:
+            self.store.delete(vector_ids)
+            logger.info(f"✅ Deleted {len(vector_ids)} vectors")
+            return len(vector_ids)
+        except Exception as e:
+            logger.error(f"Error deleting vectors: {str(e)}")
+            raise
+    
+    def list_vector_ids(self, prefix: str = "") -> Iterator[List[str]]:
+        """
+        Page through vector IDs starting with prefix (Pinecone: serverless indexes only)
+        """
+        return self.store.list_ids(prefix)
+    
     def delete_document_chunks(self, document_id: int) -> bool:
         """
-        Delete all chunks of a document from Pinecone
+        Delete all chunks of a document from the vector store
         """
         try:
-            self.index.delete(filter={'document_id': document_id})
+            self.store.delete_document(document_id)
             logger.info(f"✅ Deleted chunks for document {document_id}")
             return True
         except Exception as e:
@@ -1,7 +1,6 @@
 from sentence_transformers import SentenceTransformer
-from pinecone import Pinecone
 from typing import List, Dict, Any
-from ..config import settings
+from .vector_store import get_vector_store
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,9 +17,8 @@ class EmbeddingServiceLocal:
         self.model = SentenceTransformer('all-MiniLM-L6-v2')  # 384 dimensions, fast & good
         logger.info("✅ Model loaded!")
         
-        # Initialize Pinecone
-        self.pc = Pinecone(api_key=settings.PINECONE_API_KEY)
-        self.index = self.pc.Index(settings.PINECONE_INDEX_NAME)
+        # Pinecone or the local NumPy store (VECTOR_STORE)
+        self.store = get_vector_store()
     
     async def create_embedding(self, text: str) -> List[float]:
         """Create embedding vector for text using local model"""
@@ -48,7 +46,7 @@ class EmbeddingServiceLocal:
         document_id: int, 
         chunks: List[Dict[str, Any]]
     ) -> bool:
-        """Store document chunks with embeddings in Pinecone"""
+        """Store document chunks with embeddings in the vector store"""
         try:
             texts = [chunk['text'] for chunk in chunks]
             
@@ -75,12 +73,8 @@ class EmbeddingServiceLocal:
                     'metadata': metadata
                 })
             
-            batch_size = 100
-            logger.info(f"Uploading {len(vectors)} vectors to Pinecone...")
-            
-            for i in range(0, len(vectors), batch_size):
-                batch = vectors[i:i + batch_size]
-                self.index.upsert(vectors=batch)
+            logger.info(f"Uploading {len(vectors)} vectors to the vector store...")
+            self.store.upsert(vectors)
             
             logger.info(f"✅ Successfully stored {len(vectors)} chunks for document {document_id}")
             return True
@@ -93,32 +87,24 @@ class EmbeddingServiceLocal:
         self, 
         query: str, 
         document_ids: List[int] = None,
-        top_k: int = 5
+        top_k: int = 5,
+        user_id: int = None
     ) -> List[Dict[str, Any]]:
         """Search for similar chunks"""
         try:
             query_embedding = await self.create_embedding(query)
             
-            filter_dict = None
-            if document_ids:
-                filter_dict = {'document_id': {'$in': document_ids}}
-            
-            results = self.index.query(
-                vector=query_embedding,
-                top_k=top_k,
-                include_metadata=True,
-                filter=filter_dict
-            )
+            results = self.store.query(query_embedding, top_k, document_ids=document_ids, user_id=user_id)
             
             matches = []
-            for match in results.matches:
+            for match in results:
                 matches.append({
-                    'id': match.id,
-                    'score': match.score,
-                    'document_id': match.metadata.get('document_id'),
-                    'chunk_index': match.metadata.get('chunk_index'),
-                    'text': match.metadata.get('text'),
-                    'page_number': match.metadata.get('page_number'),
+                    'id': match['id'],
+                    'score': match['score'],
+                    'document_id': match['metadata'].get('document_id'),
+                    'chunk_index': match['metadata'].get('chunk_index'),
+                    'text': match['metadata'].get('text'),
+                    'page_number': match['metadata'].get('page_number'),
                 })
             
             return matches
@@ -130,7 +116,7 @@ class EmbeddingServiceLocal:
     def delete_document_chunks(self, document_id: int) -> bool:
         """Delete all chunks of a document"""
         try:
-            self.index.delete(filter={'document_id': document_id})
+            self.store.delete_document(document_id)
             logger.info(f"✅ Deleted chunks for document {document_id}")
             return True
         except Exception as e:
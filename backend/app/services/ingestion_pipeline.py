@@ -0,0 +1,622 @@
+# app/services/ingestion_pipeline.py
+
+from sqlalchemy.orm import Session
+from bisect import bisect_right
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+import asyncio
+import hashlib
+import logging
+import time
+from ..config import settings
+from ..models.document import Document
+from ..models.document_chunk import DocumentChunk
+from ..utils.boilerplate import learn_boilerplate, strip_boilerplate
+from ..utils.simhash import SimHashIndex, simhash, to_signed, to_unsigned
+from .ingestion_progress import ProgressReporter, TIME_TO_QUERYABLE
+from .text_store import TextStore
+
+logger = logging.getLogger(__name__)
+
+MIN_DOCUMENT_CHARS = 100
+MAX_REPORTED_PAGES = 200  # Low-quality page numbers kept in the metadata
+
+_DONE = object()  # End-of-stream marker passed through the queues
+
+async def run_stages(*stages) -> None:
+    """Run pipeline stages concurrently; cancel the rest if one fails"""
+    tasks = [asyncio.create_task(stage) for stage in stages]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+class DocumentIngestion:
+    """
+    Per-document side of the pipeline: extract pages, split them into
+    fingerprinted chunks and track what must be embedded or deleted.
+    """
+
+    def __init__(self, processor, document: Document, file_path: str):
+        self.processor = processor
+        self.embedding_service = processor.embedding_service
+        self.document = document
+        self.document_id = document.id
+        self.user_id = document.user_id
+        self.uploaded_at = document.created_at
+        self.file_path = file_path
+        self.page_markers = file_path.endswith('.pdf')
+        self.text_store_key = TextStore.key_for(document)
+        self.had_chunks = bool((document.metadata_ or {}).get('total_chunks'))
+        self.chunk_metadata = {
+            'file_type': document.file_type,
+            'title': document.title,
+            'user_id': document.user_id  # Partition key of the local vector store
+        }
+
+        self.window_size = max(1, settings.INGEST_PAGE_WINDOW)
+        self.queue_size = max(1, settings.INGEST_QUEUE_SIZE)
+
+        # vector_id -> (row id, chunk_index, page_number) of already stored chunks
+        self.existing: Dict[str, Tuple[int, int, Optional[int]]] = {}
+        self.seen_vector_ids = set()
+        self._occurrences: Dict[str, int] = {}
+        self._page_offsets: List[int] = []  # start of each page in the document text
+        self._page_numbers: List[int] = []
+        self._text_length = 0
+        self._boilerplate: Set[str] = set()
+        self._raw_splitter = None
+        self.error: Optional[BaseException] = None
+        self.progress: Optional[ProgressReporter] = None
+        self.started = 0.0
+
+        self.stats = {
+            'pages': 0,
+            'characters': 0,
+            'chunks': 0,
+            'embedded': 0,
+            'reused': 0,
+            'deleted': 0,
+            'near_duplicates': 0,
+            'boilerplate_lines': 0,
+            'boilerplate_characters': 0,
+            'boilerplate_chunks': 0,
+            'extraction': {},  # PDF backend -> seconds/pages/chars/rejected
+            'page_quality': {'low_quality_pages': 0, 'reasons': {}, 'page_numbers': []},
+            'seconds_to_queryable': None,  # ingestion start -> first chunks searchable
+        }
+
+    async def prepare(self, db: Session) -> None:
+        """Snapshot stored fingerprints; drop legacy positional vectors"""
+        self.started = time.monotonic()
+        self.progress = ProgressReporter(db, self.document_id)
+        self.progress.flush('pending')
+
+        self.existing = {
+            vector_id: (row_id, chunk_index, page_number)
+            for row_id, vector_id, chunk_index, page_number in db.query(
+                DocumentChunk.id,
+                DocumentChunk.vector_id,
+                DocumentChunk.chunk_index,
+                DocumentChunk.page_number
+            ).filter(DocumentChunk.document_id == self.document_id).all()
+        }
+
+        # Documents ingested before fingerprinting used positional IDs
+        if not self.existing and self.had_chunks:
+            logger.info(f"🧹 Removing legacy positional vectors of document {self.document_id}")
+            await asyncio.to_thread(self.embedding_service.delete_document_chunks, self.document_id)
+
+    def mark_indexed(self, chunk_index: int, page_number: Optional[int]) -> None:
+        """Chunks [0, chunk_index] are upserted and committed"""
+        if self.stats['seconds_to_queryable'] is None:
+            self.stats['seconds_to_queryable'] = round(time.monotonic() - self.started, 2)
+            if self.uploaded_at is not None:
+                TIME_TO_QUERYABLE.observe((datetime.utcnow() - self.uploaded_at).total_seconds())
+            logger.info(f"🔓 Document {self.document_id} queryable after {self.stats['seconds_to_queryable']}s")
+        self.progress.set_indexed(chunk_index + 1, page_number)
+
+    async def produce(self, out: asyncio.Queue) -> None:
+        """Extract and split this document into the shared chunk queue"""
+        self.progress.flush('extracting')
+        window_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        writer = self.processor.text_store.writer(self.text_store_key, self.page_markers)
+        try:
+            await run_stages(
+                self._extract_stage(window_queue, writer),
+                self._split_stage(window_queue, out),
+            )
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
+        # Remaining chunks are still in the embed/upsert stages
+        self.progress.flush('embedding')
+
+    async def finalize(self, db: Session) -> None:
+        """Delete vectors of chunks that disappeared (after new ones are written)"""
+        self.progress.flush('finalizing')
+        removed_ids = [vector_id for vector_id in self.existing if vector_id not in self.seen_vector_ids]
+        if removed_ids:
+            await asyncio.to_thread(self.embedding_service.delete_vectors, removed_ids)
+            db.query(DocumentChunk).filter(
+                DocumentChunk.document_id == self.document_id,
+                DocumentChunk.vector_id.in_(removed_ids)
+            ).delete(synchronize_session=False)
+            db.commit()
+        self.stats['deleted'] = len(removed_ids)
+
+    async def discard(self, db: Session) -> None:
+        """
+        Remove everything indexed for a document that failed mid-batch:
+        chunks upserted before the failure would leave it half-searchable
+        """
+        vector_ids = list(self.seen_vector_ids | set(self.existing))
+        if vector_ids:
+            await asyncio.to_thread(self.embedding_service.delete_vectors, vector_ids)
+        db.query(DocumentChunk).filter(
+            DocumentChunk.document_id == self.document_id
+        ).delete(synchronize_session=False)
+        # No chunks left: a retry must not take the legacy positional-ID path
+        metadata = dict(self.document.metadata_ or {})
+        if metadata.pop('total_chunks', None) is not None:
+            self.document.metadata_ = metadata
+        db.commit()
+        logger.info(f"🧹 Removed {len(vector_ids)} vectors of failed document {self.document_id}")
+
+    # ------------------------------------------------------------------
+    # Stage 1: extract pages into windows (and persist them)
+    # ------------------------------------------------------------------
+    async def _extract_stage(self, out: asyncio.Queue, writer) -> None:
+        window: List[Tuple[int, str]] = []
+        async for page_number, page_text in self.processor.iter_pages(self.file_path, self.stats['extraction']):
+            writer.append_page(page_text)
+            self.stats['pages'] += 1
+            self.progress.add(pages_extracted=1)
+            window.append((page_number, page_text))
+            if len(window) >= self.window_size:
+                await out.put(window)
+                window = []
+        if window:
+            await out.put(window)
+        await out.put(_DONE)
+
+    # ------------------------------------------------------------------
+    # Stage 2: split the page stream into fingerprinted chunks
+    # ------------------------------------------------------------------
+    def _page_part(self, page_number: int, page_text: str) -> str:
+        # Non-PDF pages are contiguous segments of one text
+        return f"\n[Page {page_number}]\n{page_text}" if self.page_markers else page_text
+
+    def _window_text(self, window: List[Tuple[int, str]]) -> str:
+        """Join a page window, recording where each page starts in the document text"""
+        parts = []
+        for page_number, page_text in window:
+            if not page_text:
+                continue
+            part = self._page_part(page_number, page_text)
+            self._page_offsets.append(self._text_length)
+            self._page_numbers.append(page_number)
+            parts.append(part)
+            self._text_length += len(part)
+        return "".join(parts)
+
+    def _page_at(self, offset: int) -> int:
+        idx = bisect_right(self._page_offsets, offset) - 1
+        return self._page_numbers[idx] if idx >= 0 else 0
+
+    def _fingerprint(self, chunk: Dict[str, Any]) -> None:
+        """Stable content-derived vector ID (repeats get an occurrence suffix)"""
+        content_hash = hashlib.sha256(chunk['text'].encode('utf-8')).hexdigest()
+        seen = self._occurrences.get(content_hash, 0)
+        self._occurrences[content_hash] = seen + 1
+
+        vector_id = f"doc_{self.document_id}_{content_hash[:16]}"
+        if seen:
+            vector_id = f"{vector_id}_{seen}"
+
+        chunk['content_hash'] = content_hash
+        chunk['vector_id'] = vector_id
+
+    async def _windows(self, inp: asyncio.Queue) -> AsyncIterator[List[Tuple[int, str]]]:
+        """Page windows from stage 1; PDF pages are held until boilerplate is learned"""
+        learning = self.page_markers and settings.BOILERPLATE_STRIP
+        held: List[Tuple[int, str]] = []
+        while True:
+            window = await inp.get()
+            if window is _DONE:
+                break
+            if learning:
+                held.extend(window)
+                if len(held) < settings.BOILERPLATE_SAMPLE_PAGES:
+                    continue
+                self._learn_boilerplate(held)
+                learning = False
+                window, held = held, []
+            yield window
+        if learning and held:
+            self._learn_boilerplate(held)
+            yield held
+
+    def _learn_boilerplate(self, sample: List[Tuple[int, str]]) -> None:
+        self._boilerplate = learn_boilerplate(
+            (page_text for _, page_text in sample),
+            settings.BOILERPLATE_MIN_PAGE_FRACTION,
+            settings.BOILERPLATE_MIN_PAGES
+        )
+        if self._boilerplate:
+            logger.info(f"✂️ Document {self.document_id}: stripping {len(self._boilerplate)} boilerplate lines")
+            self.stats['boilerplate_lines'] = len(self._boilerplate)
+            # Splits the unstripped text too, only to count the chunks saved
+            self._raw_splitter = self.processor.text_splitter.stream()
+
+    def _clean_window(self, window: List[Tuple[int, str]]) -> Tuple[List[Tuple[int, str]], List[Tuple[int, str]]]:
+        """
+        PDF pages without boilerplate lines, low-quality pages dropped or
+        flagged. Also returns the same pages with boilerplate kept (the
+        baseline for counting chunks saved by stripping).
+        """
+        if not self.page_markers:
+            return window, window
+        cleaned = []
+        baseline = []
+        for page_number, page_text in window:
+            raw_text = page_text
+            if self._boilerplate:
+                page_text, removed = strip_boilerplate(page_text, self._boilerplate)
+                self.stats['boilerplate_characters'] += removed
+            reason = self.processor.page_quality_reason(page_text)
+            if reason is not None:
+                self._record_low_quality(page_number, reason)
+                if settings.PAGE_QUALITY_FILTER == 'drop':
+                    page_text = raw_text = ""
+            cleaned.append((page_number, page_text))
+            baseline.append((page_number, raw_text))
+        return cleaned, baseline
+
+    def _record_low_quality(self, page_number: int, reason: str) -> None:
+        quality = self.stats['page_quality']
+        quality['low_quality_pages'] += 1
+        quality['reasons'][reason] = quality['reasons'].get(reason, 0) + 1
+        if len(quality['page_numbers']) < MAX_REPORTED_PAGES:
+            quality['page_numbers'].append(page_number)
+
+    async def _split_stage(self, inp: asyncio.Queue, out: asyncio.Queue) -> None:
+        # One streaming splitter per document: chunks may span page windows
+        splitter = self.processor.text_splitter.stream()
+        raw_chunks = 0
+
+        async for window in self._windows(inp):
+            cleaned, baseline = self._clean_window(window)
+            text = self._window_text(cleaned)
+            self.stats['characters'] += len(text)
+            await self._emit_chunks(await asyncio.to_thread(splitter.feed, text), out)
+            if self._raw_splitter is not None:
+                raw_text = "".join(self._page_part(n, page_text) for n, page_text in baseline if page_text)
+                raw_chunks += len(await asyncio.to_thread(self._raw_splitter.feed, raw_text))
+
+        pieces = await asyncio.to_thread(splitter.finish)
+        if self.stats['chunks'] == 0:
+            # Short documents end up as a single stripped chunk
+            length = sum(len(text) for _, text in pieces)
+            if length < MIN_DOCUMENT_CHARS:
+                low_quality = self.stats['page_quality']['low_quality_pages']
+                if low_quality and settings.PAGE_QUALITY_FILTER == 'drop':
+                    raise Exception(
+                        f"Document has no usable text: {low_quality}/{self.stats['pages']} pages "
+                        f"are empty or unreadable (scanned or image-only?)"
+                    )
+                raise Exception(f"Document is empty or too short: {length} chars")
+        await self._emit_chunks(pieces, out)
+
+        if self._raw_splitter is not None:
+            raw_chunks += len(self._raw_splitter.finish())
+            self.stats['boilerplate_chunks'] = max(0, raw_chunks - self.stats['chunks'])
+
+    async def _emit_chunks(self, pieces: List[Tuple[int, str]], out: asyncio.Queue) -> None:
+        chunks = []
+        for offset, chunk_text in pieces:
+            chunk = {
+                'text': chunk_text,
+                'page_number': self._page_at(offset),
+                'document_id': self.document_id,
+                'chunk_index': self.stats['chunks'],
+                'metadata': self.chunk_metadata,
+            }
+            self._fingerprint(chunk)
+            self.stats['chunks'] += 1
+            chunks.append(chunk)
+        if chunks:
+            self.progress.add(chunks=len(chunks))
+            await out.put(chunks)
+
+class IngestionPipeline:
+    """
+    Streaming ingestion: extract → split → embed → upsert.
+
+    Each stage is a task connected to the next by a bounded asyncio.Queue,
+    so only a few page windows and embedding batches are held in memory at
+    any time and embedding overlaps extraction. Chunks are fingerprinted
+    and only new fingerprints are embedded (incremental re-ingestion).
+
+    Several documents can share one pipeline: they are extracted one after
+    another into the same chunk queue, so embedding batches are filled
+    across file boundaries. With isolate_failures, a document that fails
+    to extract is recorded in its DocumentIngestion.error instead of
+    aborting the others, and the chunks it already indexed are removed.
+    """
+
+    def __init__(
+        self,
+        processor,
+        db: Session,
+        documents: List[Tuple[Document, str]],
+        isolate_failures: bool = False
+    ):
+        self.processor = processor
+        self.embedding_service = processor.embedding_service
+        self.db = db
+        self.isolate_failures = isolate_failures
+        self.ingestions: Dict[int, DocumentIngestion] = {
+            document.id: DocumentIngestion(processor, document, file_path)
+            for document, file_path in documents
+        }
+
+        self.batch_size = max(1, settings.INGEST_EMBED_BATCH_SIZE)
+        self.first_batch_size = max(1, min(settings.INGEST_FIRST_BATCH_SIZE, self.batch_size))
+        self.queue_size = max(1, settings.INGEST_QUEUE_SIZE)
+        # user_id -> SimHash index of that user's stored chunks
+        self.near_duplicates: Dict[int, SimHashIndex] = {}
+        self._embed_tasks: Set[asyncio.Task] = set()
+        self.upsert_concurrency = max(1, settings.PINECONE_UPSERT_CONCURRENCY)
+
+    async def run(self) -> Dict[int, DocumentIngestion]:
+        """Run the pipeline; returns per-document ingestion state"""
+        for ingestion in self.ingestions.values():
+            await ingestion.prepare(self.db)
+        if settings.INGEST_NEAR_DUPLICATES:
+            for user_id in {ingestion.user_id for ingestion in self.ingestions.values()}:
+                self.near_duplicates[user_id] = self._load_near_duplicate_index(user_id)
+
+        chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        vector_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        try:
+            await run_stages(
+                self._produce_stage(chunk_queue),
+                self._embed_stage(chunk_queue, vector_queue),
+                self._upsert_stage(vector_queue),
+            )
+        finally:
+            # Batches still queued when a stage failed
+            for task in list(self._embed_tasks):
+                task.cancel()
+
+        for ingestion in self.ingestions.values():
+            if ingestion.error is None:
+                await ingestion.finalize(self.db)
+            else:
+                await ingestion.discard(self.db)
+
+        return self.ingestions
+
+    def _load_near_duplicate_index(self, user_id: int) -> SimHashIndex:
+        index = SimHashIndex(settings.NEAR_DUPLICATE_MAX_DISTANCE)
+        rows = (
+            self.db.query(DocumentChunk.simhash, DocumentChunk.vector_id)
+            .join(Document, Document.id == DocumentChunk.document_id)
+            .filter(Document.user_id == user_id, DocumentChunk.simhash.isnot(None))
+            .all()
+        )
+        for fingerprint, vector_id in rows:
+            index.add(to_unsigned(fingerprint), vector_id)
+        logger.info(f"🔎 Near-duplicate index for user {user_id}: {len(index)} chunks")
+        return index
+
+    # ------------------------------------------------------------------
+    # Stages 1-2: extract + split each document into the chunk queue
+    # ------------------------------------------------------------------
+    async def _produce_stage(self, out: asyncio.Queue) -> None:
+        for ingestion in self.ingestions.values():
+            try:
+                await ingestion.produce(out)
+            except Exception as e:
+                if not self.isolate_failures:
+                    raise
+                logger.error(f"❌ Document {ingestion.document_id} failed in batch: {str(e)}")
+                ingestion.error = e
+        await out.put(_DONE)
+
+    # ------------------------------------------------------------------
+    # Stage 3: embed new chunks in batches
+    # ------------------------------------------------------------------
+    async def _embed_stage(self, inp: asyncio.Queue, out: asyncio.Queue) -> None:
+        new_chunks: List[Dict[str, Any]] = []
+        moved_chunks: List[Dict[str, Any]] = []
+        # document_id -> (chunk_index, page_number) of the last chunk seen;
+        # reused chunks before it are already indexed, new ones go in this batch
+        watermarks: Dict[int, Tuple[int, Optional[int]]] = {}
+        indexed: Set[int] = set()  # documents that already had a batch flushed
+
+        async def embed(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            vectors = await self._embed(chunks)
+            self._report(chunks, 'chunks_embedded')
+            return vectors
+
+        async def flush():
+            nonlocal new_chunks, moved_chunks, watermarks
+            # Embedding runs as a task: up to queue_size batches are in flight while
+            # the upsert stage awaits them in order (indexed prefix stays contiguous)
+            embedding = None
+            if new_chunks:
+                embedding = asyncio.create_task(embed(new_chunks))
+                self._embed_tasks.add(embedding)
+                embedding.add_done_callback(self._embed_tasks.discard)
+            await out.put((embedding, new_chunks, moved_chunks, watermarks))
+            indexed.update(watermarks)
+            new_chunks, moved_chunks, watermarks = [], [], {}
+
+        while True:
+            chunks = await inp.get()
+            if chunks is _DONE:
+                break
+            for chunk in chunks:
+                ingestion = self.ingestions[chunk['document_id']]
+                ingestion.seen_vector_ids.add(chunk['vector_id'])
+                watermarks[chunk['document_id']] = (chunk['chunk_index'], chunk['page_number'])
+                stored = ingestion.existing.get(chunk['vector_id'])
+                if stored is None:
+                    new_chunks.append(chunk)
+                else:
+                    ingestion.stats['reused'] += 1
+                    ingestion.progress.add(chunks_reused=1)
+                    _, chunk_index, page_number = stored
+                    if chunk_index != chunk['chunk_index'] or page_number != chunk['page_number']:
+                        moved_chunks.append(chunk)
+                if len(new_chunks) >= self.batch_size or len(moved_chunks) >= self.batch_size:
+                    await flush()
+                elif len(new_chunks) >= self.first_batch_size and chunk['document_id'] not in indexed:
+                    # Small first batch per document: queryable after seconds, not a full batch
+                    await flush()
+
+        if new_chunks or moved_chunks or watermarks:
+            await flush()
+        await out.put(_DONE)
+
+    @staticmethod
+    def _sketch(chunks: List[Dict[str, Any]]) -> None:
+        """Attach SimHash fingerprints (None for chunks too short to compare)"""
+        for chunk in chunks:
+            fingerprint, words = simhash(chunk['text'])
+            chunk['simhash'] = fingerprint if words >= settings.NEAR_DUPLICATE_MIN_WORDS else None
+
+    async def _embed(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Build vectors for new chunks. A chunk that is a near-duplicate of one
+        the user already has reuses that chunk's embedding (from this batch
+        or fetched from the index) instead of calling the embedding API.
+        """
+        await asyncio.to_thread(self._sketch, chunks)
+
+        to_embed = []
+        for chunk in chunks:
+            chunk['duplicate_of'] = None
+            index = self.near_duplicates.get(self.ingestions[chunk['document_id']].user_id)
+            if index is None or chunk['simhash'] is None:
+                to_embed.append(chunk)
+                continue
+            canonical = index.find(chunk['simhash'])
+            if canonical is None:
+                index.add(chunk['simhash'], chunk['vector_id'])
+                to_embed.append(chunk)
+            else:
+                chunk['duplicate_of'] = canonical
+
+        embedded_ids = {chunk['vector_id'] for chunk in to_embed}
+        missing = list({
+            chunk['duplicate_of'] for chunk in chunks
+            if chunk['duplicate_of'] and chunk['duplicate_of'] not in embedded_ids
+        })
+        values: Dict[str, List[float]] = {}
+        if missing:
+            values = await asyncio.to_thread(self.embedding_service.fetch_vector_values, missing)
+        for chunk in chunks:
+            source = chunk['duplicate_of']
+            if source and source not in embedded_ids and source not in values:
+                # Source vector is gone (or not upserted yet): embed normally
+                chunk['duplicate_of'] = None
+                to_embed.append(chunk)
+
+        if to_embed:
+            embeddings = await self.embedding_service.create_embeddings_batch(
+                [chunk['text'] for chunk in to_embed]
+            )
+            values.update(zip((chunk['vector_id'] for chunk in to_embed), embeddings))
+
+        for chunk in chunks:
+            if chunk['duplicate_of']:
+                self.ingestions[chunk['document_id']].stats['near_duplicates'] += 1
+        if len(to_embed) < len(chunks):
+            logger.info(f"♻️ Reused embeddings for {len(chunks) - len(to_embed)}/{len(chunks)} near-duplicate chunks")
+
+        embeddings = [values[chunk['duplicate_of'] or chunk['vector_id']] for chunk in chunks]
+        return self.embedding_service.build_vectors(None, chunks, embeddings)
+
+    # ------------------------------------------------------------------
+    # Stage 4: upsert vectors and record fingerprints
+    # ------------------------------------------------------------------
+    async def _upsert_stage(self, inp: asyncio.Queue) -> None:
+        # Vector writes of consecutive batches overlap (up to upsert_concurrency);
+        # rows are committed and watermarks advanced strictly in order
+        in_flight: Deque[Tuple[asyncio.Task, tuple]] = deque()
+        try:
+            while True:
+                item = await inp.get()
+                if item is _DONE:
+                    break
+                in_flight.append((asyncio.create_task(self._write_vectors(item)), item))
+                if len(in_flight) >= self.upsert_concurrency:
+                    await self._commit_batch(*in_flight.popleft())
+            while in_flight:
+                await self._commit_batch(*in_flight.popleft())
+        finally:
+            for task, _ in in_flight:
+                task.cancel()
+
+    async def _write_vectors(self, item: tuple) -> None:
+        embedding, new_chunks, moved_chunks, watermarks = item
+        vectors = await embedding if embedding else []
+
+        if vectors:
+            await self.embedding_service.upsert_vectors_async(vectors)
+
+        if moved_chunks:
+            # One batched call: a page inserted near the front moves every later chunk
+            await asyncio.to_thread(self.embedding_service.update_chunk_metadata_many, {
+                chunk['vector_id']: {'chunk_index': chunk['chunk_index'], 'page_number': chunk['page_number']}
+                for chunk in moved_chunks
+            })
+
+    async def _commit_batch(self, write: asyncio.Task, item: tuple) -> None:
+        await write
+        embedding, new_chunks, moved_chunks, watermarks = item
+
+        if moved_chunks:
+            self.db.bulk_update_mappings(DocumentChunk, [
+                {
+                    'id': self.ingestions[chunk['document_id']].existing[chunk['vector_id']][0],
+                    'chunk_index': chunk['chunk_index'],
+                    'page_number': chunk['page_number']
+                }
+                for chunk in moved_chunks
+            ])
+
+        self.db.add_all([
+            DocumentChunk(
+                document_id=chunk['document_id'],
+                chunk_index=chunk['chunk_index'],
+                page_number=chunk['page_number'],
+                content_hash=chunk['content_hash'],
+                vector_id=chunk['vector_id'],
+                simhash=to_signed(chunk['simhash']) if chunk['simhash'] is not None else None,
+                duplicate_of=chunk['duplicate_of']
+            )
+            for chunk in new_chunks
+        ])
+        self.db.commit()
+        for chunk in new_chunks:
+            self.ingestions[chunk['document_id']].stats['embedded'] += 1
+        self._report(new_chunks, 'vectors_upserted')
+        # Committed and upserted: the prefix through the watermark is searchable
+        for document_id, (chunk_index, page_number) in watermarks.items():
+            self.ingestions[document_id].mark_indexed(chunk_index, page_number)
+
+    def _report(self, chunks: List[Dict[str, Any]], counter: str) -> None:
+        """Add per-document counts of a mixed batch to each document's progress"""
+        for document_id, count in Counter(chunk['document_id'] for chunk in chunks).items():
+            self.ingestions[document_id].progress.add(**{counter: count})
@@ -0,0 +1,125 @@
+# app/services/ingestion_progress.py
+
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Any, Dict, Optional
+import time
+import logging
+from ..config import settings
+from ..models.document import Document
+from ..utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('completed', 'failed')
+
+TIME_TO_QUERYABLE = Histogram(
+    "docmentor_time_to_queryable_seconds",
+    "Seconds from upload until the first chunks of a document are searchable",
+    buckets=(1, 2, 5, 10, 20, 30, 60, 120, 300, 600, 1800),
+)
+
+class ProgressReporter:
+    """
+    Records per-stage ingestion progress in document.metadata_['progress'].
+
+    Counters are kept in memory and written at most once per
+    INGEST_PROGRESS_INTERVAL_SECONDS, so a large document does not turn
+    into one UPDATE per page or per batch.
+    """
+
+    def __init__(self, db: Session, document_id: int, interval: Optional[float] = None):
+        self.db = db
+        self.document_id = document_id
+        self.interval = settings.INGEST_PROGRESS_INTERVAL_SECONDS if interval is None else interval
+        self.progress: Dict[str, Any] = {
+            'stage': 'pending',
+            'pages_extracted': 0,
+            'chunks': 0,
+            'chunks_embedded': 0,
+            'chunks_reused': 0,
+            'vectors_upserted': 0,
+            # Indexed prefix: chunks [0, indexed_chunks) are searchable
+            'indexed_chunks': 0,
+            'indexed_through_page': None,
+        }
+        self._last_write = 0.0
+
+    def add(self, **counters: int) -> None:
+        """Increment counters; written out if the interval has elapsed"""
+        for name, value in counters.items():
+            self.progress[name] = self.progress.get(name, 0) + value
+        if time.monotonic() - self._last_write >= self.interval:
+            self.flush()
+
+    def set_indexed(self, chunks: int, through_page: Optional[int]) -> None:
+        """Move the indexed watermark; the first one is written at once (document becomes queryable)"""
+        first = not self.progress['indexed_chunks']
+        self.progress['indexed_chunks'] = chunks
+        self.progress['indexed_through_page'] = through_page
+        if first or time.monotonic() - self._last_write >= self.interval:
+            self.flush()
+
+    def flush(self, stage: Optional[str] = None) -> None:
+        """Write current progress to the document (commits the session)"""
+        if stage:
+            self.progress['stage'] = stage
+        self._last_write = time.monotonic()
+        try:
+            document = self.db.query(Document).filter(Document.id == self.document_id).first()
+            if not document:
+                return
+            document.metadata_ = {
+                **(document.metadata_ or {}),
+                'progress': {**self.progress, 'updated_at': datetime.utcnow().isoformat()}
+            }
+            self.db.commit()
+        except Exception as e:
+            # Progress is best-effort; never fail ingestion because of it
+            logger.warning(f"⚠️ Could not record progress of document {self.document_id}: {str(e)}")
+            self.db.rollback()
+
+
+def progress_snapshot(document: Document) -> Dict[str, Any]:
+    """Progress view of a document, as served by the progress endpoints"""
+    metadata = document.metadata_ or {}
+    return {
+        'document_id': document.id,
+        'processing_status': metadata.get('processing_status'),
+        'processed': document.processed,
+        'progress': metadata.get('progress'),
+        'error': metadata.get('error'),
+    }
+
+
+def is_finished(snapshot: Dict[str, Any]) -> bool:
+    """True once no more progress will be reported"""
+    status = snapshot['processing_status']
+    # Documents ingested before status tracking only have `processed`
+    return status in TERMINAL_STATUSES or (status is None and snapshot['processed'])
+
+
+def index_coverage(document: Document) -> Optional[Dict[str, Any]]:
+    """
+    Searchable part of a document: all of it once processed, otherwise the
+    prefix indexed so far by a running ingestion. None if nothing is
+    searchable yet, or if the ingestion is not running (a failed or
+    requeued one keeps its stale progress).
+    """
+    metadata = document.metadata_ or {}
+    if document.processed:
+        return {
+            'document_id': document.id,
+            'complete': True,
+            'indexed_chunks': metadata.get('total_chunks'),
+            'indexed_through_page': None,
+        }
+    progress = metadata.get('progress') or {}
+    if metadata.get('processing_status') != 'processing' or not progress.get('indexed_chunks'):
+        return None
+    return {
+        'document_id': document.id,
+        'complete': False,
+        'indexed_chunks': progress['indexed_chunks'],
+        'indexed_through_page': progress.get('indexed_through_page'),
+    }
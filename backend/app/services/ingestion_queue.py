@@ -0,0 +1,340 @@
+# app/services/ingestion_queue.py
+
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import List, Optional
+import logging
+from ..config import settings
+from ..models.document import Document
+from ..models.ingestion_job import IngestionJob, JobKind, JobStatus
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = (JobStatus.QUEUED, JobStatus.RUNNING)
+
+def _set_processing_status(document: Optional[Document], status: str, **extra) -> None:
+    """Merge processing status into document metadata"""
+    if not document:
+        return
+    document.metadata_ = {
+        **(document.metadata_ or {}),
+        'processing_status': status,
+        **extra
+    }
+
+def is_completed(document: Document) -> bool:
+    return (document.metadata_ or {}).get('processing_status') == 'completed'
+
+def job_document_ids(job: IngestionJob) -> List[int]:
+    """Documents covered by a job"""
+    if job.kind == JobKind.BATCH:
+        return list((job.payload or {}).get('document_ids', []))
+    return [job.document_id] if job.document_id else []
+
+def _job_documents(db: Session, job: IngestionJob) -> List[Document]:
+    document_ids = job_document_ids(job)
+    if not document_ids:
+        return []
+    return db.query(Document).filter(Document.id.in_(document_ids)).all()
+
+class IngestionQueue:
+    """
+    Database-backed ingestion job queue.
+
+    Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+    worker processes can poll the same table. A running job holds a lease
+    (locked_at) that the worker refreshes; jobs whose lease expires are
+    requeued by recover().
+    """
+
+    @staticmethod
+    def enqueue(db: Session, document_id: int, commit: bool = True) -> IngestionJob:
+        """
+        Queue a document for ingestion. A queued job already covers it (it
+        reads the file when claimed); a running job may be working on stale
+        content, so it is flagged to run again once it finishes.
+        """
+        existing = db.query(IngestionJob).filter(
+            IngestionJob.document_id == document_id,
+            IngestionJob.status.in_(ACTIVE_STATUSES)
+        ).with_for_update().first()
+        if existing:
+            if existing.status == JobStatus.RUNNING and not existing.rerun_requested:
+                existing.rerun_requested = True
+                logger.info(f"🔁 Job {existing.id} (doc {document_id}) will run again when it finishes")
+            if commit:
+                db.commit()
+                db.refresh(existing)
+            return existing
+
+        job = IngestionJob(
+            document_id=document_id,
+            status=JobStatus.QUEUED,
+            max_attempts=settings.INGEST_MAX_ATTEMPTS,
+            run_after=datetime.utcnow()
+        )
+        db.add(job)
+
+        document = db.query(Document).filter(Document.id == document_id).first()
+        _set_processing_status(document, 'queued')
+
+        if commit:
+            db.commit()
+            db.refresh(job)
+        return job
+
+    @staticmethod
+    def enqueue_batch(db: Session, document_ids: List[int], commit: bool = True) -> IngestionJob:
+        """Queue several documents as one job (embedding batches shared across files)"""
+        job = IngestionJob(
+            kind=JobKind.BATCH,
+            payload={'document_ids': list(document_ids)},
+            status=JobStatus.QUEUED,
+            max_attempts=settings.INGEST_MAX_ATTEMPTS,
+            run_after=datetime.utcnow()
+        )
+        db.add(job)
+
+        for document in db.query(Document).filter(Document.id.in_(document_ids)).all():
+            _set_processing_status(document, 'queued')
+
+        if commit:
+            db.commit()
+            db.refresh(job)
+        return job
+
+    @staticmethod
+    def enqueue_vector_deletion(
+        db: Session,
+        document_id: int,
+        vector_ids: List[str],
+        legacy_chunks: int = 0,
+        commit: bool = True
+    ) -> IngestionJob:
+        """
+        Queue deletion of a deleted document's vectors. The job keeps the IDs
+        in its payload (no document link: the row is gone). legacy_chunks
+        covers documents indexed with positional doc_{id}_chunk_{n} IDs.
+        """
+        job = IngestionJob(
+            kind=JobKind.DELETE_VECTORS,
+            payload={
+                'document_id': document_id,
+                'vector_ids': list(vector_ids),
+                'legacy_chunks': legacy_chunks
+            },
+            status=JobStatus.QUEUED,
+            max_attempts=settings.INGEST_MAX_ATTEMPTS,
+            run_after=datetime.utcnow()
+        )
+        db.add(job)
+        if commit:
+            db.commit()
+            db.refresh(job)
+        return job
+
+    @staticmethod
+    def enqueue_vector_gc(db: Session) -> Optional[IngestionJob]:
+        """
+        Queue an orphan-vector GC pass, unless one is active or one was
+        created within VECTOR_GC_INTERVAL_SECONDS (any worker may call this).
+        """
+        since = datetime.utcnow() - timedelta(seconds=settings.VECTOR_GC_INTERVAL_SECONDS)
+        recent = db.query(IngestionJob.id).filter(
+            IngestionJob.kind == JobKind.VECTOR_GC,
+            (IngestionJob.status.in_(ACTIVE_STATUSES)) | (IngestionJob.created_at >= since)
+        ).first()
+        if recent:
+            return None
+
+        job = IngestionJob(
+            kind=JobKind.VECTOR_GC,
+            status=JobStatus.QUEUED,
+            max_attempts=1,  # the next scheduled pass is the retry
+            run_after=datetime.utcnow()
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def claim_next(db: Session, worker_id: str) -> Optional[IngestionJob]:
+        """Lock and return the next due job, or None"""
+        now = datetime.utcnow()
+        job = (
+            db.query(IngestionJob)
+            .filter(
+                IngestionJob.status == JobStatus.QUEUED,
+                IngestionJob.run_after <= now
+            )
+            .order_by(IngestionJob.run_after, IngestionJob.id)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if not job:
+            db.rollback()
+            return None
+
+        job.status = JobStatus.RUNNING
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.locked_at = now
+        for document in _job_documents(db, job):
+            if job.kind == JobKind.BATCH and is_completed(document):
+                continue  # finished in an earlier attempt of this batch
+            _set_processing_status(document, 'processing')
+
+        db.commit()
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def heartbeat(db: Session, job_id: int, worker_id: str) -> None:
+        """Extend the lease of a running job"""
+        db.query(IngestionJob).filter(
+            IngestionJob.id == job_id,
+            IngestionJob.locked_by == worker_id,
+            IngestionJob.status == JobStatus.RUNNING
+        ).update({IngestionJob.locked_at: datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def _requeue_rerun(db: Session, job: IngestionJob) -> None:
+        """Run a job again from scratch: its document changed while it ran"""
+        job.status = JobStatus.QUEUED
+        job.rerun_requested = False
+        job.attempts = 0
+        job.run_after = datetime.utcnow()
+        job.locked_by = None
+        job.locked_at = None
+        for document in _job_documents(db, job):
+            _set_processing_status(document, 'queued')
+        db.commit()
+        logger.info(f"🔁 Job {job.id} (docs {job_document_ids(job)}) requeued: document changed during ingestion")
+
+    @staticmethod
+    def complete(db: Session, job_id: int) -> None:
+        # Locked: enqueue() may be flagging a rerun at the same moment
+        job = db.query(IngestionJob).filter(IngestionJob.id == job_id).with_for_update().first()
+        if not job:
+            return
+        if job.rerun_requested:
+            IngestionQueue._requeue_rerun(db, job)
+            return
+        job.status = JobStatus.COMPLETED
+        job.locked_by = None
+        job.locked_at = None
+        job.last_error = None
+        db.commit()
+
+    @staticmethod
+    def fail(db: Session, job_id: int, error: str, retry: bool = True) -> bool:
+        """
+        Record a failed attempt. Requeues with exponential backoff while
+        attempts remain (unless retry is False, e.g. the extraction sandbox
+        killed the document). Returns True if the job will be retried.
+        """
+        job = db.query(IngestionJob).filter(IngestionJob.id == job_id).with_for_update().first()
+        if not job:
+            return False
+
+        if job.rerun_requested:
+            # Likely failed on the replaced file: the new content gets a fresh run
+            job.last_error = error
+            IngestionQueue._requeue_rerun(db, job)
+            return True
+
+        job.last_error = error
+        job.locked_by = None
+        job.locked_at = None
+
+        if retry and job.attempts < job.max_attempts:
+            delay = min(
+                settings.INGEST_RETRY_BASE_SECONDS * (2 ** (job.attempts - 1)),
+                settings.INGEST_RETRY_MAX_SECONDS
+            )
+            job.status = JobStatus.QUEUED
+            job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+            for document in _job_documents(db, job):
+                if is_completed(document):
+                    continue  # finished in an earlier attempt of a batch
+                _set_processing_status(
+                    document, 'queued',
+                    retry_at=job.run_after.isoformat(),
+                    error=error
+                )
+            db.commit()
+            logger.warning(f"🔁 Job {job.id} (docs {job_document_ids(job)}) retry {job.attempts}/{job.max_attempts} in {delay}s")
+            return True
+
+        job.status = JobStatus.FAILED
+        for document in _job_documents(db, job):
+            if is_completed(document):
+                continue
+            _set_processing_status(document, 'failed', error=error)
+            document.processed = False
+        db.commit()
+        logger.error(f"❌ Job {job.id} (docs {job_document_ids(job)}) failed after {job.attempts} attempts")
+        return False
+
+    @staticmethod
+    def recover(db: Session) -> int:
+        """
+        Crash recovery:
+        - requeue running jobs whose lease expired (worker died mid-document)
+        - enqueue unprocessed documents that have no job at all
+        Returns number of jobs requeued or created.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.INGEST_JOB_TIMEOUT_SECONDS)
+        recovered = 0
+
+        stale_jobs = (
+            db.query(IngestionJob)
+            .filter(
+                IngestionJob.status == JobStatus.RUNNING,
+                IngestionJob.locked_at < cutoff
+            )
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        for job in stale_jobs:
+            logger.warning(f"♻️ Requeueing stale job {job.id} (docs {job_document_ids(job)}, worker {job.locked_by})")
+            job.status = JobStatus.QUEUED
+            job.rerun_requested = False  # the next run reads the current file anyway
+            job.locked_by = None
+            job.locked_at = None
+            job.run_after = datetime.utcnow()
+            for document in _job_documents(db, job):
+                if not is_completed(document):
+                    _set_processing_status(document, 'queued')
+            recovered += 1
+
+        # Documents covered by active batch jobs have no document_id link
+        batched_ids = set()
+        for job in db.query(IngestionJob).filter(
+            IngestionJob.kind == JobKind.BATCH,
+            IngestionJob.status.in_(ACTIVE_STATUSES)
+        ).all():
+            batched_ids.update(job_document_ids(job))
+
+        orphans = (
+            db.query(Document)
+            .outerjoin(IngestionJob, IngestionJob.document_id == Document.id)
+            .filter(
+                Document.processed == False,
+                IngestionJob.id.is_(None)
+            )
+            .all()
+        )
+        for document in orphans:
+            if document.id in batched_ids:
+                continue
+            if (document.metadata_ or {}).get('processing_status') == 'failed':
+                continue
+            logger.info(f"♻️ Enqueueing unprocessed document {document.id}")
+            IngestionQueue.enqueue(db, document.id, commit=False)
+            recovered += 1
+
+        db.commit()
+        return recovered
@@ -7,6 +7,7 @@ from ..models.document import Document, Query as QueryModel
 from ..models.user import User
 from .embedding_service_gemini import EmbeddingServiceGemini
 from .gemini_service import GeminiService
+from .ingestion_progress import index_coverage
 from ..utils.text_normalizer import normalize_text
 
 logger = logging.getLogger(__name__)
@@ -37,13 +38,20 @@ class RAGServiceGemini:
             logger.info(f"🔍 Processing query from user {user.id}: '{query_text}'")
 
             # -------------------------------------------------------
-            # 1️⃣ Validate available & processed documents
+            # 1️⃣ Validate available documents (processed, or partly
+            #    indexed while ingestion is still running)
             # -------------------------------------------------------
-            documents = db.query(Document).filter(
+            candidates = db.query(Document).filter(
                 Document.id.in_(document_ids),
-                Document.user_id == user.id,
-                Document.processed == True
+                Document.user_id == user.id
             ).all()
+            coverage = {}
+            for doc in candidates:
+                doc_coverage = index_coverage(doc)
+                if doc_coverage is not None:
+                    coverage[doc.id] = doc_coverage
+            documents = [doc for doc in candidates if doc.id in coverage]
+            partial = [c for c in coverage.values() if not c['complete']]
 
             if not documents:
                 return {
@@ -52,6 +60,8 @@ class RAGServiceGemini:
                     'confidence_score': 0.0,
                     'processing_time_ms': int((time.time() - start_time) * 1000)
                 }
+            if partial:
+                logger.info(f"⏳ Querying partially indexed documents: {partial}")
 
             valid_doc_ids = [doc.id for doc in documents]
             doc_map = {doc.id: doc for doc in documents}
@@ -63,7 +73,8 @@ class RAGServiceGemini:
             matches = await self.embedding_service.search_similar_chunks(
                 query=query_text,
                 document_ids=valid_doc_ids,
-                top_k=max_results
+                top_k=max_results,
+                user_id=user.id
             )
 
             if not matches or matches[0]['score'] < 0.3:
@@ -71,7 +82,9 @@ class RAGServiceGemini:
                     'answer': self._generate_no_result_response(query_text),
                     'sources': [],
                     'confidence_score': 0.0,
-                    'processing_time_ms': int((time.time() - start_time) * 1000)
+                    'processing_time_ms': int((time.time() - start_time) * 1000),
+                    'partial_coverage': bool(partial),
+                    'coverage': partial
                 }
 
             # -------------------------------------------------------
@@ -126,7 +139,9 @@ class RAGServiceGemini:
                 'answer': answer,
                 'sources': sources,
                 'confidence_score': round(confidence_score, 2),
-                'processing_time_ms': processing_time
+                'processing_time_ms': processing_time,
+                'partial_coverage': bool(partial),
+                'coverage': partial
             }
 
         except Exception as e:
@@ -0,0 +1,219 @@
+# app/services/text_store.py
+
+import hashlib
+import json
+import mmap
+import os
+import uuid
+import zlib
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+import logging
+from ..config import settings
+from ..models.document import Document
+
+try:
+    import fcntl
+except ImportError:  # Windows: single writer process assumed
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+@contextmanager
+def _locked(lock_path: str, exclusive: bool):
+    """Writers publish an entry (.pages + .idx) under LOCK_EX, readers open it under LOCK_SH"""
+    with open(lock_path, "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+class TextStoreWriter:
+    """
+    Appends pages to a text store entry one at a time.
+    The entry becomes visible only after close() writes the index.
+
+    Each writer has its own temp files: entries are keyed by file hash, so
+    two users' ingestions of the same file can write one key at once.
+    """
+
+    def __init__(self, data_path: str, index_path: str, lock_path: str, page_markers: bool):
+        self.data_path = data_path
+        self.index_path = index_path
+        self.lock_path = lock_path
+        self.page_markers = page_markers
+        suffix = f"part.{os.getpid()}.{uuid.uuid4().hex}"
+        self._data_part = f"{data_path}.{suffix}"
+        self._index_part = f"{index_path}.{suffix}"
+        self._file = open(self._data_part, "wb")
+        self._pages: List[List[int]] = []  # [offset, compressed_length, characters]
+        self._offset = 0
+        self._digest = hashlib.sha256()
+
+    def append_page(self, page_text: str) -> None:
+        """Compress and append a single page"""
+        blob = zlib.compress(page_text.encode("utf-8"), settings.TEXT_STORE_COMPRESSION_LEVEL)
+        self._file.write(blob)
+        self._digest.update(blob)
+        self._pages.append([self._offset, len(blob), len(page_text)])
+        self._offset += len(blob)
+
+    def close(self) -> None:
+        """Flush data file and publish it with the page offset index"""
+        self._file.close()
+        index = {
+            "version": 1,
+            "page_markers": self.page_markers,
+            "pages": self._pages,
+            "total_characters": sum(page[2] for page in self._pages),
+            "sha256": self._digest.hexdigest(),
+        }
+        with open(self._index_part, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+
+        with _locked(self.lock_path, exclusive=True):
+            if self._unchanged(index):
+                # Re-ingestion of a stored file: keep the entry readers may have open
+                self._remove_parts()
+                return
+            os.replace(self._data_part, self.data_path)
+            os.replace(self._index_part, self.index_path)
+
+    def _unchanged(self, index: dict) -> bool:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                current = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return False
+        return (
+            current.get("sha256") == index["sha256"]
+            and current.get("page_markers", True) == index["page_markers"]
+            and os.path.exists(self.data_path)
+        )
+
+    def _remove_parts(self) -> None:
+        for path in (self._data_part, self._index_part):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def abort(self) -> None:
+        """Discard a partially written entry"""
+        self._file.close()
+        self._remove_parts()
+
+
+class TextStore:
+    """
+    Persisted extracted text, keyed by file hash (or document id).
+
+    Each entry is two files:
+    - {key}.pages: zlib-compressed pages, concatenated
+    - {key}.idx:   JSON index with [offset, length, characters] per page
+
+    Single pages are read via mmap + slice, so nothing is re-parsed and
+    only the requested page is decompressed. Readers load the index and
+    open the data file under a shared lock, so a concurrent rewrite can't
+    pair new data with old offsets.
+    """
+
+    def __init__(self, base_dir: Optional[str] = None):
+        self.base_dir = base_dir or settings.TEXT_STORE_DIR
+        os.makedirs(self.base_dir, exist_ok=True)
+        self._lock_path = os.path.join(self.base_dir, ".lock")
+
+    @staticmethod
+    def key_for(document: Document) -> str:
+        """Content-addressed key, shared by identical uploads"""
+        return document.file_hash or f"doc_{document.id}"
+
+    def _paths(self, key: str):
+        base = os.path.join(self.base_dir, key)
+        return f"{base}.pages", f"{base}.idx"
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._paths(key)[1])
+
+    def writer(self, key: str, page_markers: bool = True) -> TextStoreWriter:
+        data_path, index_path = self._paths(key)
+        return TextStoreWriter(data_path, index_path, self._lock_path, page_markers)
+
+    def save(self, key: str, pages: List[str], page_markers: bool = True) -> None:
+        """Persist all pages of a document"""
+        writer = self.writer(key, page_markers)
+        try:
+            for page_text in pages:
+                writer.append_page(page_text)
+        except Exception:
+            writer.abort()
+            raise
+        writer.close()
+        logger.info(f"💾 Stored extracted text '{key}' ({len(pages)} pages)")
+
+    def _load_index(self, key: str) -> dict:
+        _, index_path = self._paths(key)
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"No extracted text stored for '{key}'")
+        with open(index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _open(self, key: str):
+        """Index and open data file of one published entry"""
+        data_path, _ = self._paths(key)
+        with _locked(self._lock_path, exclusive=False):
+            index = self._load_index(key)
+            return index, open(data_path, "rb")
+
+    def page_count(self, key: str) -> int:
+        return len(self._load_index(key)["pages"])
+
+    def read_page(self, key: str, page_number: int) -> str:
+        """Read a single page (1-based)"""
+        index, f = self._open(key)
+        with f:
+            pages = index["pages"]
+            if page_number < 1 or page_number > len(pages):
+                raise IndexError(f"Page {page_number} out of range (1-{len(pages)})")
+
+            offset, length, _ = pages[page_number - 1]
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return zlib.decompress(mm[offset:offset + length]).decode("utf-8")
+
+    def iter_pages(self, key: str) -> Iterator[str]:
+        """Yield pages in order, decompressing one at a time"""
+        index, f = self._open(key)
+        with f:
+            if not index["pages"]:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for offset, length, _ in index["pages"]:
+                    yield zlib.decompress(mm[offset:offset + length]).decode("utf-8")
+
+    def read_text(self, key: str) -> str:
+        """Read the whole text, formatted like the original extraction"""
+        index, f = self._open(key)
+        with f:
+            pages = []
+            if index["pages"]:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    pages = [
+                        zlib.decompress(mm[offset:offset + length]).decode("utf-8")
+                        for offset, length, _ in index["pages"]
+                    ]
+        return join_pages(pages, index.get("page_markers", True))
+
+    def delete(self, key: str) -> None:
+        for path in self._paths(key):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def join_pages(pages: List[str], page_markers: bool = True) -> str:
+    """Join per-page text, prefixing each non-empty PDF page with [Page N]"""
+    if not page_markers:
+        # DOCX/TXT "pages" are contiguous segments of the same text
+        return "".join(pages).strip()
+    return "".join(
+        f"\n[Page {page_num + 1}]\n{page_text}"
+        for page_num, page_text in enumerate(pages)
+        if page_text
+    ).strip()
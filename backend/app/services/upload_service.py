@@ -0,0 +1,318 @@
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
+import os
+import secrets
+import logging
+
+from ..models.document import Document
+from ..models.upload_session import UploadSession, UploadStatus
+from ..models.user import User
+from .document_service import DocumentService
+from ..config import settings
+from ..utils.helpers import (
+    validate_file_type,
+    validate_file_size,
+    generate_unique_filename,
+    ensure_upload_dir,
+    calculate_file_hash,
+    parse_content_range
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: part files are not locked
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+def _partial_dir() -> str:
+    path = os.path.join(ensure_upload_dir(), "partial")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _remove(path: str) -> None:
+    if path and os.path.exists(path):
+        os.remove(path)
+
+def _lock_part(part, exclusive: bool) -> bool:
+    """
+    Non-blocking lock on an open part file: shared for range writers
+    (retries may overlap a stalled request), exclusive for complete.
+    """
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(part, (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+class UploadSessionService:
+    """
+    Resumable uploads: init -> PUT byte ranges -> complete.
+
+    Ranges are written at their offset into a temp file under
+    UPLOAD_DIR/partial; received_bytes is the contiguous prefix on disk,
+    so a client that lost its connection asks for the session and resumes
+    from there. Even an interrupted PUT keeps the bytes it delivered.
+    The session row is only locked briefly (validate, then advance
+    received_bytes): no lock or DB connection is held while a body
+    streams. Writers share a file lock on the part file that complete
+    takes exclusively.
+    On complete the file hash is verified and the file goes through the
+    same Document creation (dedup) and ingestion path as a normal upload.
+    """
+
+    @staticmethod
+    def create_session(
+        db: Session,
+        user: User,
+        filename: str,
+        size: int,
+        title: Optional[str] = None,
+        content_type: Optional[str] = None,
+        sha256: Optional[str] = None
+    ) -> UploadSession:
+        validate_file_type(filename)
+        validate_file_size(size)
+
+        if sha256:
+            sha256 = sha256.lower()
+            # Known hash: skip the transfer entirely for a file the user already has
+            duplicate = db.query(Document.id).filter(
+                Document.user_id == user.id,
+                Document.file_hash == sha256
+            ).first()
+            if duplicate:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="This file has already been uploaded"
+                )
+
+        upload_id = secrets.token_hex(16)
+        temp_path = os.path.join(_partial_dir(), f"{upload_id}.part")
+        open(temp_path, "wb").close()
+
+        session = UploadSession(
+            id=upload_id,
+            user_id=user.id,
+            filename=filename,
+            title=title,
+            content_type=content_type,
+            total_size=size,
+            sha256=sha256,
+            received_bytes=0,
+            temp_path=temp_path,
+            status=UploadStatus.ACTIVE,
+            expires_at=datetime.utcnow() + timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS)
+        )
+        db.add(session)
+        db.commit()
+        db.refresh(session)
+
+        logger.info(f"📤 Resumable upload {upload_id} started by user {user.id}: {filename} ({size} bytes)")
+        return session
+
+    @staticmethod
+    def get_session(db: Session, upload_id: str, user: User, lock: bool = False) -> UploadSession:
+        query = db.query(UploadSession).filter(
+            UploadSession.id == upload_id,
+            UploadSession.user_id == user.id
+        )
+        if lock:
+            query = query.with_for_update()
+        session = query.first()
+
+        if not session:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload not found"
+            )
+        return session
+
+    @staticmethod
+    def _get_active(db: Session, upload_id: str, user: User) -> UploadSession:
+        session = UploadSessionService.get_session(db, upload_id, user, lock=True)
+        if session.status != UploadStatus.ACTIVE or session.expires_at < datetime.utcnow():
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail=f"Upload is {session.status if session.status != UploadStatus.ACTIVE else 'expired'}"
+            )
+        return session
+
+    @staticmethod
+    async def write_range(
+        db: Session,
+        upload_id: str,
+        user: User,
+        content_range: str,
+        body: AsyncIterator[bytes]
+    ) -> UploadSession:
+        """
+        Write one Content-Range of the file. The range may start anywhere in
+        the received prefix (re-sent bytes are overwritten), but not past it.
+        """
+        start, end, total = parse_content_range(content_range)
+        session = UploadSessionService._get_active(db, upload_id, user)
+
+        if total is not None and total != session.total_size:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Content-Range total {total} does not match the upload size {session.total_size}"
+            )
+        if end > session.total_size or start > session.received_bytes:
+            received = session.received_bytes
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                detail=f"Range must start at or before byte {received} and end within the file",
+                headers={"Range": f"bytes=0-{received - 1}"} if received else None
+            )
+
+        temp_path = session.temp_path
+        # Validated: end the transaction so the row lock and the pooled
+        # connection are not held while the body streams
+        db.commit()
+
+        written = 0
+        try:
+            with open(temp_path, "r+b") as buffer:
+                if not _lock_part(buffer, exclusive=False):
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="Upload is being completed"
+                    )
+                # Opened just before complete renamed it: the path is gone or another file
+                if not os.path.samestat(os.fstat(buffer.fileno()), os.stat(temp_path)):
+                    raise FileNotFoundError(temp_path)
+                buffer.seek(start)
+                async for block in body:
+                    if not block:
+                        continue
+                    if written + len(block) > end - start:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Request body is longer than its Content-Range"
+                        )
+                    await run_in_threadpool(buffer.write, block)
+                    written += len(block)
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Upload is no longer active"
+            )
+        finally:
+            # Bytes that reached the disk count, even if the client went away mid-range
+            if written:
+                UploadSessionService._advance(db, upload_id, start + written)
+
+        if written != end - start:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Request body has {written} bytes, Content-Range announced {end - start}"
+            )
+
+        return UploadSessionService.get_session(db, upload_id, user)
+
+    @staticmethod
+    def _advance(db: Session, upload_id: str, received: int) -> None:
+        """Extend the contiguous prefix (short transaction on the locked row)"""
+        session = db.query(UploadSession).filter(UploadSession.id == upload_id).with_for_update().first()
+        if session and session.status == UploadStatus.ACTIVE:
+            # [start, received) was written and start was within the prefix
+            session.received_bytes = max(session.received_bytes, received)
+            session.expires_at = datetime.utcnow() + timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS)
+        db.commit()
+
+    @staticmethod
+    async def complete(
+        db: Session,
+        upload_id: str,
+        user: User,
+        sha256: Optional[str] = None
+    ) -> Document:
+        """Verify size and hash, then create the Document from the assembled file"""
+        session = UploadSessionService._get_active(db, upload_id, user)
+
+        if session.received_bytes != session.total_size:
+            received, total = session.received_bytes, session.total_size
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Upload incomplete: received {received} of {total} bytes"
+            )
+
+        with open(session.temp_path, "rb") as part:
+            # Exclusive: no PUT (e.g. a stalled duplicate of a range) may still be writing
+            if not _lock_part(part, exclusive=True):
+                db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A range of this upload is still being written"
+                )
+
+            # Ranges are written separately, so the hash is computed over the final file
+            await run_in_threadpool(os.truncate, session.temp_path, session.total_size)
+            file_hash = await run_in_threadpool(calculate_file_hash, session.temp_path)
+            expected = [h.lower() for h in (sha256, session.sha256) if h]
+            if any(h != file_hash for h in expected):
+                UploadSessionService._discard(session, UploadStatus.ABORTED)
+                db.commit()
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Checksum mismatch: the assembled file does not match the expected SHA256, upload it again"
+                )
+
+            file_path = os.path.join(ensure_upload_dir(), generate_unique_filename(user.id, session.filename))
+            os.replace(session.temp_path, file_path)
+
+        try:
+            document = DocumentService.create_document(
+                db, user, session.filename, session.content_type,
+                file_path, session.total_size, file_hash, session.title,
+                commit=False
+            )
+        except HTTPException:
+            # Duplicate: create_document already removed the file
+            session.status = UploadStatus.ABORTED
+            db.commit()
+            raise
+
+        # Same transaction as the document: the session lock is held until both exist
+        session.status = UploadStatus.COMPLETED
+        session.document_id = document.id
+        db.commit()
+        db.refresh(document)
+
+        logger.info(f"✅ Resumable upload {upload_id} assembled into document {document.id}")
+        return document
+
+    @staticmethod
+    def abort(db: Session, upload_id: str, user: User) -> None:
+        session = UploadSessionService.get_session(db, upload_id, user, lock=True)
+        if session.status == UploadStatus.ACTIVE:
+            UploadSessionService._discard(session, UploadStatus.ABORTED)
+        db.commit()
+
+    @staticmethod
+    def purge_expired(db: Session) -> int:
+        """Delete expired sessions and their temp files. Returns the number purged."""
+        expired = db.query(UploadSession).filter(UploadSession.expires_at < datetime.utcnow()).all()
+        for session in expired:
+            try:
+                _remove(session.temp_path)
+            except OSError as e:
+                logger.warning(f"Could not remove partial upload {session.temp_path}: {str(e)}")
+            db.delete(session)
+        db.commit()
+        return len(expired)
+
+    @staticmethod
+    def _discard(session: UploadSession, new_status: str) -> None:
+        _remove(session.temp_path)
+        session.status = new_status
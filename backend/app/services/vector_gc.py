@@ -0,0 +1,101 @@
+# app/services/vector_gc.py
+
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List
+import re
+import logging
+from ..models.document import Document
+from ..models.document_chunk import DocumentChunk
+from ..utils.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+# doc_{id}_{content_hash[:16]}[_{n}] (fingerprinted) or doc_{id}_chunk_{n} (legacy positional)
+_VECTOR_ID = re.compile(r"^doc_(\d+)_(chunk_(\d+)$)?")
+
+IN_FLIGHT_STATUSES = ('queued', 'processing')
+
+VECTORS_DELETED = Counter(
+    "docmentor_vectors_deleted_total",
+    "Vectors removed from the index, by reason (document_deleted, orphan)"
+)
+
+class VectorGarbageCollector:
+    """
+    Removes vectors that no live document chunk refers to:
+    - all vectors of a deleted document (queued by the delete endpoint)
+    - orphans found by a periodic pass over the index: vectors of missing
+      documents, legacy positional IDs past total_chunks (or of documents
+      since re-indexed with fingerprint IDs), and fingerprint IDs without
+      a document_chunks row
+    """
+
+    def __init__(self, embedding_service):
+        self.embedding_service = embedding_service
+
+    def delete_document_vectors(self, payload: Dict[str, Any]) -> int:
+        document_id = payload['document_id']
+        vector_ids = list(payload.get('vector_ids') or [])
+        vector_ids += [f"doc_{document_id}_chunk_{n}" for n in range(payload.get('legacy_chunks') or 0)]
+        if vector_ids:
+            self.embedding_service.delete_vectors(vector_ids)
+            VECTORS_DELETED.inc(len(vector_ids), reason="document_deleted")
+        logger.info(f"🗑️ Deleted {len(vector_ids)} vectors of document {document_id}")
+        return len(vector_ids)
+
+    def collect(self, db: Session) -> Dict[str, int]:
+        """One reconciliation pass over every doc_* vector ID, a page at a time"""
+        stats = {'scanned': 0, 'orphans': 0}
+        for page in self.embedding_service.list_vector_ids(prefix="doc_"):
+            stats['scanned'] += len(page)
+            orphans = self._orphans(db, page)
+            if orphans:
+                self.embedding_service.delete_vectors(orphans)
+                VECTORS_DELETED.inc(len(orphans), reason="orphan")
+                stats['orphans'] += len(orphans)
+        logger.info(f"🧹 Vector GC: {stats['orphans']} orphans deleted out of {stats['scanned']} vectors")
+        return stats
+
+    def _orphans(self, db: Session, vector_ids: List[str]) -> List[str]:
+        parsed = {}
+        for vector_id in vector_ids:
+            match = _VECTOR_ID.match(vector_id)
+            if match:
+                legacy_index = int(match.group(3)) if match.group(3) is not None else None
+                parsed[vector_id] = (int(match.group(1)), legacy_index)
+        if not parsed:
+            return []
+
+        document_ids = {document_id for document_id, _ in parsed.values()}
+        documents = {
+            document.id: document
+            for document in db.query(Document).filter(Document.id.in_(document_ids)).all()
+        }
+        known_ids = {
+            vector_id for (vector_id,) in db.query(DocumentChunk.vector_id).filter(
+                DocumentChunk.document_id.in_(document_ids),
+                DocumentChunk.vector_id.in_(list(parsed))
+            ).all()
+        }
+        fingerprinted = {
+            document_id for (document_id,) in db.query(DocumentChunk.document_id).filter(
+                DocumentChunk.document_id.in_(document_ids)
+            ).distinct().all()
+        }
+
+        orphans = []
+        for vector_id, (document_id, legacy_index) in parsed.items():
+            document = documents.get(document_id)
+            if document is None:
+                orphans.append(vector_id)
+                continue
+            metadata = document.metadata_ or {}
+            if metadata.get('processing_status') in IN_FLIGHT_STATUSES:
+                continue  # vectors are upserted before their rows are committed
+            total_chunks = metadata.get('total_chunks')
+            if legacy_index is None:
+                if vector_id not in known_ids:
+                    orphans.append(vector_id)
+            elif document_id in fingerprinted or (total_chunks is not None and legacy_index >= total_chunks):
+                orphans.append(vector_id)
+        return orphans
@@ -0,0 +1,194 @@
+# app/services/vector_store.py
+
+from typing import List, Dict, Any, Callable, Iterator, Optional
+import threading
+import time
+import logging
+import urllib3
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+class VectorStore:
+    """
+    Where embeddings live. Vectors are dicts {id, values, metadata};
+    metadata carries document_id (used by filters), user_id, chunk_index,
+    page_number and text.
+
+    Implementations:
+    - PineconeVectorStore: the hosted Pinecone index
+    - LocalVectorStore (vector_store_local.py): per-user NumPy matrices on
+      disk, exact search in process, works offline
+    """
+
+    def upsert(self, vectors: List[Dict[str, Any]]) -> int:
+        raise NotImplementedError
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int,
+        document_ids: Optional[List[int]] = None,
+        user_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Best matches first: [{id, score, metadata}]. user_id is the owner
+        of the documents searched (lets the local store read one partition).
+        """
+        raise NotImplementedError
+
+    def fetch(self, vector_ids: List[str]) -> Dict[str, List[float]]:
+        """Stored values by ID (missing IDs are left out)"""
+        raise NotImplementedError
+
+    def delete(self, vector_ids: List[str]) -> int:
+        raise NotImplementedError
+
+    def delete_document(self, document_id: int) -> None:
+        raise NotImplementedError
+
+    def update_metadata(self, vector_id: str, metadata: Dict[str, Any]) -> None:
+        """Merge metadata into an existing vector (values unchanged)"""
+        raise NotImplementedError
+
+    def update_metadata_many(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        """update_metadata for many vectors: {vector_id: metadata}"""
+        for vector_id, metadata in updates.items():
+            self.update_metadata(vector_id, metadata)
+
+    def list_ids(self, prefix: str = "") -> Iterator[List[str]]:
+        """Pages of vector IDs starting with prefix"""
+        raise NotImplementedError
+
+
+def _is_transient(error: Exception) -> bool:
+    """Pinecone errors worth retrying: rate limit, server errors, network"""
+    status = getattr(error, 'status', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(error, (ConnectionError, TimeoutError, urllib3.exceptions.HTTPError))
+
+
+class PineconeVectorStore(VectorStore):
+    def __init__(self):
+        from pinecone import Pinecone
+        self.pc = Pinecone(api_key=settings.PINECONE_API_KEY)
+        # pool_threads: upsert batches and metadata updates are sent in parallel (async_req=True)
+        self.index = self.pc.Index(settings.PINECONE_INDEX_NAME, pool_threads=settings.PINECONE_UPSERT_CONCURRENCY)
+
+    def upsert(self, vectors: List[Dict[str, Any]]) -> int:
+        """
+        Upload vectors in batches, PINECONE_UPSERT_CONCURRENCY at a time
+        through the index's thread pool. Blocking.
+        """
+        batch_size = settings.PINECONE_UPSERT_BATCH_SIZE
+        self._send_all([
+            lambda batch=vectors[i:i + batch_size]: self.index.upsert(vectors=batch, async_req=True)
+            for i in range(0, len(vectors), batch_size)
+        ], "upsert")
+        return len(vectors)
+
+    def _send_all(self, requests: List[Callable[[], Any]], operation: str) -> None:
+        """
+        Start every request (each returns an async result from the index's
+        thread pool) and wait for all of them. Requests that fail with a
+        transient error (429, 5xx, connection) are resent with backoff.
+        """
+        pending = {i: request() for i, request in enumerate(requests)}
+
+        attempt = 0
+        while pending:
+            failed = []
+            for i, result in pending.items():
+                try:
+                    result.get()
+                except Exception as e:
+                    if not _is_transient(e) or attempt >= settings.PINECONE_MAX_RETRIES:
+                        logger.error(f"Error in Pinecone {operation}: {str(e)}")
+                        raise
+                    failed.append(i)
+                    error = e
+            if not failed:
+                break
+            attempt += 1
+            delay = settings.PINECONE_RETRY_BASE_SECONDS * (2 ** (attempt - 1))
+            logger.warning(f"⚠️ {len(failed)} {operation} requests failed ({type(error).__name__}), retry {attempt} in {delay}s")
+            time.sleep(delay)
+            pending = {i: requests[i]() for i in failed}
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int,
+        document_ids: Optional[List[int]] = None,
+        user_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        # Scoped by document_ids: vectors indexed before user_id was recorded lack it
+        filter_dict = None
+        if document_ids:
+            filter_dict = {'document_id': {'$in': document_ids}}
+
+        results = self.index.query(
+            vector=vector,
+            top_k=top_k,
+            include_metadata=True,
+            filter=filter_dict
+        )
+        return [
+            {'id': match.id, 'score': match.score, 'metadata': match.metadata or {}}
+            for match in results.matches
+        ]
+
+    def fetch(self, vector_ids: List[str]) -> Dict[str, List[float]]:
+        values = {}
+        batch_size = 100
+        for i in range(0, len(vector_ids), batch_size):
+            response = self.index.fetch(ids=vector_ids[i:i + batch_size])
+            for vector_id, vector in response.vectors.items():
+                values[vector_id] = list(vector.values)
+        return values
+
+    def delete(self, vector_ids: List[str]) -> int:
+        batch_size = 1000
+        for i in range(0, len(vector_ids), batch_size):
+            self.index.delete(ids=vector_ids[i:i + batch_size])
+        return len(vector_ids)
+
+    def delete_document(self, document_id: int) -> None:
+        self.index.delete(filter={'document_id': document_id})
+
+    def update_metadata(self, vector_id: str, metadata: Dict[str, Any]) -> None:
+        self.index.update(id=vector_id, set_metadata=metadata)
+
+    def update_metadata_many(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        """Pinecone updates one vector per request: sent in parallel on the pool"""
+        self._send_all([
+            lambda vector_id=vector_id, metadata=metadata: self.index.update(
+                id=vector_id, set_metadata=metadata, async_req=True
+            )
+            for vector_id, metadata in updates.items()
+        ], "update")
+
+    def list_ids(self, prefix: str = "") -> Iterator[List[str]]:
+        """Serverless indexes only"""
+        for ids in self.index.list(prefix=prefix):
+            yield list(ids)
+
+
+_store: Optional[VectorStore] = None
+_store_lock = threading.Lock()
+
+def get_vector_store() -> VectorStore:
+    """Process-wide store selected by VECTOR_STORE (pinecone | local)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if settings.VECTOR_STORE == "local":
+                from .vector_store_local import LocalVectorStore
+                _store = LocalVectorStore(settings.LOCAL_VECTOR_STORE_DIR)
+            elif settings.VECTOR_STORE == "pinecone":
+                _store = PineconeVectorStore()
+            else:
+                raise ValueError(f"Unknown VECTOR_STORE '{settings.VECTOR_STORE}' (expected pinecone or local)")
+            logger.info(f"✅ Vector store: {settings.VECTOR_STORE}")
+        return _store
@@ -0,0 +1,378 @@
+# app/services/vector_store_local.py
+
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set
+import json
+import os
+import threading
+import time
+import logging
+import numpy as np
+
+from .vector_store import VectorStore
+
+try:
+    import fcntl
+except ImportError:  # Windows: single writer process assumed
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SHARED_PARTITION = "shared"  # Vectors without a user_id in their metadata
+LIST_PAGE_SIZE = 100
+REFRESH_INTERVAL_SECONDS = 1.0  # Full directory rescans (other processes' new partitions)
+
+class _Partition:
+    """One user's vectors: L2-normalized float32 rows, aligned with ids/doc_ids/metadata"""
+
+    def __init__(self, ids: List[str], matrix: np.ndarray, doc_ids: np.ndarray, metadata: List[Dict[str, Any]]):
+        self.ids = ids
+        self.matrix = matrix
+        self.doc_ids = doc_ids
+        self.metadata = metadata
+        self.positions = {vector_id: i for i, vector_id in enumerate(ids)}
+        self.index_documents()
+
+    def index_documents(self) -> None:
+        """Recompute the set of document IDs (after doc_ids changed in place)"""
+        self.documents: Set[int] = set(self.doc_ids.tolist())
+
+    @classmethod
+    def empty(cls, dimension: int) -> "_Partition":
+        return cls([], np.zeros((0, dimension), dtype=np.float32), np.zeros(0, dtype=np.int64), [])
+
+    def keep(self, mask: np.ndarray) -> None:
+        """Drop the rows where mask is False"""
+        self.__init__(
+            [vector_id for vector_id, kept in zip(self.ids, mask) if kept],
+            self.matrix[mask],
+            self.doc_ids[mask],
+            [metadata for metadata, kept in zip(self.metadata, mask) if kept]
+        )
+
+
+def _normalize(rows: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(rows, axis=-1, keepdims=True)
+    return rows / np.maximum(norms, 1e-12)
+
+def _partition_name(user_id: Optional[int]) -> str:
+    return f"user_{user_id}" if user_id is not None else SHARED_PARTITION
+
+def _document_id(metadata: Dict[str, Any]) -> int:
+    document_id = metadata.get('document_id')
+    return int(document_id) if document_id is not None else -1
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store: exact cosine search over per-user matrices.
+
+    Vectors are partitioned by the user_id in their metadata. Rows are
+    normalized on write, so a query is one matrix-vector product against
+    the caller's partition (or the partitions holding the requested
+    documents) followed by a top-k selection; for a student's few thousand
+    chunks that is well under a millisecond and needs no network.
+
+    Each partition is one .npz file under `directory`, rewritten atomically
+    on change. Other processes (API and worker share the directory) pick
+    up changes by file mtime: a query stats only the files it reads, the
+    full directory is rescanned at most every REFRESH_INTERVAL_SECONDS.
+    Writers serialize on a lock file. Stored values are the normalized
+    vectors.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock_path = os.path.join(directory, ".lock")
+        self._lock = threading.RLock()
+        self._partitions: Dict[str, _Partition] = {}
+        self._loaded: Dict[str, tuple] = {}  # partition -> (mtime_ns, size) of the file read
+        self._document_partitions: Optional[Dict[int, Set[str]]] = None  # rebuilt after changes
+        self._last_refresh = 0.0
+        self._refresh()
+        logger.info(f"✅ Local vector store at {directory}: {sum(len(p.ids) for p in self._partitions.values())} vectors")
+
+    # ---- persistence ----
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.npz")
+
+    def _refresh(self, names: Optional[Iterable[str]] = None) -> None:
+        """
+        Reload partitions whose file changed on disk (lock held): all of
+        them (directory scan), or only `names`
+        """
+        on_disk = {}
+        if names is None:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".npz"):
+                    stat = entry.stat()
+                    on_disk[entry.name[:-4]] = (stat.st_mtime_ns, stat.st_size)
+            missing = [name for name in self._partitions if name not in on_disk]
+            self._last_refresh = time.monotonic()
+        else:
+            missing = []
+            for name in names:
+                try:
+                    stat = os.stat(self._path(name))
+                except FileNotFoundError:
+                    missing.append(name)
+                    continue
+                on_disk[name] = (stat.st_mtime_ns, stat.st_size)
+
+        for name in missing:
+            if self._partitions.pop(name, None) is not None:
+                self._document_partitions = None
+            self._loaded.pop(name, None)
+        for name, signature in on_disk.items():
+            if self._loaded.get(name) == signature:
+                continue
+            self._document_partitions = None
+            try:
+                with np.load(self._path(name), allow_pickle=False) as data:
+                    self._partitions[name] = _Partition(
+                        data['ids'].tolist(),
+                        data['matrix'],
+                        data['doc_ids'],
+                        json.loads(str(data['metadata']))
+                    )
+                self._loaded[name] = signature
+            except FileNotFoundError:
+                # Emptied and removed by another process since the scan
+                self._partitions.pop(name, None)
+                self._loaded.pop(name, None)
+
+    def _maybe_refresh(self) -> None:
+        if time.monotonic() - self._last_refresh >= REFRESH_INTERVAL_SECONDS:
+            self._refresh()
+
+    def _partitions_for(self, document_ids: Iterable[int]) -> Set[str]:
+        """Partitions holding any of the documents (lock held)"""
+        if self._document_partitions is None:
+            index: Dict[int, Set[str]] = {}
+            for name, partition in self._partitions.items():
+                for document_id in partition.documents:
+                    index.setdefault(document_id, set()).add(name)
+            self._document_partitions = index
+        names = set()
+        for document_id in document_ids:
+            names.update(self._document_partitions.get(document_id, ()))
+        return names
+
+    def _save(self, name: str) -> None:
+        partition = self._partitions[name]
+        path = self._path(name)
+        if not partition.ids:
+            del self._partitions[name]
+            self._loaded.pop(name, None)
+            if os.path.exists(path):
+                os.remove(path)
+            return
+
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            np.savez(
+                f,
+                ids=np.array(partition.ids),
+                matrix=partition.matrix,
+                doc_ids=partition.doc_ids,
+                metadata=np.array(json.dumps(partition.metadata, ensure_ascii=False))
+            )
+        os.replace(temp_path, path)
+        stat = os.stat(path)
+        self._loaded[name] = (stat.st_mtime_ns, stat.st_size)
+
+    def _write(self, change) -> Any:
+        """Run change() on fresh partitions under the process and file locks"""
+        with self._lock:
+            lock_file = open(self._lock_path, "a")
+            try:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._refresh()
+                return change()
+            finally:
+                self._document_partitions = None
+                lock_file.close()  # releases the flock
+
+    def _locate(self, vector_id: str) -> Optional[str]:
+        for name, partition in self._partitions.items():
+            if vector_id in partition.positions:
+                return name
+        return None
+
+    # ---- VectorStore ----
+
+    def upsert(self, vectors: List[Dict[str, Any]]) -> int:
+        if not vectors:
+            return 0
+
+        by_partition: Dict[str, List[Dict[str, Any]]] = {}
+        for vector in vectors:
+            user_id = (vector.get('metadata') or {}).get('user_id')
+            name = _partition_name(user_id)
+            by_partition.setdefault(name, []).append(vector)
+
+        def change():
+            changed = set()
+            for name, batch in by_partition.items():
+                # Last write wins within the batch, as with repeated upserts
+                batch = list({vector['id']: vector for vector in batch}.values())
+                rows = _normalize(np.asarray([vector['values'] for vector in batch], dtype=np.float32))
+                partition = self._partitions.get(name) or _Partition.empty(rows.shape[1])
+                if rows.shape[1] != partition.matrix.shape[1]:
+                    raise ValueError(
+                        f"Vector dimension {rows.shape[1]} does not match {partition.matrix.shape[1]} of partition {name}"
+                    )
+
+                # An ID stored under another partition (e.g. legacy shared) moves here
+                for vector in batch:
+                    owner = self._locate(vector['id'])
+                    if owner is not None and owner != name:
+                        other = self._partitions[owner]
+                        other.keep(np.array([vector_id != vector['id'] for vector_id in other.ids], dtype=bool))
+                        changed.add(owner)
+
+                appended = []
+                for row, vector in zip(rows, batch):
+                    metadata = dict(vector.get('metadata') or {})
+                    position = partition.positions.get(vector['id'])
+                    if position is None:
+                        appended.append((row, vector['id'], metadata))
+                        continue
+                    partition.matrix[position] = row
+                    partition.doc_ids[position] = _document_id(metadata)
+                    partition.metadata[position] = metadata
+                partition.index_documents()
+                if appended:
+                    partition = _Partition(
+                        partition.ids + [vector_id for _, vector_id, _ in appended],
+                        np.vstack([partition.matrix, np.stack([row for row, _, _ in appended])]),
+                        np.concatenate([partition.doc_ids, [_document_id(metadata) for _, _, metadata in appended]]).astype(np.int64),
+                        partition.metadata + [metadata for _, _, metadata in appended]
+                    )
+                self._partitions[name] = partition
+                changed.add(name)
+            for name in changed:
+                self._save(name)
+            return len(vectors)
+
+        return self._write(change)
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int,
+        document_ids: Optional[List[int]] = None,
+        user_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        query = _normalize(np.asarray(vector, dtype=np.float32))
+        wanted = set(document_ids) if document_ids else None
+
+        candidates = []  # (score, partition, row)
+        with self._lock:
+            if user_id is not None:
+                # The caller's partition, plus vectors indexed before user_id was recorded
+                names = [_partition_name(user_id), SHARED_PARTITION]
+                self._refresh(names)
+            else:
+                self._maybe_refresh()
+                names = self._partitions_for(wanted) if wanted else list(self._partitions)
+
+            for name in names:
+                partition = self._partitions.get(name)
+                if partition is None:
+                    continue
+                rows = None
+                if wanted is not None and not partition.documents <= wanted:
+                    if wanted.isdisjoint(partition.documents):
+                        continue
+                    rows = np.flatnonzero(np.isin(partition.doc_ids, list(wanted)))
+                # Scoring the whole partition is cheaper than copying the selected rows
+                scores = partition.matrix @ query
+                if rows is not None:
+                    scores = scores[rows]
+                if len(scores) > top_k:
+                    best = np.argpartition(-scores, top_k - 1)[:top_k]
+                else:
+                    best = np.arange(len(scores))
+                for i in best:
+                    row = int(rows[i]) if rows is not None else int(i)
+                    candidates.append((float(scores[i]), partition, row))
+
+            candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+            return [
+                {'id': partition.ids[row], 'score': score, 'metadata': dict(partition.metadata[row])}
+                for score, partition, row in candidates[:top_k]
+            ]
+
+    def fetch(self, vector_ids: List[str]) -> Dict[str, List[float]]:
+        values = {}
+        with self._lock:
+            self._maybe_refresh()
+            for vector_id in vector_ids:
+                name = self._locate(vector_id)
+                if name is not None:
+                    partition = self._partitions[name]
+                    values[vector_id] = partition.matrix[partition.positions[vector_id]].tolist()
+        return values
+
+    def delete(self, vector_ids: List[str]) -> int:
+        doomed = set(vector_ids)
+
+        def change():
+            for name, partition in list(self._partitions.items()):
+                if doomed.isdisjoint(partition.positions):
+                    continue
+                partition.keep(np.array([vector_id not in doomed for vector_id in partition.ids], dtype=bool))
+                self._save(name)
+            return len(vector_ids)
+
+        return self._write(change)
+
+    def delete_document(self, document_id: int) -> None:
+        def change():
+            for name, partition in list(self._partitions.items()):
+                mask = partition.doc_ids != document_id
+                if not mask.all():
+                    partition.keep(mask)
+                    self._save(name)
+
+        self._write(change)
+
+    def update_metadata(self, vector_id: str, metadata: Dict[str, Any]) -> None:
+        self.update_metadata_many({vector_id: metadata})
+
+    def update_metadata_many(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        """One rewrite per partition touched, however many vectors change"""
+        if not updates:
+            return
+
+        def change():
+            changed = set()
+            for vector_id, metadata in updates.items():
+                name = self._locate(vector_id)
+                if name is None:
+                    continue
+                partition = self._partitions[name]
+                position = partition.positions[vector_id]
+                partition.metadata[position].update(metadata)
+                partition.doc_ids[position] = _document_id(partition.metadata[position])
+                changed.add(name)
+            for name in changed:
+                self._partitions[name].index_documents()
+                self._save(name)
+
+        self._write(change)
+
+    def list_ids(self, prefix: str = "") -> Iterator[List[str]]:
+        with self._lock:
+            self._refresh()  # GC pass: must see every partition
+            ids = sorted(
+                vector_id
+                for partition in self._partitions.values()
+                for vector_id in partition.ids
+                if vector_id.startswith(prefix)
+            )
+        for i in range(0, len(ids), LIST_PAGE_SIZE):
+            yield ids[i:i + LIST_PAGE_SIZE]
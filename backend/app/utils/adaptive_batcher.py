@@ -0,0 +1,125 @@
+"""
+AIMD batch sizing for embedding requests.
+
+Texts are packed in order into batches limited by an item count that
+adapts to the API, and by hard caps on estimated tokens and UTF-8 bytes
+(so a few very long chunks do not produce an oversized request while
+short chunks still share one round trip).
+
+The item limit follows additive-increase / multiplicative-decrease:
+a full-size request that finishes within the latency target grows it by
+`increase`; a slow request, a timeout/5xx or a request-size error
+multiplies it by `decrease`. As in TCP congestion control, only
+requests started after the last decrease can shrink it again (the
+batches already in flight were sized before it), and requests smaller
+than the limit do not grow it.
+"""
+import threading
+import time
+from collections import deque
+from typing import List, Sequence
+
+from .metrics import Gauge, Histogram
+
+BATCH_SIZE = Gauge(
+    "docmentor_embedding_batch_size",
+    "Current adaptive embedding batch size (max texts per request)",
+)
+THROUGHPUT = Gauge(
+    "docmentor_embedding_throughput_texts_per_second",
+    "Texts embedded per second over the last minute",
+)
+REQUEST_SECONDS = Histogram(
+    "docmentor_embedding_request_seconds",
+    "Latency of one embedding request",
+    buckets=(0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60),
+)
+
+THROUGHPUT_WINDOW_SECONDS = 60.0
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count; Vietnamese syllables run ~3 characters per token"""
+    return len(text) // 3 + 1
+
+
+class AdaptiveBatcher:
+    def __init__(
+        self,
+        initial: int,
+        min_size: int,
+        max_size: int,
+        max_tokens: int,
+        max_bytes: int,
+        target_seconds: float,
+        increase: int = 4,
+        decrease: float = 0.5
+    ):
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.max_tokens = max_tokens
+        self.max_bytes = max_bytes
+        self.target_seconds = target_seconds
+        self.increase = increase
+        self.decrease = decrease
+        self._size = float(min(self.max_size, max(self.min_size, initial)))
+        self._last_decrease = 0.0  # time.monotonic() of the last decrease
+        self._lock = threading.Lock()
+        self._completed = deque()  # (finished_at, texts) within THROUGHPUT_WINDOW_SECONDS
+        BATCH_SIZE.set(self.size)
+
+    @property
+    def size(self) -> int:
+        return int(self._size)
+
+    def pack(self, texts: Sequence[str]) -> List[List[str]]:
+        """Split texts (in order) into batches within the current limits"""
+        limit = self.size
+        batches: List[List[str]] = []
+        batch: List[str] = []
+        tokens = size_bytes = 0
+        for text in texts:
+            text_tokens = estimate_tokens(text)
+            text_bytes = len(text.encode("utf-8"))
+            if batch and (
+                len(batch) >= limit
+                or tokens + text_tokens > self.max_tokens
+                or size_bytes + text_bytes > self.max_bytes
+            ):
+                batches.append(batch)
+                batch, tokens, size_bytes = [], 0, 0
+            batch.append(text)
+            tokens += text_tokens
+            size_bytes += text_bytes
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def record_success(self, texts: int, started: float) -> None:
+        """A request of `texts` texts, sent at time.monotonic() `started`, succeeded"""
+        now = time.monotonic()
+        seconds = now - started
+        REQUEST_SECONDS.observe(seconds)
+        with self._lock:
+            if seconds > self.target_seconds:
+                self._decrease(started)
+            elif texts >= self.size:
+                self._size = min(self.max_size, self._size + self.increase)
+            self._completed.append((now, texts))
+            while self._completed and self._completed[0][0] < now - THROUGHPUT_WINDOW_SECONDS:
+                self._completed.popleft()
+            window = min(THROUGHPUT_WINDOW_SECONDS, max(1.0, now - self._completed[0][0] + seconds))
+            throughput = sum(count for _, count in self._completed) / window
+        BATCH_SIZE.set(self.size)
+        THROUGHPUT.set(round(throughput, 2))
+
+    def record_failure(self, started: float) -> None:
+        """Timeout, server error or request too large: back off multiplicatively"""
+        with self._lock:
+            self._decrease(started)
+        BATCH_SIZE.set(self.size)
+
+    def _decrease(self, started: float) -> None:
+        if started < self._last_decrease:
+            return  # sized before the last decrease: already accounted for
+        self._size = max(self.min_size, self._size * self.decrease)
+        self._last_decrease = time.monotonic()
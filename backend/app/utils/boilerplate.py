@@ -0,0 +1,53 @@
+import re
+from collections import Counter
+from typing import Iterable, List, Set, Tuple
+
+_DIGITS = re.compile(r"\d+")
+_SPACES = re.compile(r"\s+")
+
+MAX_LINE_LENGTH = 200  # Longer lines are content, even if repeated
+
+def normalize_line(line: str) -> str:
+    """Comparison key: case/whitespace-insensitive, numbers masked (page numbers, dates)"""
+    return _DIGITS.sub("#", _SPACES.sub(" ", line.strip().lower()))
+
+def learn_boilerplate(pages: Iterable[str], min_fraction: float, min_pages: int) -> Set[str]:
+    """
+    Normalized lines found on at least `min_fraction` of the non-empty
+    pages (counted once per page): running headers, footers, page numbers,
+    watermarks. Returns an empty set for documents with fewer than
+    `min_pages` non-empty pages.
+    """
+    counts: Counter = Counter()
+    total = 0
+    for page in pages:
+        if not page.strip():
+            continue
+        total += 1
+        counts.update({
+            key for key in (normalize_line(line) for line in page.splitlines())
+            if key and len(key) <= MAX_LINE_LENGTH
+        })
+
+    if total < min_pages:
+        return set()
+    threshold = max(2, min_fraction * total)
+    return {key for key, count in counts.items() if count >= threshold}
+
+def strip_boilerplate(page: str, boilerplate: Set[str]) -> Tuple[str, int]:
+    """Remove boilerplate lines from a page; returns (text, characters removed)"""
+    if not boilerplate or not page:
+        return page, 0
+    lines = page.splitlines(keepends=True)
+    kept = [line for line in lines if normalize_line(line) not in boilerplate]
+    if len(kept) == len(lines):
+        return page, 0
+    text = "".join(kept)
+    return text, len(page) - len(text)
+
+def strip_boilerplate_pages(pages: List[str], min_fraction: float, min_pages: int) -> List[str]:
+    """Learn boilerplate from all pages and remove it from each"""
+    boilerplate = learn_boilerplate(pages, min_fraction, min_pages)
+    if not boilerplate:
+        return pages
+    return [strip_boilerplate(page, boilerplate)[0] for page in pages]
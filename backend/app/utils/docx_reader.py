@@ -0,0 +1,85 @@
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Iterator
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+_P = f"{W_NS}p"
+_T = f"{W_NS}t"
+_TAB = f"{W_NS}tab"
+_BR = f"{W_NS}br"
+_CR = f"{W_NS}cr"
+_TR = f"{W_NS}tr"
+_TC = f"{W_NS}tc"
+_BODY = f"{W_NS}body"
+
+CELL_SEPARATOR = " | "
+
+def _paragraph_text(paragraph: ET.Element) -> str:
+    """Text of a w:p element, same rules as python-docx Paragraph.text"""
+    parts = []
+    for node in paragraph.iter():
+        if node.tag == _T:
+            parts.append(node.text or "")
+        elif node.tag == _TAB:
+            parts.append("\t")
+        elif node.tag in (_BR, _CR):
+            parts.append("\n")
+    return "".join(parts)
+
+def iter_docx_blocks(file_path: str) -> Iterator[str]:
+    """
+    Stream text blocks from word/document.xml in document order.
+
+    Yields one block per body paragraph and one per table row (cells
+    joined with ' | '; nested tables are flattened into their cell).
+    Uses iterparse and discards processed elements, so the python-docx
+    object model is never built.
+    """
+    with zipfile.ZipFile(file_path) as archive, archive.open("word/document.xml") as xml_file:
+        cell_stack = []  # text parts of open table cells
+        row_stack = []   # cells of open table rows
+        body = None
+        depth = 0
+        body_depth = -1
+
+        for event, elem in ET.iterparse(xml_file, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if elem.tag == _BODY:
+                    body = elem
+                    body_depth = depth
+                elif elem.tag == _TR:
+                    row_stack.append([])
+                elif elem.tag == _TC:
+                    cell_stack.append([])
+                continue
+
+            # event == "end"
+            if elem.tag == _P:
+                text = _paragraph_text(elem)
+                elem.clear()
+                if cell_stack:
+                    if text:
+                        cell_stack[-1].append(text)
+                elif text:
+                    yield text
+
+            elif elem.tag == _TC:
+                parts = cell_stack.pop()
+                if row_stack:
+                    row_stack[-1].append(" ".join(parts).strip())
+
+            elif elem.tag == _TR:
+                cells = row_stack.pop()
+                row_text = CELL_SEPARATOR.join(cells) if any(cells) else ""
+                if cell_stack:
+                    if row_text:
+                        cell_stack[-1].append(row_text)
+                elif row_text:
+                    yield row_text
+
+            # Drop finished top-level blocks to keep memory flat
+            if body is not None and depth == body_depth + 1:
+                body.clear()
+            depth -= 1
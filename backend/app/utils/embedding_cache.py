@@ -0,0 +1,196 @@
+"""
+Persistent, content-addressed embedding cache (SQLite).
+
+Embeddings are keyed by (model, task_type, sha256(text)) and stored as
+float32 blobs, so re-ingesting a document, the same file uploaded by
+another user or a repeated question never calls the embedding API again.
+The file is shared by the API and worker processes (WAL mode). When it
+grows past its size limit the least recently used entries are evicted.
+Cache errors are logged and treated as misses: the cache never fails an
+embedding request.
+
+Lookups are read-only: hits whose last_used is stale are remembered and
+refreshed in batches (with the next insert, or every TOUCH_BATCH hits),
+so queries do not contend for the SQLite write lock. The methods are
+blocking; async callers run them in a thread.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import List, Optional, Sequence
+
+from ..config import settings
+from .metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+SQL_BATCH = 500          # keys per IN (...) query
+EVICT_CHECK_EVERY = 500  # inserts between size checks
+EVICT_TARGET = 0.9       # evict down to this fraction of the limit
+TOUCH_AFTER_SECONDS = 3600  # last_used is refreshed only when older than this
+TOUCH_BATCH = 500        # pending refreshes written together
+
+CACHE_REQUESTS = Counter(
+    "docmentor_embedding_cache_requests_total",
+    "Embedding cache lookups, by task_type and result (hit, miss)",
+)
+CACHE_EVICTIONS = Counter(
+    "docmentor_embedding_cache_evictions_total",
+    "Embeddings evicted from the cache to stay under EMBEDDING_CACHE_MAX_MB",
+)
+
+def _text_hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: str, max_bytes: int):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self._touched = set()  # (model, task_type, text_hash) of stale hits to refresh
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                task_type TEXT NOT NULL,
+                text_hash BLOB NOT NULL,
+                vector BLOB NOT NULL,
+                last_used INTEGER NOT NULL,
+                PRIMARY KEY (model, task_type, text_hash)
+            );
+            CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used);
+        """)
+        self._conn.commit()
+
+    def get_many(self, model: str, task_type: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Cached embedding per text, None for misses (same order as texts)"""
+        hashes = [_text_hash(text) for text in texts]
+        found = {}
+        stale_before = int(time.time()) - TOUCH_AFTER_SECONDS
+        try:
+            with self._lock:
+                for i in range(0, len(hashes), SQL_BATCH):
+                    batch = list(set(hashes[i:i + SQL_BATCH]))
+                    placeholders = ",".join("?" * len(batch))
+                    rows = self._conn.execute(
+                        f"SELECT text_hash, vector, last_used FROM embeddings "
+                        f"WHERE model = ? AND task_type = ? AND text_hash IN ({placeholders})",
+                        [model, task_type, *batch]
+                    ).fetchall()
+                    for text_hash, vector, last_used in rows:
+                        found[text_hash] = vector
+                        if last_used < stale_before:
+                            self._touched.add((model, task_type, text_hash))
+                if len(self._touched) >= TOUCH_BATCH:
+                    self._flush_touched()
+                    self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Embedding cache read failed: {str(e)}")
+            found = {}
+
+        results = []
+        for text_hash in hashes:
+            blob = found.get(text_hash)
+            results.append(array("f", blob).tolist() if blob is not None else None)
+        hits = sum(1 for result in results if result is not None)
+        CACHE_REQUESTS.inc(hits, task_type=task_type, result="hit")
+        CACHE_REQUESTS.inc(len(results) - hits, task_type=task_type, result="miss")
+        return results
+
+    def put_many(
+        self,
+        model: str,
+        task_type: str,
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]]
+    ) -> None:
+        now = int(time.time())
+        rows = [
+            (model, task_type, _text_hash(text), array("f", embedding).tobytes(), now)
+            for text, embedding in zip(texts, embeddings)
+        ]
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, task_type, text_hash, vector, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._flush_touched()  # same transaction
+                self._conn.commit()
+                self._inserts += len(rows)
+                if self._inserts >= EVICT_CHECK_EVERY:
+                    self._inserts = 0
+                    self._evict()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Embedding cache write failed: {str(e)}")
+
+    def _flush_touched(self) -> None:
+        """Write the pending last_used refreshes (lock held, caller commits)"""
+        if not self._touched:
+            return
+        now = int(time.time())
+        self._conn.executemany(
+            "UPDATE embeddings SET last_used = ? WHERE model = ? AND task_type = ? AND text_hash = ?",
+            [(now, *key) for key in self._touched]
+        )
+        self._touched.clear()
+
+    def size_bytes(self) -> int:
+        """Bytes of the database in use (free pages excluded)"""
+        page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until under EVICT_TARGET of the limit (lock held)"""
+        used = self.size_bytes()
+        if used <= self.max_bytes:
+            return
+        entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if not entries:
+            return
+        excess = used - self.max_bytes * EVICT_TARGET
+        count = min(entries, int(excess / (used / entries)) + 1)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+            (count,)
+        )
+        self._conn.commit()
+        CACHE_EVICTIONS.inc(count)
+        logger.info(f"🧹 Evicted {count} cached embeddings ({used / 1024 / 1024:.0f} MB in use)")
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Process-wide cache, or None when EMBEDDING_CACHE_PATH is empty or unusable"""
+    global _cache
+    if not settings.EMBEDDING_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = EmbeddingCache(
+                    settings.EMBEDDING_CACHE_PATH,
+                    settings.EMBEDDING_CACHE_MAX_MB * 1024 * 1024
+                )
+                logger.info(f"✅ Embedding cache at {settings.EMBEDDING_CACHE_PATH}")
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Embedding cache disabled: {str(e)}")
+                return None
+        return _cache
@@ -0,0 +1,86 @@
+import codecs
+import mmap
+import os
+from typing import Iterator
+from charset_normalizer import from_bytes
+
+FALLBACK_ENCODING = "cp1258"  # Vietnamese Windows code page
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+def detect_encoding(prefix: bytes) -> str:
+    """Guess the text encoding from a bounded prefix of the file"""
+    for bom, encoding in _BOMS:
+        if prefix.startswith(bom):
+            return encoding
+
+    # UTF-16 without BOM: ASCII-range text has NUL in every other byte.
+    # Checked before UTF-8: NUL is a valid UTF-8 byte, so such text also decodes as UTF-8
+    if len(prefix) >= 4:
+        even_nuls = prefix[0::2].count(0)
+        odd_nuls = prefix[1::2].count(0)
+        half = len(prefix) // 2
+        if odd_nuls > half * 0.3 and even_nuls < half * 0.05:
+            return "utf-16-le"
+        if even_nuls > half * 0.3 and odd_nuls < half * 0.05:
+            return "utf-16-be"
+
+    # Valid UTF-8 (a multi-byte sequence may be cut at the end of the prefix)
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    best = from_bytes(prefix).best()
+    if best is not None:
+        try:
+            return codecs.lookup(best.encoding).name
+        except LookupError:
+            pass
+
+    return FALLBACK_ENCODING
+
+def iter_text_segments(file_path: str, segment_bytes: int, sniff_bytes: int) -> Iterator[str]:
+    """
+    Decode a text file in a single pass over a memory map.
+
+    The encoding is sniffed from the first `sniff_bytes`; the rest is fed
+    through an incremental decoder `segment_bytes` at a time. Segments end
+    on a line break (unless a single line is huge) and newlines are
+    normalized to '\\n', so they can be concatenated or split directly.
+    """
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            encoding = detect_encoding(mm[:sniff_bytes])
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+
+            carry = ""
+            for offset in range(0, size, segment_bytes):
+                final = offset + segment_bytes >= size
+                text = carry + decoder.decode(mm[offset:offset + segment_bytes], final=final)
+
+                cut = text.rfind("\n") + 1
+                if cut == 0 and len(text) < 4 * segment_bytes and not final:
+                    carry = text
+                    continue
+                if cut == 0:
+                    cut = len(text)
+
+                carry = text[cut:]
+                segment = text[:cut].replace("\r\n", "\n").replace("\r", "\n")
+                if segment:
+                    yield segment
+
+            if carry:
+                yield carry.replace("\r\n", "\n").replace("\r", "\n")
@@ -1,8 +1,10 @@
 import os
+import re
 import hashlib
 from datetime import datetime
-from typing import List
+from typing import BinaryIO, List, Optional, Tuple
 from fastapi import UploadFile, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from ..config import settings
 
 def validate_file_type(filename: str) -> str:
@@ -28,6 +30,15 @@ def validate_file_size(file_size: int) -> bool:
         )
     return True
 
+def validate_batch_size(total_bytes: int) -> None:
+    """Total bytes written by one batch upload (ZIP members as extracted)"""
+    if total_bytes > settings.MAX_BATCH_BYTES:
+        max_size_mb = settings.MAX_BATCH_BYTES / (1024 * 1024)
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch too large. Maximum total size: {max_size_mb}MB"
+        )
+
 def generate_unique_filename(user_id: int, original_filename: str) -> str:
     """Generate unique filename to prevent collisions"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -47,6 +58,94 @@ def calculate_file_hash(file_path: str) -> str:
             sha256_hash.update(byte_block)
     return sha256_hash.hexdigest()
 
+async def save_upload_file(file: UploadFile, destination: str) -> Tuple[int, str]:
+    """
+    Stream an upload to disk in fixed-size blocks.
+
+    The SHA256 hash is computed while writing and MAX_FILE_SIZE is enforced as
+    bytes arrive, so an oversized upload is rejected without being buffered.
+    Returns (file_size, file_hash).
+    """
+    # Reject early when the multipart parser already knows the size
+    if file.size is not None:
+        validate_file_size(file.size)
+
+    sha256_hash = hashlib.sha256()
+    file_size = 0
+    temp_path = f"{destination}.part"
+
+    try:
+        with open(temp_path, "wb") as buffer:
+            while True:
+                block = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not block:
+                    break
+
+                file_size += len(block)
+                validate_file_size(file_size)
+
+                sha256_hash.update(block)
+                await run_in_threadpool(buffer.write, block)
+
+        os.replace(temp_path, destination)
+    except BaseException:
+        # Don't leave partial files behind (size limit, client disconnect, ...)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return file_size, sha256_hash.hexdigest()
+
+def save_file_stream(
+    source: BinaryIO,
+    destination: str,
+    batch_bytes: Optional[int] = None
+) -> Tuple[int, str]:
+    """
+    Blocking counterpart of save_upload_file for file-like sources
+    (e.g. ZIP archive members). Enforces MAX_FILE_SIZE on the bytes
+    actually read, not on the declared size, and MAX_BATCH_BYTES when
+    batch_bytes (bytes already written by the batch) is given.
+    Returns (file_size, file_hash).
+    """
+    sha256_hash = hashlib.sha256()
+    file_size = 0
+    temp_path = f"{destination}.part"
+
+    try:
+        with open(temp_path, "wb") as buffer:
+            for block in iter(lambda: source.read(settings.UPLOAD_CHUNK_SIZE), b""):
+                file_size += len(block)
+                validate_file_size(file_size)
+                if batch_bytes is not None:
+                    validate_batch_size(batch_bytes + file_size)
+                sha256_hash.update(block)
+                buffer.write(block)
+
+        os.replace(temp_path, destination)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return file_size, sha256_hash.hexdigest()
+
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+def parse_content_range(header: str) -> Tuple[int, int, Optional[int]]:
+    """
+    Parse 'bytes first-last/total' (last inclusive, total may be '*').
+    Returns (start, end, total) with end exclusive.
+    """
+    match = _CONTENT_RANGE.match((header or "").strip())
+    if not match or int(match.group(2)) < int(match.group(1)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid Content-Range header, expected 'bytes first-last/total'"
+        )
+    total = None if match.group(3) == "*" else int(match.group(3))
+    return int(match.group(1)), int(match.group(2)) + 1, total
+
 def ensure_upload_dir() -> str:
     """Ensure upload directory exists"""
     upload_dir = settings.UPLOAD_DIR
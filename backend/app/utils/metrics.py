@@ -0,0 +1,120 @@
+"""
+Minimal in-process metrics in the Prometheus text format.
+
+Each process (API, ingestion worker) keeps its own values; the API serves
+them at GET /metrics and the worker on WORKER_METRICS_PORT.
+"""
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+_lock = threading.Lock()
+_registry: List["_Metric"] = []
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        with _lock:
+            _registry.append(self)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with _lock:
+            lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted((name, str(value)) for name, value in labels.items()))
+        with _lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        key = tuple(sorted((name, str(value)) for name, value in labels.items()))
+        with _lock:
+            return self._values.get(key, 0.0)
+
+    def _samples(self) -> List[str]:
+        if not self._values:
+            return [f"{self.name} 0"]
+        return [f"{self.name}{_format_labels(key)} {value:g}" for key, value in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = tuple(sorted((label, str(label_value)) for label, label_value in labels.items()))
+        with _lock:
+            self._values[key] = value
+
+    def value(self, **labels: str) -> float:
+        key = tuple(sorted((name, str(value)) for name, value in labels.items()))
+        with _lock:
+            return self._values.get(key, 0.0)
+
+    def _samples(self) -> List[str]:
+        if not self._values:
+            return [f"{self.name} 0"]
+        return [f"{self.name}{_format_labels(key)} {value:g}" for key, value in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float]):
+        super().__init__(name, documentation)
+        self.buckets = sorted(buckets)
+        self._counts = [0] * len(self.buckets)
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value: float) -> None:
+        with _lock:
+            self._sum += value
+            self._count += 1
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[i] += 1
+
+    def _samples(self) -> List[str]:
+        lines = [
+            f'{self.name}_bucket{{le="{bound:g}"}} {count}'
+            for bound, count in zip(self.buckets, self._counts)
+        ]
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self._count}')
+        lines.append(f"{self.name}_sum {self._sum:g}")
+        lines.append(f"{self.name}_count {self._count}")
+        return lines
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus exposition format"""
+    with _lock:
+        metrics = list(_registry)
+    return "\n".join(metric.render() for metric in metrics) + "\n"
@@ -0,0 +1,208 @@
+"""
+PDF text extraction run inside sandbox worker processes.
+
+Kept free of app imports so worker processes start from a small
+interpreter (the memory ceiling applies to the whole process).
+
+Several extractor backends are supported; they are tried per page in
+the configured order and a page falls back to the next backend when
+the text is empty or looks broken (replacement characters, (cid:N)
+glyph codes, control or private-use characters).
+"""
+import importlib.util
+import io
+import re
+import time
+from typing import Dict, List, Sequence, Tuple
+
+BAD_CHARS = re.compile(r"\(cid:\d+\)|[\ufffd\x00-\x08\x0b\x0c\x0e-\x1f\ue000-\uf8ff]")
+MAX_BAD_RATIO = 0.1
+
+# Per-backend counters returned by extract_pdf_page_range
+BackendStats = Dict[str, Dict[str, float]]
+
+class PdfBackend:
+    """One open PDF; subclasses wrap an extraction library"""
+    name = ""
+    module = ""  # import name, used to check availability
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def page_count(self) -> int:
+        raise NotImplementedError
+
+    def page_text(self, index: int) -> str:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class PyPDF2Backend(PdfBackend):
+    name = "pypdf2"
+    module = "PyPDF2"
+
+    def __init__(self, file_path: str):
+        import PyPDF2
+        super().__init__(file_path)
+        self._file = open(file_path, 'rb')
+        self._reader = PyPDF2.PdfReader(self._file)
+
+    def page_count(self) -> int:
+        return len(self._reader.pages)
+
+    def page_text(self, index: int) -> str:
+        return self._reader.pages[index].extract_text() or ""
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class PypdfBackend(PyPDF2Backend):
+    name = "pypdf"
+    module = "pypdf"
+
+    def __init__(self, file_path: str):
+        import pypdf
+        PdfBackend.__init__(self, file_path)
+        self._file = open(file_path, 'rb')
+        self._reader = pypdf.PdfReader(self._file)
+
+
+class PyMuPDFBackend(PdfBackend):
+    name = "pymupdf"
+    module = "fitz"
+
+    def __init__(self, file_path: str):
+        import fitz
+        super().__init__(file_path)
+        self._document = fitz.open(file_path)
+
+    def page_count(self) -> int:
+        return self._document.page_count
+
+    def page_text(self, index: int) -> str:
+        return self._document[index].get_text() or ""
+
+    def close(self) -> None:
+        self._document.close()
+
+
+class PdfMinerBackend(PdfBackend):
+    name = "pdfminer"
+    module = "pdfminer"
+
+    def __init__(self, file_path: str):
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfinterp import PDFResourceManager
+        super().__init__(file_path)
+        self._file = open(file_path, 'rb')
+        self._pages = list(PDFPage.get_pages(self._file))
+        self._resources = PDFResourceManager(caching=True)
+
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    def page_text(self, index: int) -> str:
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFPageInterpreter
+        output = io.StringIO()
+        converter = TextConverter(self._resources, output, laparams=LAParams())
+        try:
+            PDFPageInterpreter(self._resources, converter).process_page(self._pages[index])
+        finally:
+            converter.close()
+        return output.getvalue()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+BACKENDS = {backend.name: backend for backend in (PyPDF2Backend, PypdfBackend, PyMuPDFBackend, PdfMinerBackend)}
+
+def available_backends(names: Sequence[str]) -> List[str]:
+    """Known and installed backends among `names`, in order"""
+    return [
+        name for name in names
+        if name in BACKENDS and importlib.util.find_spec(BACKENDS[name].module) is not None
+    ]
+
+def is_usable(text: str, min_chars: int) -> bool:
+    """Enough text, and not mostly undecodable glyphs"""
+    stripped = text.strip()
+    if len(stripped) < min_chars:
+        return False
+    bad = sum(len(match) for match in BAD_CHARS.findall(stripped))
+    return bad <= MAX_BAD_RATIO * len(stripped)
+
+def count_pdf_pages(file_path: str, backends: Sequence[str] = ("pypdf2",)) -> int:
+    """Number of pages in a PDF, from the first backend able to open it"""
+    error = None
+    for name in backends:
+        try:
+            backend = BACKENDS[name](file_path)
+        except Exception as e:
+            error = e
+            continue
+        try:
+            return backend.page_count()
+        finally:
+            backend.close()
+    raise error or ValueError("No PDF extractor backend configured")
+
+def extract_pdf_page_range(
+    file_path: str,
+    start: int,
+    end: int,
+    backends: Sequence[str] = ("pypdf2",),
+    min_chars: int = 1
+) -> Tuple[List[str], BackendStats]:
+    """
+    Text of pages [start, end) in order, plus per-backend counters:
+    seconds, pages, chars (of the pages it was asked for) and rejected
+    (pages whose text was unusable and fell through to the next backend).
+    Backends after the first are only opened when a page needs them.
+    """
+    opened: Dict[str, PdfBackend] = {}
+    failed = set()
+    stats: BackendStats = {}
+
+    def text_from(name: str, index: int):
+        if name in failed:
+            return None
+        counters = stats.setdefault(name, {'seconds': 0.0, 'pages': 0, 'chars': 0, 'rejected': 0})
+        started = time.perf_counter()
+        try:
+            if name not in opened:
+                opened[name] = BACKENDS[name](file_path)
+            text = opened[name].page_text(index)
+        except Exception:
+            if name not in opened:
+                failed.add(name)  # cannot open this file: skip it for the rest of the range
+            text = None
+        counters['seconds'] += time.perf_counter() - started
+        counters['pages'] += 1
+        counters['chars'] += len(text or "")
+        return text
+
+    pages = []
+    try:
+        for index in range(start, end):
+            fallback = ""
+            for name in backends:
+                text = text_from(name, index)
+                if text is not None and is_usable(text, min_chars):
+                    pages.append(text)
+                    break
+                stats[name]['rejected'] += 1
+                # Short but clean text (e.g. a lone page number) beats nothing
+                if text and is_usable(text, 0) and len(text.strip()) > len(fallback.strip()):
+                    fallback = text
+            else:
+                pages.append(fallback)
+    finally:
+        for backend in opened.values():
+            backend.close()
+    return pages, stats
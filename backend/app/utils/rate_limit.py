@@ -0,0 +1,61 @@
+"""
+Async rate limiting for external API calls.
+"""
+import asyncio
+import threading
+import time
+import weakref
+
+
+class TokenBucket:
+    """
+    Requests-per-minute limiter: holds up to `burst` tokens, refilled at
+    rate_per_minute / 60 per second. acquire() waits (without blocking the
+    event loop) until a token is available. Safe to share between event
+    loops and threads.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token; returns how long the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return  # unlimited
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class LoopSemaphore:
+    """
+    Process-wide concurrency limit for coroutines: one asyncio.Semaphore
+    per running event loop (asyncio primitives cannot cross loops).
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.limit)
+            return semaphore
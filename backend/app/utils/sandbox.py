@@ -0,0 +1,121 @@
+"""
+Process sandbox for parsing untrusted files.
+
+Every document gets its own small process pool. Worker processes run
+under an RLIMIT_AS memory ceiling, and each task has a wall-clock
+deadline; when a task misses it (or a worker dies) the whole pool is
+killed, so a malformed file cannot hold a CPU or memory beyond its budget.
+"""
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Tuple
+
+from .metrics import Counter, Histogram
+
+try:
+    import resource
+except ImportError:  # Windows: no memory ceiling
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_SECONDS = Histogram(
+    "docmentor_extraction_task_seconds",
+    "Time spent in one sandboxed extraction task (measured in the worker)",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+EXTRACTION_KILLS = Counter(
+    "docmentor_extraction_kills_total",
+    "Sandboxed extractions killed, by reason (timeout, memory, crashed)",
+)
+
+class ExtractionAborted(Exception):
+    """The sandbox killed an extraction. Retrying would fail the same way."""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+def _limit_memory(max_bytes: int) -> None:
+    """Worker initializer: cap the address space of the process"""
+    if resource is not None and max_bytes > 0:
+        resource.setrlimit(resource.RLIMIT_AS, (max_bytes, max_bytes))
+
+def _timed(func: Callable, args: Tuple) -> Tuple[float, Any]:
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def _context():
+    # forkserver children start from a clean interpreter instead of a copy of
+    # the (large) API/worker process, so the memory ceiling is meaningful
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class ExtractionSandbox:
+    """
+    Per-document process pool with a deadline per task.
+
+    Callers should keep at most `workers` tasks in flight: deadlines are
+    counted from submission, which only matches run time when every
+    submitted task can start right away.
+    """
+
+    def __init__(self, label: str, workers: int, timeout: float, memory_mb: int):
+        self.label = label
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=_context(),
+            initializer=_limit_memory,
+            initargs=(memory_mb * 1024 * 1024,)
+        )
+
+    def submit(self, func: Callable, *args) -> Tuple["asyncio.Future", float]:
+        """Start func(*args) in the sandbox; returns (future, deadline)"""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, _timed, func, args)
+        return future, time.monotonic() + self.timeout
+
+    async def result(self, task: Tuple["asyncio.Future", float]) -> Any:
+        """Wait for a submitted task; kills the sandbox if it overruns or dies"""
+        future, deadline = task
+        try:
+            elapsed, result = await asyncio.wait_for(future, max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise self._abort("timeout", f"exceeded the {self.timeout:g}s time limit")
+        except MemoryError:
+            raise self._abort("memory", f"exceeded the {self.memory_mb} MB memory limit")
+        except BrokenProcessPool:
+            # Usually the kernel or allocator killing a worker at the memory limit
+            raise self._abort("crashed", f"worker process died (memory limit {self.memory_mb} MB)")
+        EXTRACTION_SECONDS.observe(elapsed)
+        return result
+
+    async def run(self, func: Callable, *args) -> Any:
+        return await self.result(self.submit(func, *args))
+
+    def _abort(self, reason: str, detail: str) -> ExtractionAborted:
+        self.kill()
+        EXTRACTION_KILLS.inc(reason=reason)
+        message = f"Extraction of {self.label} was stopped: {detail}"
+        logger.error(f"🛑 {message}")
+        return ExtractionAborted(reason, message)
+
+    def kill(self) -> None:
+        """Terminate the worker processes immediately"""
+        processes = list((getattr(self._executor, "_processes", None) or {}).values())
+        for process in processes:
+            if process.is_alive():
+                process.kill()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,134 @@
+import hashlib
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+BITS = 64
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_MASK = (1 << BITS) - 1
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+def simhash(text: str) -> Tuple[int, int]:
+    """
+    64-bit SimHash over word unigrams and bigrams (case-insensitive).
+    Returns (fingerprint, number of words).
+
+    Bit counts are accumulated bit-sliced: each counter plane holds one
+    binary digit of all 64 per-bit counters, so adding a feature costs a
+    few big-int operations instead of 64 Python additions.
+    """
+    words = _WORD.findall(text.lower())
+    if not words:
+        return 0, 0
+
+    planes: List[int] = []
+    features = 0
+    previous = None
+    for word in words:
+        for feature in (word, f"{previous} {word}" if previous else None):
+            if feature is None:
+                continue
+            carry = _feature_hash(feature)
+            features += 1
+            for level in range(len(planes)):
+                plane = planes[level]
+                planes[level] = plane ^ carry
+                carry &= plane
+                if not carry:
+                    break
+            if carry:
+                planes.append(carry)
+        previous = word
+
+    # Bit i is set when it is set in more than half of the features
+    fingerprint = 0
+    for bit in range(BITS):
+        count = 0
+        for level, plane in enumerate(planes):
+            count |= ((plane >> bit) & 1) << level
+        if 2 * count > features:
+            fingerprint |= 1 << bit
+    return fingerprint, len(words)
+
+def hamming(a: int, b: int) -> int:
+    return bin((a ^ b) & _MASK).count("1")
+
+def to_signed(fingerprint: int) -> int:
+    """Store an unsigned 64-bit fingerprint in a signed BIGINT column"""
+    return fingerprint - (1 << BITS) if fingerprint >= 1 << (BITS - 1) else fingerprint
+
+def to_unsigned(value: int) -> int:
+    return value & _MASK
+
+
+class SimHashIndex:
+    """
+    Near-duplicate lookup over 64-bit SimHash fingerprints.
+
+    The fingerprint is cut into max_distance + 1 bands; two fingerprints
+    within max_distance bits must agree on at least one whole band, so
+    only entries sharing a band are compared.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        width = BITS // bands
+        self._bands = [
+            (i * width, BITS - i * width if i == bands - 1 else width)
+            for i in range(bands)
+        ]
+        self._buckets: List[Dict[int, List[Tuple[int, str]]]] = [{} for _ in self._bands]
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _keys(self, fingerprint: int) -> Iterable[int]:
+        for shift, width in self._bands:
+            yield (fingerprint >> shift) & ((1 << width) - 1)
+
+    def add(self, fingerprint: int, key: str) -> None:
+        for buckets, band in zip(self._buckets, self._keys(fingerprint)):
+            buckets.setdefault(band, []).append((fingerprint, key))
+        self._size += 1
+
+    def find(self, fingerprint: int) -> Optional[str]:
+        """Key of the closest fingerprint within max_distance, or None"""
+        best_key = None
+        best_distance = self.max_distance + 1
+        for buckets, band in zip(self._buckets, self._keys(fingerprint)):
+            for candidate, key in buckets.get(band, ()):
+                distance = hamming(fingerprint, candidate)
+                if distance < best_distance:
+                    best_key, best_distance = key, distance
+                    if distance == 0:
+                        return best_key
+        return best_key
+
+
+def collapse_near_duplicates(
+    items: List[dict],
+    limit: int,
+    max_distance: int = 3,
+    min_words: int = 8,
+    text_key: str = "text"
+) -> List[dict]:
+    """
+    Keep the first item of every near-duplicate group (items are expected
+    best-first) and return at most `limit` items.
+    """
+    index = SimHashIndex(max_distance)
+    kept = []
+    for item in items:
+        fingerprint, words = simhash(item.get(text_key) or "")
+        if words >= min_words:
+            if index.find(fingerprint) is not None:
+                continue
+            index.add(fingerprint, str(len(kept)))
+        kept.append(item)
+        if len(kept) >= limit:
+            break
+    return kept
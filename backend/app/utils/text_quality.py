@@ -0,0 +1,91 @@
+"""
+Cheap per-page text quality checks.
+
+Scanned pages, image-only slides and mojibake still produce some text
+(OCR-less extractions, (cid:N) codes, 'Tiáº¿ng Viá»‡t'); chunking and
+embedding it only adds vectors that never match. A page is judged on:
+  - printable ratio: share of printable, non private-use characters
+  - character entropy: junk is either repetitive ('.....', 'IIII') or
+    close to random
+  - dictionary hit rate: share of words that are common Vietnamese
+    syllables or English words
+"""
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import NamedTuple, Optional
+
+MIN_CHARS = 20           # Shorter pages are 'empty'
+MIN_ENTROPY = 2.5        # bits/char; natural text is ~4-5.5
+MAX_ENTROPY = 6.5
+MIN_WORDS_FOR_DICTIONARY = 30  # Fewer words (tables, formulas): dictionary check skipped
+
+_WORD = re.compile(r"[^\W\d_]{2,}")  # single letters are too ambiguous to count
+
+VIETNAMESE_COMMON = frozenset("""
+và của là có các những được trong cho không một với người này để đã từ khi đến theo như về trên
+nhiều cũng thì sẽ ra vào tại hay nếu đó bị sau năm học hệ thống dữ liệu máy tính mô hình phương
+pháp thể hiện sử dụng nhau giữa hơn rất cần phải chúng ta tôi bạn họ nó mà nhưng vì nên do bởi
+đây kia nào gì ai sao thế nào việc làm điều sự quá trình kết quả thông tin chương bài phần mục
+ví dụ định nghĩa khái niệm đặc điểm giá trị số lượng thời gian đầu tiên cuối cùng mới cũ lớn nhỏ
+cao thấp tốt xấu nhất hai ba bốn năm sáu bảy tám chín mười trăm nghìn ngày tháng trường đại
+khoa lớp sinh viên giáo giảng dạy nghiên cứu phát triển ứng công nghệ kỹ thuật quản lý mạng
+chính xác đúng sai tạo xây dựng thực hiện nội dung yêu cầu mục tiêu vấn đề giải quyết
+trường hợp bảng hình cấu trúc chức năng tính toán biến hàm lệnh chương trình mã nguồn thuật toán
+đánh kiểm tra xử lý lưu trữ tìm kiếm danh sách đối tượng lớp kiểu thuộc gồm bao gồm cách
+""".split())
+
+ENGLISH_COMMON = frozenset("""
+the of and to in is it you that he was for on are with as his they be at one have this from
+or had by not word but what some we can out other were all there when up use your how said an
+each she which do their time if will way about many then them write would like so these her
+long make thing see him two has look more day could go come did number sound no most people my
+over know water than call first who may down side been now find any new work part take get
+place made live where after back little only round man year came show every good me give our
+under name very through just form sentence great think say help low line differ turn cause
+much mean before move right boy old too same tell does set three want air well also play small
+end put home read hand port large spell add even land here must big high such follow act why
+ask men change went light kind off need house picture try us again animal point data system
+model learning function value table figure chapter section example result method using used
+based between each into value type class object list algorithm network
+""".split())
+
+DICTIONARY = VIETNAMESE_COMMON | ENGLISH_COMMON
+
+class PageQuality(NamedTuple):
+    printable_ratio: float
+    entropy: float
+    dictionary_rate: Optional[float]  # None when the page has too few words
+    reason: Optional[str]             # why the page is low quality, None if it is fine
+
+def _is_printable(char: str) -> bool:
+    if char in "\n\r\t":
+        return True
+    return char.isprintable() and char != "\ufffd" and not ("\ue000" <= char <= "\uf8ff")
+
+def score_page(text: str, min_printable: float = 0.9, min_dictionary_rate: float = 0.1) -> PageQuality:
+    # Extractors often emit decomposed Vietnamese: combining marks are \W and would split words
+    stripped = unicodedata.normalize("NFC", text).strip()
+    if len(stripped) < MIN_CHARS:
+        return PageQuality(1.0, 0.0, None, "empty")
+
+    counts = Counter(stripped)
+    total = len(stripped)
+    printable = sum(count for char, count in counts.items() if _is_printable(char))
+    printable_ratio = printable / total
+    entropy = -sum(count / total * math.log2(count / total) for count in counts.values())
+
+    words = _WORD.findall(stripped.lower())
+    dictionary_rate = None
+    if len(words) >= MIN_WORDS_FOR_DICTIONARY:
+        dictionary_rate = sum(1 for word in words if word in DICTIONARY) / len(words)
+
+    reason = None
+    if printable_ratio < min_printable:
+        reason = "unprintable"
+    elif entropy < MIN_ENTROPY or entropy > MAX_ENTROPY:
+        reason = "entropy"
+    elif dictionary_rate is not None and dictionary_rate < min_dictionary_rate:
+        reason = "no_dictionary_words"
+    return PageQuality(round(printable_ratio, 3), round(entropy, 3), dictionary_rate, reason)
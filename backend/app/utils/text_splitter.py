@@ -0,0 +1,290 @@
+from collections import deque
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+Chunk = Tuple[int, str]  # (offset of the chunk's first character in the text, chunk text)
+Emit = Callable[[int, int, bool], None]  # (start, end, strip)
+
+class _Merger:
+    """
+    Incremental form of langchain's TextSplitter._merge_splits.
+
+    Pieces handed to one merger are contiguous (start mode keeps the
+    separator on the following piece), so the current chunk is just the
+    range [start, end) plus the lengths of its pieces for overlap popping.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int, emit: Emit):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.emit = emit
+        self._lengths = deque()
+        self._start = 0
+        self._end = 0
+        self._total = 0
+
+    @property
+    def start(self) -> Optional[int]:
+        """Start of the text still held (None when empty)"""
+        return self._start if self._lengths else None
+
+    def feed(self, pieces: Iterable[Tuple[int, int]], oversized: Callable[[int, int], None]) -> None:
+        """
+        Merge pieces; pieces of chunk_size or more flush the current chunk
+        and go to `oversized` instead. State lives in locals for the loop.
+        """
+        chunk_size = self.chunk_size
+        chunk_overlap = self.chunk_overlap
+        emit = self.emit
+        lengths = self._lengths
+        start, end, total = self._start, self._end, self._total
+
+        for piece_start, piece_end in pieces:
+            length = piece_end - piece_start
+            if length >= chunk_size:
+                if lengths:
+                    emit(start, end, True)
+                    lengths.clear()
+                    total = 0
+                oversized(piece_start, piece_end)
+                continue
+
+            if total + length > chunk_size and lengths:
+                emit(start, end, True)
+                # Keep popping while above the overlap or the next piece still does not fit
+                while total > chunk_overlap or (total + length > chunk_size and total > 0):
+                    popped = lengths.popleft()
+                    total -= popped
+                    start += popped
+            if not lengths:
+                start = piece_start
+            lengths.append(length)
+            end = piece_end
+            total += length
+
+        self._start, self._end, self._total = start, end, total
+
+    def flush(self) -> None:
+        if self._lengths:
+            self.emit(self._start, self._end, True)
+        self._lengths.clear()
+        self._total = 0
+
+
+class RecursiveTextSplitter:
+    """
+    Recursive character splitter that works on offsets.
+
+    Produces the same chunks as langchain's RecursiveCharacterTextSplitter
+    with literal separators, keep_separator=True, strip_whitespace=True and
+    length_function=len. Pieces are (start, end) ranges into the original
+    text; strings are only created for the final chunks.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 100,
+        separators: Optional[Sequence[str]] = None
+    ):
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be > 0, got {chunk_size}")
+        if chunk_overlap < 0:
+            raise ValueError(f"chunk_overlap must be >= 0, got {chunk_overlap}")
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f"Got a larger chunk overlap ({chunk_overlap}) than chunk size ({chunk_size}), should be smaller."
+            )
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = list(separators or DEFAULT_SEPARATORS)
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk for _, chunk in self.split_chunks(text)]
+
+    def split_chunks(self, text: str) -> List[Chunk]:
+        """Split text; each chunk comes with its start offset in `text`"""
+        chunks: List[Chunk] = []
+        self._split(text, 0, len(text), self.separators, _collector(text, chunks))
+        return chunks
+
+    def stream(self, lookahead: Optional[int] = None) -> "StreamingTextSplitter":
+        return StreamingTextSplitter(self, lookahead)
+
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _select(text: str, start: int, end: int, separators: List[str]) -> Tuple[str, List[str]]:
+        """First separator present in text[start:end] and the finer ones after it"""
+        for i, separator in enumerate(separators):
+            if separator == "":
+                return separator, []
+            if text.find(separator, start, end) != -1:
+                return separator, separators[i + 1:]
+        return separators[-1], []
+
+    @staticmethod
+    def _pieces(text: str, start: int, end: int, separator: str) -> Iterator[Tuple[int, int]]:
+        """Non-empty pieces; each one after the first begins with the separator"""
+        if separator == "":
+            for position in range(start, end):
+                yield position, position + 1
+            return
+
+        piece_start = start
+        match = text.find(separator, start, end)
+        while match != -1:
+            if match > piece_start:
+                yield piece_start, match
+            piece_start = match
+            match = text.find(separator, match + len(separator), end)
+        if end > piece_start:
+            yield piece_start, end
+
+    def _split(self, text: str, start: int, end: int, separators: List[str], emit: Emit) -> None:
+        separator, finer = self._select(text, start, end, separators)
+
+        def oversized(piece_start: int, piece_end: int) -> None:
+            if finer:
+                self._split(text, piece_start, piece_end, finer, emit)
+            else:
+                emit(piece_start, piece_end, False)  # unsplittable: kept as is
+
+        merger = _Merger(self.chunk_size, self.chunk_overlap, emit)
+        merger.feed(self._pieces(text, start, end, separator), oversized)
+        merger.flush()
+
+
+class StreamingTextSplitter:
+    """
+    Feed text incrementally (e.g. page by page); chunks are returned as
+    soon as they can no longer change. Offsets are global across feeds.
+
+    The top-level separator is fixed as soon as the highest-priority one
+    appears in the text, after which output is identical to splitting the
+    concatenated text in one call. If it has not appeared within
+    `lookahead` characters, the best separator seen so far is used instead.
+    """
+
+    def __init__(self, splitter: RecursiveTextSplitter, lookahead: Optional[int] = None):
+        self.splitter = splitter
+        self.lookahead = lookahead or 64 * splitter.chunk_size
+        self._buffer = ""
+        self._base = 0           # global offset of _buffer[0]
+        self._separator: Optional[str] = None
+        self._finer: List[str] = []
+        self._piece_start = 0    # global start of the current (open) top-level piece
+        self._search_from = 0    # global offset to resume the separator search
+        self._chunks: List[Chunk] = []
+        self._merger = _Merger(splitter.chunk_size, splitter.chunk_overlap, self._emit)
+
+    def feed(self, text: str) -> List[Chunk]:
+        self._buffer += text
+        if self._separator is None and not self._choose(final=False):
+            return self._drain()
+        self._consume(final=False)
+        self._trim()
+        return self._drain()
+
+    def finish(self) -> List[Chunk]:
+        if self._separator is None:
+            self._choose(final=True)
+        self._consume(final=True)
+        self._merger.flush()
+        return self._drain()
+
+    # ------------------------------------------------------------------
+    def _choose(self, final: bool) -> bool:
+        separators = self.splitter.separators
+        top = separators[0]
+        if top == "" or self._buffer.find(top) != -1 or final or len(self._buffer) >= self.lookahead:
+            self._separator, self._finer = RecursiveTextSplitter._select(
+                self._buffer, 0, len(self._buffer), separators
+            )
+            return True
+        return False
+
+    def _consume(self, final: bool) -> None:
+        self._merger.feed(self._completed_pieces(final), self._oversized)
+
+    def _completed_pieces(self, final: bool) -> Iterator[Tuple[int, int]]:
+        """Top-level pieces that can no longer grow (global offsets)"""
+        separator = self._separator
+        end = self._base + len(self._buffer)
+
+        if separator == "":
+            for position in range(self._piece_start, end):
+                yield position, position + 1
+            self._piece_start = end
+            return
+
+        buffer = self._buffer
+        base = self._base
+        piece_start = self._piece_start
+        search_from = self._search_from
+        match = buffer.find(separator, search_from - base)
+        while match != -1:
+            match += base
+            if match > piece_start:
+                yield piece_start, match
+            piece_start = match
+            search_from = match + len(separator)
+            match = buffer.find(separator, search_from - base)
+        self._piece_start = piece_start
+
+        if final:
+            if end > piece_start:
+                yield piece_start, end
+            self._piece_start = end
+        else:
+            # A later match may start in the last len(separator) - 1 characters
+            self._search_from = max(search_from, end - len(separator) + 1)
+
+    def _oversized(self, start: int, end: int) -> None:
+        base = self._base
+        if not self._finer:
+            self._emit(start, end, False)
+            return
+
+        def emit_local(local_start: int, local_end: int, strip: bool) -> None:
+            self._emit(local_start + base, local_end + base, strip)
+
+        self.splitter._split(self._buffer, start - base, end - base, self._finer, emit_local)
+
+    def _emit(self, start: int, end: int, strip: bool) -> None:
+        chunk = _materialize(self._buffer, start - self._base, end - self._base, strip)
+        if chunk is not None:
+            self._chunks.append((chunk[0] + self._base, chunk[1]))
+
+    def _trim(self) -> None:
+        """Drop buffered text that no open piece or pending chunk refers to"""
+        keep = self._piece_start
+        if self._merger.start is not None:
+            keep = min(keep, self._merger.start)
+        drop = keep - self._base
+        if drop > len(self._buffer) // 2:
+            self._buffer = self._buffer[drop:]
+            self._base = keep
+
+    def _drain(self) -> List[Chunk]:
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+def _materialize(text: str, start: int, end: int, strip: bool) -> Optional[Chunk]:
+    """Chunk text (stripped like langchain) and the offset of its first character"""
+    chunk = text[start:end]
+    if strip:
+        stripped = chunk.strip()
+        if not stripped:
+            return None
+        start += len(chunk) - len(chunk.lstrip())
+        chunk = stripped
+    return start, chunk
+
+def _collector(text: str, out: List[Chunk]) -> Emit:
+    def emit(start: int, end: int, strip: bool) -> None:
+        chunk = _materialize(text, start, end, strip)
+        if chunk is not None:
+            out.append(chunk)
+    return emit
@@ -0,0 +1,213 @@
+# app/worker.py
+"""
+Ingestion worker - runs outside the web process.
+
+Usage (from backend/):
+    python -m app.worker
+"""
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+from .config import settings
+from .database import SessionLocal
+from .services.document_processor import DocumentProcessor
+from .services.embedding_service_gemini import EmbeddingServiceGemini
+from .services.upload_service import UploadSessionService
+from .services.vector_gc import VectorGarbageCollector
+from .services.ingestion_queue import IngestionQueue, job_document_ids
+from .models.ingestion_job import JobKind
+from .utils import metrics
+from .utils.sandbox import ExtractionAborted
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ClaimedJob(NamedTuple):
+    """What a worker needs from a claimed job once its session is closed"""
+    id: int
+    kind: str
+    document_ids: List[int]
+    file_path: Optional[str]  # DOCUMENT jobs only
+    payload: Optional[Dict[str, Any]]
+    attempts: int
+
+class IngestionWorker:
+    """Polls the ingestion_jobs table and processes documents concurrently"""
+
+    def __init__(self, concurrency: int = None):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = concurrency or settings.INGEST_CONCURRENCY
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._stopping = asyncio.Event()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def stop(self) -> None:
+        logger.info("🛑 Stop requested, finishing in-flight jobs...")
+        self._stopping.set()
+
+    def _recover(self) -> None:
+        db = SessionLocal()
+        try:
+            recovered = IngestionQueue.recover(db)
+            if recovered:
+                logger.info(f"♻️ Recovered {recovered} ingestion jobs")
+            purged = UploadSessionService.purge_expired(db)
+            if purged:
+                logger.info(f"🧹 Purged {purged} expired upload sessions")
+        except Exception as e:
+            logger.error(f"❌ Recovery failed: {str(e)}", exc_info=True)
+            db.rollback()
+        finally:
+            db.close()
+
+    def _schedule_gc(self) -> None:
+        db = SessionLocal()
+        try:
+            if IngestionQueue.enqueue_vector_gc(db):
+                logger.info("🧹 Scheduled orphan-vector GC")
+        except Exception as e:
+            logger.error(f"❌ Could not schedule vector GC: {str(e)}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def _claim(self) -> Optional[ClaimedJob]:
+        db = SessionLocal()
+        try:
+            job = IngestionQueue.claim_next(db, self.worker_id)
+            if not job:
+                return None
+            if job.kind == JobKind.DOCUMENT:
+                return ClaimedJob(job.id, job.kind, [job.document_id], job.document.file_path, job.payload, job.attempts)
+            return ClaimedJob(job.id, job.kind, job_document_ids(job), None, job.payload, job.attempts)
+        finally:
+            db.close()
+
+    async def _heartbeat(self, job_id: int) -> None:
+        interval = max(1, settings.INGEST_JOB_TIMEOUT_SECONDS // 3)
+        while True:
+            await asyncio.sleep(interval)
+            db = SessionLocal()
+            try:
+                IngestionQueue.heartbeat(db, job_id, self.worker_id)
+            except Exception as e:
+                logger.warning(f"⚠️ Heartbeat failed for job {job_id}: {str(e)}")
+            finally:
+                db.close()
+
+    async def _run_job(self, job: ClaimedJob) -> None:
+        job_id, document_ids = job.id, job.document_ids
+        logger.info(f"🚀 Job {job_id} ({job.kind}) STARTED for documents {document_ids} (attempt {job.attempts})")
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        db = SessionLocal()
+        try:
+            if job.kind in (JobKind.DELETE_VECTORS, JobKind.VECTOR_GC):
+                collector = VectorGarbageCollector(EmbeddingServiceGemini())
+                if job.kind == JobKind.DELETE_VECTORS:
+                    await asyncio.to_thread(collector.delete_document_vectors, job.payload)
+                else:
+                    await asyncio.to_thread(collector.collect, db)
+            elif job.kind == JobKind.BATCH:
+                # Per-document failures are recorded on the documents themselves
+                await DocumentProcessor().process_documents(db, document_ids)
+            else:
+                await DocumentProcessor().process_document(db, document_ids[0], job.file_path)
+            IngestionQueue.complete(db, job_id)
+            logger.info(f"✅ Job {job_id} COMPLETED for documents {document_ids}")
+        except Exception as e:
+            logger.error(f"❌ Job {job_id} FAILED for docs {document_ids}: {str(e)}", exc_info=True)
+            try:
+                db.rollback()
+                # A killed extraction would be killed again: fail right away
+                IngestionQueue.fail(db, job_id, str(e), retry=not isinstance(e, ExtractionAborted))
+            except Exception as db_err:
+                logger.error(f"❌ Failed to record job failure: {str(db_err)}")
+        finally:
+            heartbeat.cancel()
+            db.close()
+            self._semaphore.release()
+
+    async def _serve_metrics(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Bare-bones HTTP: every request gets the metrics page"""
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            body = metrics.render().encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/plain; version=0.0.4\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                b"Connection: close\r\n\r\n" + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def run(self) -> None:
+        logger.info(f"👷 Ingestion worker {self.worker_id} started (concurrency={self.concurrency})")
+        metrics_server = None
+        if settings.WORKER_METRICS_PORT:
+            metrics_server = await asyncio.start_server(self._serve_metrics, port=settings.WORKER_METRICS_PORT)
+            logger.info(f"📈 Worker metrics on port {settings.WORKER_METRICS_PORT}")
+        await asyncio.to_thread(self._recover)
+        last_recovery = time.monotonic()
+
+        while not self._stopping.is_set():
+            if time.monotonic() - last_recovery > settings.INGEST_RECOVERY_INTERVAL_SECONDS:
+                await asyncio.to_thread(self._recover)
+                if settings.VECTOR_GC_INTERVAL_SECONDS:
+                    await asyncio.to_thread(self._schedule_gc)
+                last_recovery = time.monotonic()
+
+            await self._semaphore.acquire()
+            if self._stopping.is_set():
+                # Stopped while all slots were busy: don't start another job
+                self._semaphore.release()
+                break
+            try:
+                claimed = await asyncio.to_thread(self._claim)
+            except Exception as e:
+                logger.error(f"❌ Failed to claim job: {str(e)}")
+                claimed = None
+
+            if not claimed:
+                self._semaphore.release()
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), settings.INGEST_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.create_task(self._run_job(claimed))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if metrics_server is not None:
+            metrics_server.close()
+        logger.info("👋 Ingestion worker stopped")
+
+
+def main() -> None:
+    async def _main():
+        worker = IngestionWorker()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, worker.stop)
+            except NotImplementedError:  # Windows
+                pass
+        await worker.run()
+
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
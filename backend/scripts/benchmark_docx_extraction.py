@@ -0,0 +1,107 @@
+"""Benchmark DOCX extraction: streaming iterparse reader vs python-docx.
+
+Usage (from backend):
+  python scripts/benchmark_docx_extraction.py                 # synthetic document
+  python scripts/benchmark_docx_extraction.py path/to/file.docx
+
+Reports wall time, peak Python memory (tracemalloc) and characters for:
+  - iter_docx_blocks (app/utils/docx_reader.py), paragraphs + tables
+  - python-docx Document(...).paragraphs (previous implementation, no tables)
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.docx_reader import iter_docx_blocks
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>"""
+
+RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+def _p(text):
+    return f"<w:p><w:r><w:t xml:space=\"preserve\">{text}</w:t></w:r></w:p>"
+
+def make_synthetic_docx(path, sections=2000):
+    """Write a DOCX with `sections` x (heading, 3 paragraphs, 4x3 table)"""
+    body = []
+    for i in range(sections):
+        body.append(_p(f"Chương {i + 1}: Học máy và ứng dụng"))
+        for j in range(3):
+            body.append(_p(
+                f"Đoạn {j + 1}. Machine Learning là một nhánh của trí tuệ nhân tạo cho phép "
+                f"máy tính học từ dữ liệu và cải thiện hiệu suất mà không cần lập trình rõ ràng."
+            ))
+        rows = []
+        for r in range(4):
+            cells = "".join(f"<w:tc>{_p(f'Ô {r + 1}.{c + 1} - thuật toán {i}')}</w:tc>" for c in range(3))
+            rows.append(f"<w:tr>{cells}</w:tr>")
+        body.append(f"<w:tbl>{''.join(rows)}</w:tbl>")
+
+    document = (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<w:document {W}><w:body>{"".join(body)}</w:body></w:document>'
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", RELS)
+        archive.writestr("word/document.xml", document)
+
+def extract_streaming(path):
+    return "\n".join(iter_docx_blocks(path))
+
+def extract_python_docx(path):
+    from docx import Document as DocxDocument
+    doc = DocxDocument(path)
+    return "\n".join(paragraph.text for paragraph in doc.paragraphs if paragraph.text)
+
+def measure(name, func, path, repeat=3):
+    best = None
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        text = func(path)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if best is None or elapsed < best[0]:
+            best = (elapsed, peak, len(text))
+    elapsed, peak, chars = best
+    print(f"{name:<14} {elapsed * 1000:>9.1f} ms   peak {peak / 1024 / 1024:>7.1f} MB   {chars:>10} chars")
+
+def main():
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+        cleanup = False
+    else:
+        fd, path = tempfile.mkstemp(suffix=".docx")
+        os.close(fd)
+        make_synthetic_docx(path)
+        cleanup = True
+
+    print(f"File: {path} ({os.path.getsize(path) / 1024:.0f} KB)\n")
+    measure("iterparse", extract_streaming, path)
+    try:
+        measure("python-docx", extract_python_docx, path)
+    except ImportError:
+        print("python-docx      not installed, skipping baseline")
+
+    if cleanup:
+        os.remove(path)
+
+if __name__ == "__main__":
+    main()
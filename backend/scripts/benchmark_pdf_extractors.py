@@ -0,0 +1,62 @@
+"""Compare PDF extractor backends (app/utils/pdf_reader.py) on real documents.
+
+Usage (from backend):
+  python scripts/benchmark_pdf_extractors.py path/to/a.pdf ...
+  python scripts/benchmark_pdf_extractors.py --chain pypdf2,pymupdf uploads/*.pdf
+
+For every installed backend alone, and for the fallback chain
+(PDF_EXTRACTORS or --chain), reports over all given files:
+  - pages/sec and ms/page
+  - chars/page
+  - unusable pages (empty or garbled, i.e. pages that would fall back)
+Pick the fastest backend that keeps unusable pages low as the first
+entry of PDF_EXTRACTORS.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.pdf_reader import BACKENDS, available_backends, count_pdf_pages, extract_pdf_page_range, is_usable
+
+DEFAULT_CHAIN = "pypdf2,pymupdf,pdfminer,pypdf"
+MIN_PAGE_CHARS = 10
+
+def run(label, backends, paths):
+    pages = chars = unusable = 0
+    start = time.perf_counter()
+    for path in paths:
+        num_pages = count_pdf_pages(path, backends)
+        texts, _ = extract_pdf_page_range(path, 0, num_pages, backends, MIN_PAGE_CHARS)
+        pages += len(texts)
+        chars += sum(len(text) for text in texts)
+        unusable += sum(1 for text in texts if not is_usable(text, MIN_PAGE_CHARS))
+    elapsed = time.perf_counter() - start
+    if not pages:
+        print(f"{label:<28} no pages")
+        return
+    print(f"{label:<28} {pages / elapsed:>9.1f} pages/s {1000 * elapsed / pages:>9.2f} ms/page "
+          f"{chars / pages:>9.0f} chars/page {unusable:>6} unusable")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--chain", default=os.getenv("PDF_EXTRACTORS", DEFAULT_CHAIN))
+    args = parser.parse_args()
+
+    installed = available_backends(list(BACKENDS))
+    missing = [name for name in BACKENDS if name not in installed]
+    if missing:
+        print(f"Not installed, skipped: {', '.join(missing)}")
+
+    for name in installed:
+        run(name, [name], args.paths)
+
+    chain = available_backends([name.strip() for name in args.chain.split(",")])
+    if len(chain) > 1:
+        run("chain " + ",".join(chain), chain, args.paths)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Benchmark chunking: app/utils/text_splitter.py vs langchain's RecursiveCharacterTextSplitter.
+
+Usage (from backend):
+  python scripts/benchmark_text_splitter.py                    # synthetic Vietnamese corpus
+  python scripts/benchmark_text_splitter.py path/to/a.pdf ...  # real documents (.pdf/.docx/.txt)
+
+Reports chunks/sec and MB/sec (best of N runs) for:
+  - langchain      RecursiveCharacterTextSplitter.split_text (previous implementation)
+  - offsets        RecursiveTextSplitter.split_text
+  - streaming      RecursiveTextSplitter.stream(), fed one page at a time
+Same settings as DocumentProcessor: chunk_size=1000, chunk_overlap=100.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.text_splitter import RecursiveTextSplitter, DEFAULT_SEPARATORS
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+
+WORDS = (
+    "Machine Learning là một nhánh của trí tuệ nhân tạo cho phép máy tính học từ dữ liệu "
+    "và cải thiện hiệu suất mà không cần được lập trình rõ ràng. Thuật toán hồi quy tuyến tính "
+    "cây quyết định mạng nơ-ron học sâu dữ liệu huấn luyện kiểm thử đánh giá mô hình"
+).split()
+
+def make_vietnamese_pages(pages=300, seed=0):
+    """PDF-like pages: hard-wrapped lines, occasional blank lines, long unwrapped paragraphs"""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(pages):
+        paragraphs = []
+        for _ in range(rng.randint(3, 8)):
+            sentences = [
+                " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 24))).capitalize() + "."
+                for _ in range(rng.randint(2, 10))
+            ]
+            if rng.random() < 0.3:
+                paragraphs.append(" ".join(sentences))    # unwrapped paragraph
+            else:
+                paragraphs.append("\n".join(sentences))   # hard-wrapped extraction
+        separator = "\n\n" if rng.random() < 0.5 else "\n"
+        result.append(separator.join(paragraphs))
+    return result
+
+def load_pages(path):
+    """Pages as the ingestion pipeline sees them (needs the app's dependencies)"""
+    from app.services.text_store import join_pages
+    if path.endswith(".pdf"):
+        import PyPDF2
+        with open(path, "rb") as f:
+            pages = [page.extract_text() or "" for page in PyPDF2.PdfReader(f).pages]
+    elif path.endswith(".docx"):
+        from app.utils.docx_reader import iter_docx_blocks
+        pages = ["\n".join(iter_docx_blocks(path))]
+    else:
+        from app.utils.encoding import iter_text_segments
+        pages = list(iter_text_segments(path, 1048576, 65536))
+    return pages, join_pages(pages, path.endswith(".pdf"))
+
+def page_texts(pages):
+    """Per-page text in the same form as the pipeline feeds the splitter"""
+    return [f"\n[Page {n}]\n{text}" for n, text in enumerate(pages, start=1) if text]
+
+def measure(name, func, chars, repeat=5):
+    best = None
+    chunks = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<11} {best * 1000:>9.1f} ms   {chunks / best:>10.0f} chunks/s   "
+          f"{chars / best / 1024 / 1024:>6.1f} MB/s   {chunks:>6} chunks")
+    return best
+
+def run(label, pages):
+    feeds = page_texts(pages)
+    text = "".join(feeds)
+    print(f"\n{label}: {len(pages)} pages, {len(text)} chars")
+
+    splitter = RecursiveTextSplitter(CHUNK_SIZE, CHUNK_OVERLAP, DEFAULT_SEPARATORS)
+
+    def streaming():
+        stream = splitter.stream()
+        count = 0
+        for feed in feeds:
+            count += len(stream.feed(feed))
+        return count + len(stream.finish())
+
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        baseline = RecursiveCharacterTextSplitter(
+            chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP,
+            length_function=len, separators=DEFAULT_SEPARATORS
+        )
+        measure("langchain", lambda: len(baseline.split_text(text)), len(text))
+    except ImportError:
+        print("langchain   not installed, skipping baseline")
+
+    measure("offsets", lambda: len(splitter.split_text(text)), len(text))
+    measure("streaming", streaming, len(text))
+
+def main():
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            pages, _ = load_pages(path)
+            run(path, pages)
+    else:
+        run("synthetic", make_vietnamese_pages())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Check app/utils/encoding.py detects and decodes the text encodings we accept.
+
+Usage (from backend):
+  python scripts/test_encoding.py
+
+What it checks:
+  - detect_encoding() on BOM, BOM-less UTF-16 (ASCII-range text is also
+    valid UTF-8, NUL being a legal byte), UTF-8 and cp1258 samples
+  - iter_text_segments() gives back the original text (newlines normalized)
+    with segments smaller than the file, so decoding crosses boundaries
+"""
+import codecs
+import os
+import sys
+import tempfile
+import unicodedata
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.encoding import detect_encoding, iter_text_segments
+
+TONE_MARKS = "\u0300\u0301\u0303\u0309\u0323"
+
+def to_cp1258(text):
+    """cp1258 has the base vowels (â, ơ, ...) precomposed but tones as combining marks"""
+    out = []
+    for char in text:
+        decomposed = unicodedata.normalize("NFD", char)
+        tones = "".join(mark for mark in decomposed if mark in TONE_MARKS)
+        base = unicodedata.normalize("NFC", "".join(mark for mark in decomposed if mark not in TONE_MARKS))
+        out.append(base + tones)
+    return "".join(out).encode("cp1258")
+
+ASCII_TEXT = "Chapter 1\r\nIntroduction to data structures.\n" * 40
+VIETNAMESE_TEXT = "Chương 1\nGiới thiệu về cấu trúc dữ liệu và giải thuật.\n" * 40
+
+# (label, raw bytes, expected detect_encoding(), text after decoding)
+SAMPLES = [
+    ("utf-8", VIETNAMESE_TEXT.encode("utf-8"), "utf-8", VIETNAMESE_TEXT),
+    ("utf-8 ascii", ASCII_TEXT.encode("utf-8"), "utf-8", ASCII_TEXT),
+    ("utf-8 bom", codecs.BOM_UTF8 + VIETNAMESE_TEXT.encode("utf-8"), "utf-8-sig", VIETNAMESE_TEXT),
+    ("utf-16 bom", VIETNAMESE_TEXT.encode("utf-16"), "utf-16", VIETNAMESE_TEXT),
+    ("utf-16-le ascii", ASCII_TEXT.encode("utf-16-le"), "utf-16-le", ASCII_TEXT),
+    ("utf-16-be ascii", ASCII_TEXT.encode("utf-16-be"), "utf-16-be", ASCII_TEXT),
+    ("utf-16-le vietnamese", VIETNAMESE_TEXT.encode("utf-16-le"), "utf-16-le", VIETNAMESE_TEXT),
+    ("cp1258", to_cp1258("Giáo trình lập trình căn bản\n") * 40, None, None),
+]
+
+def check(label, raw, expected_encoding, expected_text):
+    encoding = detect_encoding(raw[:65536])
+    if expected_encoding is not None:
+        assert encoding == expected_encoding, f"{label}: detected {encoding}, expected {expected_encoding}"
+    else:
+        # Single-byte code pages are statistical guesses: just require no NUL-interleaving
+        assert not encoding.startswith("utf-16"), f"{label}: detected {encoding}"
+
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(raw)
+    try:
+        text = "".join(iter_text_segments(f.name, segment_bytes=257, sniff_bytes=65536))
+    finally:
+        os.remove(f.name)
+
+    assert "\x00" not in text, f"{label}: NUL characters in decoded text"
+    if expected_text is not None:
+        normalized = expected_text.replace("\r\n", "\n")
+        assert text == normalized, f"{label}: decoded text differs"
+    print(f"✅ {label}: {encoding}")
+
+if __name__ == "__main__":
+    for sample in SAMPLES:
+        check(*sample)
+    print("All encoding checks passed")
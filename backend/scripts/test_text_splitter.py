@@ -0,0 +1,89 @@
+"""Check app/utils/text_splitter.py produces the same chunks as langchain.
+
+Usage (from backend):
+  python scripts/test_text_splitter.py                    # synthetic Vietnamese corpus + edge cases
+  python scripts/test_text_splitter.py path/to/a.pdf ...  # also compare on real documents
+
+What it checks:
+  - split_text() == langchain RecursiveCharacterTextSplitter.split_text()
+    (skipped if langchain-text-splitters is not installed)
+  - every chunk offset from split_chunks() points at the chunk in the text
+  - streaming (fed page by page) gives the same chunks as one split_text() call
+"""
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.text_splitter import RecursiveTextSplitter, DEFAULT_SEPARATORS
+from benchmark_text_splitter import make_vietnamese_pages, load_pages, page_texts
+
+EDGE_CASES = [
+    "",
+    "   \n\n  ",
+    "Xin chào",
+    "a" * 2500,                                     # no separator at all
+    ("Câu một. " * 300).strip(),                    # only ". " and " "
+    "\n\n\n\nĐoạn sau nhiều dòng trống\n\n\n",      # overlapping separator runs
+    ("dòng ngắn\n" * 500) + "\n\n" + ("x" * 1200),  # oversized last piece
+]
+
+def reference_splitter(chunk_size, chunk_overlap):
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    except ImportError:
+        return None
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+        length_function=len, separators=DEFAULT_SEPARATORS
+    )
+
+def check(label, text, feeds=None, chunk_size=1000, chunk_overlap=100):
+    splitter = RecursiveTextSplitter(chunk_size, chunk_overlap, DEFAULT_SEPARATORS)
+    chunks = splitter.split_chunks(text)
+    texts = [chunk for _, chunk in chunks]
+
+    reference = reference_splitter(chunk_size, chunk_overlap)
+    if reference is not None:
+        expected = reference.split_text(text)
+        assert texts == expected, f"{label}: {len(texts)} chunks vs langchain {len(expected)}"
+
+    for offset, chunk in chunks:
+        assert text[offset:offset + len(chunk)] == chunk, f"{label}: bad offset {offset}"
+
+    stream = splitter.stream(lookahead=len(text) + 1)
+    streamed = []
+    for feed in feeds or [text]:
+        streamed.extend(stream.feed(feed))
+    streamed.extend(stream.finish())
+    assert streamed == chunks, f"{label}: streaming differs from split_chunks"
+
+    print(f"OK  {label}: {len(chunks)} chunks")
+
+def main():
+    if reference_splitter(1000, 100) is None:
+        print("langchain-text-splitters not installed: only offsets/streaming are checked")
+
+    for i, text in enumerate(EDGE_CASES):
+        check(f"edge case {i}", text)
+
+    pages = make_vietnamese_pages()
+    feeds = page_texts(pages)
+    check("synthetic corpus", "".join(feeds), feeds)
+
+    rng = random.Random(1)
+    for size, overlap in [(50, 0), (200, 199), (333, 40), (1000, 100)]:
+        sample = "".join(feeds[:rng.randint(1, 20)])
+        check(f"synthetic, size={size} overlap={overlap}", sample, chunk_size=size, chunk_overlap=overlap)
+
+    for path in sys.argv[1:]:
+        pages, text = load_pages(path)
+        check(path, text)
+        feeds = page_texts(pages)
+        check(f"{path} (page feeds)", "".join(feeds), feeds)
+
+    print("All text splitter checks passed")
+
+if __name__ == "__main__":
+    main()